@@ -0,0 +1,112 @@
+"""Measure computing node depths on random graphs.
+
+The baseline is the `get_depths` this replaced, a BFS per pair of nodes, kept
+below as it was so the comparison doesn't depend on the current code.
+
+Usage:
+    python benchmarks/depths.py --nodes 10000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+from collections import deque
+from typing import List
+
+from pandas import DataFrame, Series
+
+from code_blocks.analyzer import _build_csr_graph, _get_graph_depths, get_depths
+
+
+def baseline_get_depths(df: DataFrame, src_col: str, dst_col: str) -> Series:
+    graph = dict(df[[src_col, dst_col]].groupby(src_col)[dst_col].groups)
+    graph = {k: set(df.loc[v, dst_col]) for k, v in graph.items()}
+    for dst_node in df[dst_col].unique():
+        graph[dst_node] = graph.get(dst_node, set())
+
+    def find_shortest_path(start, end):
+        dist = {start: [start]}
+        q = deque([start])
+        while len(q):
+            at = q.popleft()
+            for next in graph[at]:
+                if next not in dist:
+                    dist[next] = [dist[at], next]
+                    q.append(next)
+
+        return dist.get(end)
+
+    def flatten_path(p: list) -> list:
+        if len(p) == 1:
+            return p
+        else:
+            return flatten_path(p[0]) + [p[1]]
+
+    def get_distance(start, end):
+        path = find_shortest_path(start, end)
+        if path is not None:
+            return len(flatten_path(path)) - 1
+        else:
+            return None
+
+    def get_node_depth(node):
+        return max(get_distance(source, node) or 0 for source in graph)
+
+    depths = Series({n: get_node_depth(n) for n in graph})
+    depths -= depths.min()
+
+    return depths
+
+
+def random_edges(nodes: int, edges: int) -> DataFrame:
+    rng = random.Random(0)
+    return DataFrame(
+        {
+            "src": [rng.randrange(nodes) for _ in range(edges)],
+            "dst": [rng.randrange(nodes) for _ in range(edges)],
+        }
+    )
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main(sizes: List[int], degree: int, baseline_nodes: int):
+    if baseline_nodes > 0:
+        df = random_edges(baseline_nodes, baseline_nodes * degree)
+        old, old_time = timed(lambda: baseline_get_depths(df, "src", "dst"))
+        _, new_time = timed(lambda: get_depths(df, "src", "dst"))
+        print(
+            f"{len(old)} nodes, baseline get_depths: {old_time:.2f}s, "
+            f"get_depths: {new_time * 1000:.1f}ms"
+        )
+
+    for nodes in sizes:
+        df = random_edges(nodes, nodes * degree)
+        graph, build_time = timed(lambda: _build_csr_graph(df, "src", "dst"))
+        depths, depth_time = timed(lambda: _get_graph_depths(graph))
+        print(
+            f"{len(graph.labels)} nodes, {len(df)} edges: build {build_time:.2f}s, "
+            f"depths {depth_time:.2f}s, max depth {max(depths)}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--nodes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    arg_parser.add_argument("--degree", type=int, default=3, help="Edges per node")
+    arg_parser.add_argument(
+        "--baseline-nodes",
+        type=int,
+        default=300,
+        help="Graph size to compare with the baseline get_depths, 0 to skip",
+    )
+
+    args = arg_parser.parse_args()
+
+    main(args.nodes, args.degree, args.baseline_nodes)
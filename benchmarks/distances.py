@@ -0,0 +1,62 @@
+"""Measure shortest distance queries on a random graph.
+
+Usage:
+    python benchmarks/distances.py --nodes 100000 --targets 100
+"""
+
+import argparse
+import random
+import time
+
+from code_blocks.analyzer import (
+    ShortestPaths,
+    _build_csr_graph,
+    _build_graph,
+    get_distance,
+)
+from benchmarks.depths import random_edges
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main(nodes: int, degree: int, targets: int, sources: int):
+    df = random_edges(nodes, nodes * degree)
+    graph = _build_graph(df, "src", "dst")
+    csr_graph = _build_csr_graph(df, "src", "dst")
+    print(f"{len(graph)} nodes, {len(df)} edges")
+
+    rng = random.Random(1)
+    labels = list(graph)
+    source = labels[0]
+    target_labels = [rng.choice(labels) for _ in range(targets)]
+
+    _, pair_time = timed(
+        lambda: [get_distance(graph, source, target) for target in target_labels]
+    )
+    print(f"{targets} targets, a BFS per pair: {pair_time:.2f}s")
+
+    paths, batch_time = timed(lambda: ShortestPaths(csr_graph, [source]))
+    print(f"one source to all nodes, one BFS: {batch_time * 1000:.1f}ms")
+
+    _, path_time = timed(lambda: [paths.path(target) for target in target_labels])
+    print(f"{targets} paths reconstructed: {path_time * 1000:.1f}ms")
+
+    batch_sources = labels[:sources]
+    _, multi_time = timed(lambda: ShortestPaths(csr_graph, batch_sources))
+    print(f"{sources} sources, one BFS: {multi_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--nodes", type=int, default=100000)
+    arg_parser.add_argument("--degree", type=int, default=3, help="Edges per node")
+    arg_parser.add_argument("--targets", type=int, default=100)
+    arg_parser.add_argument("--sources", type=int, default=1000)
+
+    args = arg_parser.parse_args()
+
+    main(args.nodes, args.degree, args.targets, args.sources)
@@ -0,0 +1,81 @@
+"""Measure exporting and loading a large graph as .npz and Parquet.
+
+Usage:
+    python benchmarks/export.py --edges 2000000 --output /tmp/graph
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+from code_blocks.export import export_npz, export_parquet, load_npz, load_parquet
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition
+
+
+def build_graph(nodes: int, edges: int, files: int) -> CodeGraph:
+    graph = CodeGraph()
+    for i in range(nodes):
+        path = ("pkg", f"module{i % files}.py")
+        graph.add_definition(Definition(i, 4, (), path, f"f{i}", "function"))
+
+    rng = random.Random(0)
+    for _ in range(edges):
+        graph.add_edge(rng.randrange(nodes), rng.randrange(nodes))
+
+    graph.edge_count()
+
+    return graph
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main(nodes: int, edges: int, files: int, output: Path):
+    graph, build_time = timed(lambda: build_graph(nodes, edges, files))
+    print(f"nodes: {len(graph)}, edges: {graph.edge_count()}, built: {build_time:.2f}s")
+
+    output.mkdir(parents=True, exist_ok=True)
+    npz_path = output / "graph.npz"
+    parquet_path = output / "graph"
+
+    _, export_time = timed(lambda: export_npz(graph, npz_path))
+    print(f"npz export: {export_time:.2f}s, {npz_path.stat().st_size / 1e6:.1f}MB")
+
+    loaded, load_time = timed(lambda: load_npz(npz_path))
+    print(f"npz load (mmap): {load_time * 1000:.1f}ms")
+
+    _, scan_time = timed(lambda: int(np.bincount(loaded.edge_dst).max()))
+    print(f"npz max in-degree scan: {scan_time * 1000:.1f}ms")
+
+    _, copy_time = timed(lambda: dict(np.load(npz_path)))
+    print(f"npz load (np.load, copied): {copy_time * 1000:.1f}ms")
+
+    try:
+        _, export_time = timed(lambda: export_parquet(graph, parquet_path))
+    except ImportError as e:
+        print(f"parquet skipped: {e}")
+        return
+
+    print(f"parquet export: {export_time:.2f}s")
+
+    _, load_time = timed(lambda: load_parquet(parquet_path))
+    print(f"parquet load (mmap): {load_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--nodes", type=int, default=200000)
+    arg_parser.add_argument("--edges", type=int, default=2000000)
+    arg_parser.add_argument("--files", type=int, default=5000)
+    arg_parser.add_argument("-o", "--output", type=Path, default=Path("graph-export"))
+
+    args = arg_parser.parse_args()
+
+    main(args.nodes, args.edges, args.files, args.output)
@@ -0,0 +1,89 @@
+"""Compare the memory of a set of resolved references against a CodeGraph.
+
+The references are synthetic, with fresh path and scope tuples per reference,
+like the ones built from LSP responses.
+
+Usage:
+    python benchmarks/graph_memory.py --definitions 50000 --references 10
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+
+def make_definitions(count: int, files: int):
+    return [
+        Definition(
+            i,
+            4,
+            (f"Class{i % 7}",),
+            ("pkg", f"module{i % files}.py"),
+            f"f{i}",
+            "function",
+        )
+        for i in range(count)
+    ]
+
+
+def make_resolved_references(definitions, references: int, files: int):
+    rng = random.Random(0)
+
+    for definition in definitions:
+        for _ in range(references):
+            i = rng.randrange(len(definitions))
+            path = ("pkg", f"module{i % files}.py")
+            scope = (f"Class{i % 7}", f"f{i}")
+            yield ResolvedReference(Reference(i, scope, path), definition)
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return result, size, elapsed
+
+
+def main(definitions_count: int, references: int, files: int):
+    definitions = make_definitions(definitions_count, files)
+
+    resolved, set_size, set_time = measure(
+        lambda: set(make_resolved_references(definitions, references, files))
+    )
+    del resolved
+
+    def build_graph():
+        graph = CodeGraph.from_resolved(
+            definitions, make_resolved_references(definitions, references, files)
+        )
+        graph.edge_count()
+        return graph
+
+    graph, graph_size, graph_time = measure(build_graph)
+
+    print(
+        f"definitions: {definitions_count}, references: {definitions_count * references}"
+    )
+    print(f"{'':>6} {'memory':>10} {'time':>8}")
+    print(f"{'set':>6} {set_size / 1e6:>8.1f}MB {set_time:>7.2f}s")
+    print(f"{'graph':>6} {graph_size / 1e6:>8.1f}MB {graph_time:>7.2f}s")
+    print(f"nodes: {len(graph)}, unique edges: {graph.edge_count()}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--definitions", type=int, default=50000)
+    arg_parser.add_argument("--references", type=int, default=10)
+    arg_parser.add_argument("--files", type=int, default=2000)
+
+    args = arg_parser.parse_args()
+
+    main(args.definitions, args.references, args.files)
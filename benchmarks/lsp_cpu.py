@@ -0,0 +1,75 @@
+"""Measure wall time and CPU-seconds of resolving a project through the LSP.
+
+Run with different --in-flight values to compare pipelining depths.
+
+CPU time is measured for this process, i.e. the client and transport threads
+that share the machine with the language server.
+
+Usage:
+    python benchmarks/lsp_cpu.py --project . --in-flight 16
+"""
+
+import argparse
+import os
+import resource
+import time
+from pathlib import Path
+
+from code_blocks.lsp_client import LspClient
+from code_blocks.lsp_server import LspServer
+from code_blocks.parser import Parser
+from code_blocks.resolver import Resolver
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main(project: Path, in_flight: int):
+    project = project.resolve().absolute()
+
+    wall_start = time.perf_counter()
+    self_start = cpu_seconds()
+
+    lsp_server = LspServer(str(project))
+    lsp_client = LspClient(lsp_server)
+    parser = Parser()
+    resolver = Resolver(lsp_client, project.as_uri(), in_flight)
+
+    for root, _, files in os.walk(project):
+        for f in files:
+            path = Path(root) / f
+            if path.suffix == ".py":
+                relative_path = path.relative_to(project).parts
+                source = path.read_text()
+                parser.consume(source, relative_path)
+                resolver.consume(source, relative_path)
+
+    resolve_start = time.perf_counter()
+    resolved_references = resolver.resolve_definitions(
+        parser.definitions, parser.path_line_scopes
+    )
+    resolve = time.perf_counter() - resolve_start
+
+    lsp_client.stop()
+    lsp_server.stop()
+
+    wall = time.perf_counter() - wall_start
+    self_cpu = cpu_seconds() - self_start
+
+    print(f"definitions: {len(parser.definitions)}")
+    print(f"resolved:    {len(resolved_references)}")
+    print(f"resolve:     {resolve:.2f}s")
+    print(f"wall:        {wall:.2f}s")
+    print(f"client cpu:  {self_cpu:.2f}s")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-p", "--project", type=Path, default=Path("."))
+    arg_parser.add_argument("--in-flight", type=int, default=1)
+
+    args = arg_parser.parse_args()
+
+    main(args.project, args.in_flight)
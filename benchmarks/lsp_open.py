@@ -0,0 +1,76 @@
+"""Compare the LSP open phase of per-file opens against bulk opens.
+
+Per-file opens wait for the server to publish diagnostics of every file, bulk
+opens send all files back to back and wait for a single round-trip.
+
+Usage:
+    python benchmarks/lsp_open.py --project path/to/project
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from code_blocks.lsp_client import LspClient
+from code_blocks.lsp_server import LspServer
+from code_blocks.parser import Parser
+from code_blocks.resolver import Resolver
+
+
+def run(project: Path, bulk: bool, in_flight: int):
+    lsp_server = LspServer(str(project))
+    lsp_client = LspClient(lsp_server)
+    resolver = Resolver(lsp_client, project.as_uri(), in_flight)
+    parser = Parser()
+
+    sources = []
+    for root, _, files in os.walk(project):
+        for f in files:
+            path = Path(root) / f
+            if path.suffix == ".py":
+                relative_path = path.relative_to(project).parts
+                source = path.read_text()
+                parser.consume(source, relative_path)
+                sources.append((source, relative_path))
+
+    open_start = time.perf_counter()
+    if bulk:
+        resolver.consume_many(sources)
+    else:
+        for source, relative_path in sources:
+            resolver.consume(source, relative_path)
+    open_time = time.perf_counter() - open_start
+
+    resolve_start = time.perf_counter()
+    resolved_references = resolver.resolve_definitions(
+        parser.definitions, parser.path_line_scopes
+    )
+    resolve_time = time.perf_counter() - resolve_start
+
+    lsp_client.stop()
+    lsp_server.stop()
+
+    return len(sources), open_time, resolve_time, len(resolved_references)
+
+
+def main(project: Path, in_flight: int):
+    project = project.resolve().absolute()
+
+    print(f"{'mode':>8} {'files':>6} {'open':>9} {'resolve':>9} {'resolved':>9}")
+    for bulk in (False, True):
+        files, open_time, resolve_time, resolved = run(project, bulk, in_flight)
+        print(
+            f"{'bulk' if bulk else 'per-file':>8} {files:>6} {open_time:>8.2f}s "
+            f"{resolve_time:>8.2f}s {resolved:>9}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-p", "--project", type=Path, default=Path("."))
+    arg_parser.add_argument("--in-flight", type=int, default=16)
+
+    args = arg_parser.parse_args()
+
+    main(args.project, args.in_flight)
@@ -0,0 +1,66 @@
+"""Measure how resolving a project scales with the amount of LSP servers.
+
+Usage:
+    python benchmarks/lsp_pool.py --project path/to/project --max-jobs 8
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from code_blocks.parser import Parser
+from code_blocks.resolver_pool import ResolverPool
+
+
+def run(project: Path, jobs: int, in_flight: int):
+    start = time.perf_counter()
+
+    resolver_pool = ResolverPool(project, jobs, in_flight)
+    parser = Parser()
+
+    for root, _, files in os.walk(project):
+        for f in files:
+            path = Path(root) / f
+            if path.suffix == ".py":
+                relative_path = path.relative_to(project).parts
+                source = path.read_text()
+                parser.consume(source, relative_path)
+                resolver_pool.consume(source, relative_path)
+
+    resolve_start = time.perf_counter()
+    resolved_references = resolver_pool.resolve_definitions(
+        parser.definitions, parser.path_line_scopes
+    )
+    resolve = time.perf_counter() - resolve_start
+
+    resolver_pool.stop()
+    wall = time.perf_counter() - start
+
+    return resolve, wall, len(resolved_references)
+
+
+def main(project: Path, max_jobs: int, in_flight: int):
+    project = project.resolve().absolute()
+
+    print(f"{'jobs':>4} {'resolve':>9} {'speedup':>8} {'wall':>9} {'resolved':>9}")
+
+    baseline = None
+    for jobs in range(1, max_jobs + 1):
+        resolve, wall, resolved = run(project, jobs, in_flight)
+        baseline = baseline or resolve
+        print(
+            f"{jobs:>4} {resolve:>8.2f}s {baseline / resolve:>7.2f}x "
+            f"{wall:>8.2f}s {resolved:>9}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-p", "--project", type=Path, default=Path("."))
+    arg_parser.add_argument("--max-jobs", type=int, default=8)
+    arg_parser.add_argument("--in-flight", type=int, default=16)
+
+    args = arg_parser.parse_args()
+
+    main(args.project, args.max_jobs, args.in_flight)
@@ -0,0 +1,50 @@
+"""Measure how soon streamed references arrive, compared to the full resolve.
+
+Usage:
+    python benchmarks/lsp_stream.py --project path/to/project
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from code_blocks.parser import Parser
+from code_blocks.resolver_pool import ResolverPool
+from code_blocks.scanner import Scanner
+
+
+def main(project: Path, jobs: int, in_flight: int):
+    project = project.resolve().absolute()
+
+    sources = list(Scanner(project).scan())
+    parser = Parser()
+    parser.consume_many(sources)
+
+    resolver_pool = ResolverPool(project, jobs, in_flight)
+    resolver_pool.consume_many(sources)
+
+    start = time.perf_counter()
+    first = None
+    references = 0
+    for _ in resolver_pool.iter_resolved_references(
+        parser.definitions, parser.path_line_scopes
+    ):
+        first = first or time.perf_counter() - start
+        references += 1
+    total = time.perf_counter() - start
+
+    resolver_pool.stop()
+
+    print(f"definitions: {len(parser.definitions)}, references: {references}")
+    print(f"first reference: {first or 0:.3f}s, all references: {total:.2f}s")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-p", "--project", type=Path, default=Path("."))
+    arg_parser.add_argument("-j", "--jobs", type=int, default=1)
+    arg_parser.add_argument("--in-flight", type=int, default=16)
+
+    args = arg_parser.parse_args()
+
+    main(args.project, args.jobs, args.in_flight)
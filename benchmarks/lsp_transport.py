@@ -0,0 +1,124 @@
+"""Compare LSP server stdout throughput of the framed reader against byte reads.
+
+A fake server (`cat` of a prepared stream of `window/logMessage` notifications)
+is read through both paths, and each message is decoded by a sansio client, the
+same way `LspClient` does it.
+
+Usage:
+    python benchmarks/lsp_transport.py --messages 200 --size 100000
+"""
+
+import argparse
+import json
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+
+from sansio_lsp_client.client import Client
+
+from code_blocks.lsp_server import LspServer
+
+
+def build_stream(messages: int, size: int) -> bytes:
+    stream = bytearray()
+    for i in range(messages):
+        content = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": "window/logMessage",
+                "params": {"type": 3, "message": f"{i}:" + "x" * size},
+            }
+        ).encode()
+        stream += f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+
+    return bytes(stream)
+
+
+def run_framed(stream_path: Path, messages: int) -> float:
+    start = time.perf_counter()
+
+    server = LspServer(str(stream_path.parent), command=("cat", str(stream_path)))
+    client = Client()
+
+    received = 0
+    while received < messages:
+        data = server.read_bytes()
+        if data is not None:
+            received += len(list(client.recv(data)))
+
+    elapsed = time.perf_counter() - start
+    server.stop()
+
+    return elapsed
+
+
+def run_byte_at_a_time(stream_path: Path, messages: int) -> float:
+    """The transport before framing: one read, queue item and parse per byte."""
+
+    start = time.perf_counter()
+
+    proc = subprocess.Popen(["cat", str(stream_path)], stdout=subprocess.PIPE)
+    assert proc.stdout is not None
+    stdout = proc.stdout
+    stdout_q: "Queue[bytes]" = Queue()
+
+    def read_stdout():
+        while True:
+            byte = stdout.read(1)
+            if len(byte) == 0:
+                break
+            stdout_q.put(byte)
+
+    reader = Thread(target=read_stdout)
+    reader.start()
+
+    client = Client()
+    received = 0
+    while received < messages:
+        received += len(list(client.recv(stdout_q.get())))
+
+    elapsed = time.perf_counter() - start
+    reader.join()
+    proc.wait()
+
+    return elapsed
+
+
+def report(name: str, elapsed: float, messages: int, total_bytes: int):
+    print(
+        f"{name:>18}: {elapsed:8.3f}s "
+        f"{total_bytes / elapsed / 1e6:10.2f} MB/s "
+        f"{messages / elapsed:10.1f} messages/s"
+    )
+
+
+def main(messages: int, size: int, skip_legacy: bool):
+    stream = build_stream(messages, size)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        stream_path = Path(tempdir) / "stream.bin"
+        stream_path.write_bytes(stream)
+
+        print(f"{messages} messages, {len(stream) / 1e6:.2f} MB")
+        report("framed", run_framed(stream_path, messages), messages, len(stream))
+        if not skip_legacy:
+            elapsed = run_byte_at_a_time(stream_path, messages)
+            report("byte at a time", elapsed, messages, len(stream))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--messages", type=int, default=200)
+    arg_parser.add_argument("--size", type=int, default=20_000)
+    arg_parser.add_argument(
+        "--skip-legacy",
+        action="store_true",
+        help="Only run the framed reader (byte reads are quadratic in message size)",
+    )
+
+    args = arg_parser.parse_args()
+
+    main(args.messages, args.size, args.skip_legacy)
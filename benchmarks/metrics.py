@@ -0,0 +1,61 @@
+"""Measure computing graph metrics on a large random graph.
+
+Usage:
+    python benchmarks/metrics.py --nodes 200000 --edges 2000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from code_blocks.export import GraphArrays, graph_columns
+from code_blocks.metrics import (
+    components,
+    fan_in,
+    fan_out,
+    graph_metrics,
+    layer_violations,
+    node_layers,
+    pagerank,
+)
+from benchmarks.export import build_graph
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main(nodes: int, edges: int, files: int):
+    graph = GraphArrays(graph_columns(build_graph(nodes, edges, files)))
+    print(f"nodes: {len(graph)}, edges: {len(graph.edge_src)}")
+
+    layers = [f"pkg/module{i}.py" for i in range(0, files, files // 10)]
+
+    benchmarks = {
+        "fan-in/fan-out": lambda: (fan_in(graph), fan_out(graph)),
+        "components": lambda: components(graph),
+        "pagerank": lambda: pagerank(graph),
+        "layers": lambda: layer_violations(graph, node_layers(graph, layers)),
+        "all, as a DataFrame": lambda: graph_metrics(graph, layers),
+    }
+
+    for label, benchmark in benchmarks.items():
+        _, total = timed(benchmark)
+        print(f"{label}: {total:.2f}s")
+
+    component_sizes = np.bincount(components(graph))
+    print(f"largest cycle: {component_sizes.max()} nodes")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--nodes", type=int, default=200000)
+    arg_parser.add_argument("--edges", type=int, default=2000000)
+    arg_parser.add_argument("--files", type=int, default=5000)
+
+    args = arg_parser.parse_args()
+
+    main(args.nodes, args.edges, args.files)
@@ -0,0 +1,64 @@
+"""Measure how parsing a project scales with the amount of worker processes.
+
+Usage:
+    python benchmarks/parse.py --project path/to/project --max-jobs 8
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from code_blocks.parser import Parser
+
+
+def read_sources(project: Path):
+    sources = []
+    for root, _, files in os.walk(project):
+        for f in files:
+            path = Path(root) / f
+            if path.suffix == ".py":
+                relative_path = path.relative_to(project).parts
+                sources.append((path.read_text(), relative_path))
+
+    return sources
+
+
+def run(sources, jobs: int):
+    start = time.perf_counter()
+
+    parser = Parser()
+    parser.consume_many(sources, jobs)
+
+    return time.perf_counter() - start, len(parser.definitions)
+
+
+def main(project: Path, max_jobs: int, repeat: int):
+    project = project.resolve().absolute()
+
+    # repeat the project sources under different paths, to simulate a large repo
+    sources = [
+        (source, (f"copy{i}",) + path)
+        for i in range(repeat)
+        for source, path in read_sources(project)
+    ]
+
+    print(f"files: {len(sources)}, cpus: {os.cpu_count()}")
+    print(f"{'jobs':>4} {'parse':>9} {'speedup':>8} {'definitions':>12}")
+
+    baseline = None
+    for jobs in range(1, max_jobs + 1):
+        parse, definitions = run(sources, jobs)
+        baseline = baseline or parse
+        print(f"{jobs:>4} {parse:>8.2f}s {baseline / parse:>7.2f}x {definitions:>12}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("-p", "--project", type=Path, default=Path("."))
+    arg_parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--repeat", type=int, default=1)
+
+    args = arg_parser.parse_args()
+
+    main(args.project, args.max_jobs, args.repeat)
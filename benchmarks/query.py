@@ -0,0 +1,79 @@
+"""Measure offline queries on a large exported graph.
+
+Usage:
+    python benchmarks/query.py --edges 100000 --output /tmp/graph.npz
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+from code_blocks.export import export_npz
+from code_blocks.graph import CodeGraph
+from code_blocks.query import GraphQuery
+from code_blocks.types import Definition
+
+
+def build_graph(nodes: int, edges: int, files: int) -> CodeGraph:
+    graph = CodeGraph()
+    for i in range(nodes):
+        path = ("pkg", f"module{i % files}.py")
+        graph.add_definition(Definition(i, 4, (), path, f"f{i}", "function"))
+
+    rng = random.Random(0)
+    for _ in range(edges):
+        graph.add_edge(rng.randrange(nodes), rng.randrange(nodes))
+
+    return graph
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def main(nodes: int, edges: int, files: int, queries: int, output: Path):
+    graph = build_graph(nodes, edges, files)
+    export_npz(graph, output)
+    print(f"nodes: {len(graph)}, edges: {graph.edge_count()}")
+
+    query, load_time = timed(lambda: GraphQuery.load(output))
+    print(f"load: {load_time * 1000:.2f}ms")
+
+    rng = random.Random(1)
+    names = [f"f{rng.randrange(nodes)}" for _ in range(queries)]
+
+    benchmarks = {
+        "find (bare name)": lambda name: query.find(name),
+        "find (qualified)": lambda name: query.find(
+            f"pkg/module{int(name[1:]) % files}.py:{name}"
+        ),
+        "callers": lambda name: query.callers(query.find(name)),
+        "callees": lambda name: query.callees(query.find(name)),
+        "callees depth 3": lambda name: query.callees(query.find(name), 3),
+        "callees unlimited": lambda name: query.callees(query.find(name), None),
+        "shortest path": lambda name: query.shortest_path(
+            query.find(name), query.find(names[0])
+        ),
+    }
+
+    for label, benchmark in benchmarks.items():
+        _, total = timed(lambda: [benchmark(name) for name in names])
+        print(f"{label}: {total / queries * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--nodes", type=int, default=20000)
+    arg_parser.add_argument("--edges", type=int, default=100000)
+    arg_parser.add_argument("--files", type=int, default=500)
+    arg_parser.add_argument("--queries", type=int, default=20)
+    arg_parser.add_argument(
+        "-o", "--output", type=Path, default=Path("graph-query.npz")
+    )
+
+    args = arg_parser.parse_args()
+
+    main(args.nodes, args.edges, args.files, args.queries, args.output)
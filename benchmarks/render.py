@@ -0,0 +1,213 @@
+"""Compare building a graphviz.Digraph against streaming DOT with `write_dot`.
+
+The graph is synthetic, with nested packages and classes so clusters are deep.
+With `--render`, also compare rendering the whole graph with a single `dot`
+process against rendering it sharded per top-level package (see
+`GraphvizVisualizer.visualize_sharded`) with 1 to `--jobs` processes. Graphviz's
+`dot` must be installed.
+
+Usage:
+    python benchmarks/render.py --definitions 50000 --references 5
+    python benchmarks/render.py --definitions 5000 --packages 8 --render --jobs 4
+"""
+
+import argparse
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional, Tuple
+
+import graphviz
+
+from code_blocks.dot_writer import aggregate_edges, build_tree, node_name, write_dot
+from code_blocks.graph import CodeGraph
+from code_blocks.graphviz_visualizer import GraphvizVisualizer, render_svgs
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+
+def make_definitions(count: int, files: int, depth: int, packages: int):
+    definitions = []
+    for i in range(count):
+        file = i % files
+        # packages nested `depth` deep, e.g. pkg3/sub3/sub1/module7.py
+        path = (
+            (f"pkg{file % packages}",)
+            + tuple(f"sub{file >> d & 3}" for d in range(depth))
+            + (f"module{file}.py",)
+        )
+        definitions.append(
+            Definition(i, 4, (f"Class{i % 7}",), path, f"f{i}", "function")
+        )
+
+    return definitions
+
+
+def make_resolved_references(definitions, references: int):
+    rng = random.Random(0)
+
+    resolved = set()
+    for definition in definitions:
+        for _ in range(references):
+            referencing = definitions[rng.randrange(len(definitions))]
+            scope = referencing.scope + (referencing.name,)
+            reference = Reference(referencing.row, scope, referencing.path)
+            resolved.add(ResolvedReference(reference, definition))
+
+    return resolved
+
+
+def build_tree_graph(path: Tuple[str, ...], tree: dict) -> Optional[graphviz.Digraph]:
+    if len(tree) == 0:
+        return None
+
+    path_str = "#".join(path)
+    g = graphviz.Digraph(f"cluster_{path_str}" if path_str else None)
+    g.attr("graph", rankdir="LR", label=path_str)
+    if path_str:
+        g.node(name=path_str, label=path_str)
+
+    for k, v in tree.items():
+        path_str = "#".join(path + (k,))
+        subgraph = build_tree_graph(path + (k,), v)
+        if subgraph is None:
+            g.node(name=path_str, label=path_str)
+        else:
+            g.subgraph(subgraph)
+
+    return g
+
+
+def digraph_source(tree, edges) -> str:
+    # what `GraphvizVisualizer.visualize` did before writing DOT itself
+    g = graphviz.Digraph()
+    g.attr("graph", rankdir="LR")
+    g.subgraph(build_tree_graph((), tree))
+
+    for tail, head, weight in edges:
+        if weight == 1:
+            g.edge(tail_name=node_name(tail), head_name=node_name(head))
+        else:
+            g.edge(
+                tail_name=node_name(tail),
+                head_name=node_name(head),
+                label=str(weight),
+                penwidth=f"{1 + math.log2(weight):.2f}",
+            )
+
+    return g.source
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak, elapsed
+
+
+def render_sharded(output: Path, jobs: int):
+    # like `visualize_sharded`, without writing the DOT files again
+    dot_paths = sorted(
+        output.glob("**/*.gv"),
+        key=lambda p: p.stat().st_size,
+        reverse=True,
+    )
+    render_svgs(dot_paths, [p.with_suffix(".svg") for p in dot_paths], jobs)
+
+
+def compare_rendering(definitions, code_graph: CodeGraph, jobs: int):
+    assert shutil.which("dot") is not None, "Graphviz's dot isn't installed"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        whole = Path(tmp) / "whole.gv"
+        with open(whole, "w", encoding="utf-8") as f:
+            write_dot(
+                build_tree(definitions, code_graph),
+                aggregate_edges(code_graph),
+                f,
+            )
+        _, elapsed = measure(lambda: graphviz.render("dot", "svg", whole))
+        print(f"single dot process: {elapsed:.2f}s")
+
+        sharded = Path(tmp) / "sharded"
+        # writes the DOT files and renders them once, as a warm up
+        GraphvizVisualizer().visualize_sharded(definitions, code_graph, sharded)
+
+        for render_jobs in range(1, jobs + 1):
+            _, elapsed = measure(lambda: render_sharded(sharded, render_jobs))
+            print(f"sharded, {render_jobs} jobs: {elapsed:.2f}s")
+
+
+def main(
+    definitions_count: int,
+    references: int,
+    files: int,
+    depth: int,
+    packages: int,
+    render: bool,
+    jobs: int,
+):
+    definitions = set(make_definitions(definitions_count, files, depth, packages))
+    code_graph = CodeGraph.from_resolved(
+        definitions, make_resolved_references(list(definitions), references)
+    )
+
+    tree = build_tree(definitions, code_graph)
+    edges = aggregate_edges(code_graph)
+    print(f"definitions: {len(definitions)}, edges: {len(edges)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        digraph_path = Path(tmp) / "digraph.gv"
+        stream_path = Path(tmp) / "stream.gv"
+
+        def build_digraph():
+            with open(digraph_path, "w", encoding="utf-8") as f:
+                f.write(digraph_source(tree, edges))
+
+        def stream():
+            with open(stream_path, "w", encoding="utf-8") as f:
+                write_dot(tree, edges, f)
+
+        for label, build, path in (
+            ("graphviz.Digraph", build_digraph, digraph_path),
+            ("write_dot", stream, stream_path),
+        ):
+            peak, elapsed = measure(build)
+            size = os.path.getsize(path)
+            print(
+                f"{label}: {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB, "
+                f"{size / 2**20:.1f} MiB of DOT"
+            )
+
+    if render:
+        compare_rendering(definitions, code_graph, jobs)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--definitions", type=int, default=50000)
+    arg_parser.add_argument("--references", type=int, default=5)
+    arg_parser.add_argument("--files", type=int, default=1000)
+    arg_parser.add_argument("--depth", type=int, default=4)
+    arg_parser.add_argument("--packages", type=int, default=1)
+    arg_parser.add_argument("--render", action="store_true")
+    arg_parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+
+    args = arg_parser.parse_args()
+    main(
+        args.definitions,
+        args.references,
+        args.files,
+        args.depth,
+        args.packages,
+        args.render,
+        args.jobs,
+    )
@@ -0,0 +1,72 @@
+"""Measure the cold start time of CLI commands, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/startup.py --project path/to/project --runs 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+
+def run_time(args: List[str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times)
+
+
+def main(project: Path, runs: int):
+    python = [sys.executable]
+
+    commands = {
+        "python (baseline)": python + ["-c", "pass"],
+        "import code_blocks.cli": python + ["-c", "import code_blocks.cli"],
+        "import code_blocks.main": python + ["-c", "import code_blocks.main"],
+        "code-blocks --help": python + ["-m", "code_blocks.cli", "--help"],
+        "code-blocks scan": python
+        + ["-m", "code_blocks.cli", "scan", "-p", str(project), "--parse-jobs", "1"],
+        "code-blocks resolve --offline": python
+        + [
+            "-m",
+            "code_blocks.cli",
+            "resolve",
+            "-p",
+            str(project),
+            "--parse-jobs",
+            "1",
+            "--offline",
+        ],
+        "import all modules": python
+        + [
+            "-c",
+            "import code_blocks.main, code_blocks.resolver_pool, "
+            "code_blocks.graphviz_visualizer, code_blocks.metrics",
+        ],
+    }
+
+    for label, args in commands.items():
+        print(f"{label}: {run_time(args, runs) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "-p",
+        "--project",
+        type=Path,
+        default=Path(__file__).parent.parent / "examples",
+        help="Project to scan",
+    )
+    arg_parser.add_argument("--runs", type=int, default=10)
+
+    args = arg_parser.parse_args()
+
+    main(args.project, args.runs)
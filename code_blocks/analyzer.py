@@ -1,78 +1,356 @@
 from collections import deque
-from typing import Any, Dict, Optional, Set
-from pandas import DataFrame, Series
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Index, Series
+
+from code_blocks.csr import build_csr, csr_neighbors
 
 
 Graph = Dict[Any, Set[Any]]
 
 
-def _build_graph(df: DataFrame, src_col: str, dst_col: str) -> Graph:
-    graph = dict(df[[src_col, dst_col]].groupby(src_col)[dst_col].groups)
+class CSRGraph(NamedTuple):
+    """
+    Graph of node ids 0..n-1, the neighbors of node `i` are
+    `indices[indptr[i]:indptr[i + 1]]` and its label is `labels[i]`.
+    """
+
+    labels: Index
+    indptr: np.ndarray
+    indices: np.ndarray
+
+
+def _build_csr_graph(df: DataFrame, src_col: str, dst_col: str) -> CSRGraph:
+    # ids are assigned to labels once, for sources and destinations together
+    codes, labels = pd.concat([df[src_col], df[dst_col]], ignore_index=True).factorize()
+    node_count = len(labels)
+
+    # unique edges, packed to single integers sorted by source. sorting and
+    # masking repeats is much faster than np.unique on large arrays
+    src = codes[: len(df)].astype(np.int64)
+    dst = codes[len(df) :].astype(np.int64)
+    edges = np.sort(src * node_count + dst)
+    edges = edges[np.diff(edges, prepend=-1) != 0]
+
+    indptr, indices = build_csr(edges // node_count, edges % node_count, node_count)
+
+    return CSRGraph(labels, indptr, indices)
 
-    # convert values to lists instead of series
-    graph = {k: set(df.loc[v, dst_col]) for k, v in graph.items()}
 
-    # assign dst nodes to be leaf nodes if they aren't in the graph
-    for dst_node in df[dst_col].unique():
-        graph[dst_node] = graph.get(dst_node, set())
+def _build_graph(df: DataFrame, src_col: str, dst_col: str) -> Graph:
+    csr_graph = _build_csr_graph(df, src_col, dst_col)
+
+    labels = csr_graph.labels.tolist()
+    indptr = csr_graph.indptr.tolist()
+    indices = csr_graph.indices.tolist()
 
-    return graph
+    # dst nodes that aren't src nodes are leaf nodes
+    return {
+        label: {labels[j] for j in indices[indptr[i] : indptr[i + 1]]}
+        for i, label in enumerate(labels)
+    }
 
 
-def _find_shortest_path(graph, start, end):
+def _find_parents(graph: Graph, start: Any, end: Any = None) -> Dict[Any, Any]:
     """
-    Code by Eryk Kopczyński from https://www.python.org/doc/essays/graphs
+    BFS from start, with a parent pointer for each reached node (None for start).
 
-    Note that this returns the path in a weird format, e.g., [[['A'], 'B'], 'D']
+    Stops once end is reached, if given.
     """
 
-    dist = {start: [start]}
-    q = deque([start])  # changed to init queue from list
-    while len(q):
+    parents = {start: None}
+    q = deque([start])
+    while len(q) and end not in parents:
         at = q.popleft()
         for next in graph[at]:
-            if next not in dist:
-                dist[next] = [dist[at], next]
+            if next not in parents:
+                parents[next] = at
                 q.append(next)
 
-    return dist.get(end)
+    return parents
 
 
-def _flatten_path(p: list) -> list:
-    """Convert [[['A'], 'B'], 'D'] to ['A', 'B', 'D']"""
+def _reconstruct_path(parents: Dict[Any, Any], end: Any) -> List[Any]:
+    """Follow parent pointers from end back to the BFS source, e.g. ['A', 'B', 'D']"""
 
-    if len(p) == 1:
-        return p
+    path = [end]
+    while parents[path[-1]] is not None:
+        path.append(parents[path[-1]])
 
-    else:
-        return _flatten_path(p[0]) + [p[1]]
+    return path[::-1]
+
+
+def _find_shortest_path(graph: Graph, start: Any, end: Any) -> Optional[List[Any]]:
+    parents = _find_parents(graph, start, end)
+
+    if end not in parents:
+        return None
+
+    return _reconstruct_path(parents, end)
 
 
 def get_distance(graph: Graph, start: Any, end: Any) -> Optional[int]:
     path = _find_shortest_path(graph, start, end)
 
     if path is not None:
-        flattened_path = _flatten_path(path)
-
         # depth is the amount of connections
-        depth = len(flattened_path) - 1
-
-        return depth
+        return len(path) - 1
     else:
         return None
 
 
 def get_node_depth(node: Any, graph: Graph) -> int:
-    return max(
-        get_distance(graph, source, node) or 0
-        for source in graph
+    # the distances from every source to node are a single BFS over reversed edges
+    reversed_graph: Graph = {n: set() for n in graph}
+    for src, dsts in graph.items():
+        for dst in dsts:
+            reversed_graph[dst].add(src)
+
+    # parents are reached before their children, so distances build up in order
+    distances: Dict[Any, int] = {}
+    for source, parent in _find_parents(reversed_graph, node).items():
+        distances[source] = 0 if parent is None else distances[parent] + 1
+
+    return max(distances.values())
+
+
+class ShortestPaths:
+    def __init__(self, graph: CSRGraph, sources: Iterable[Any]):
+        """
+        Shortest paths from a batch of source nodes to every node, in one BFS.
+
+        A node's distance is from its nearest source. Parent pointers are kept
+        instead of paths, and paths are only reconstructed when asked for.
+
+        Args:
+            graph (CSRGraph): Graph to search.
+            sources (Iterable[Any]): Labels of the nodes to start from.
+        """
+
+        self.graph = graph
+
+        source_ids = graph.labels.get_indexer(list(sources))
+        if (source_ids == -1).any():
+            raise KeyError("Source nodes aren't in the graph")
+
+        node_count = len(graph.labels)
+        self.distances = np.full(node_count, -1, dtype=np.int64)
+        self.parents = np.full(node_count, -1, dtype=np.int64)
+
+        frontier = np.unique(source_ids).astype(np.int64)
+        self.distances[frontier] = 0
+
+        level = 0
+        while len(frontier) > 0:
+            level += 1
+            neighbors, parents = csr_neighbors(graph.indptr, graph.indices, frontier)
+
+            new = self.distances[neighbors] == -1
+            neighbors, parents = neighbors[new], parents[new]
+
+            # a node reached from several parents keeps one of them, and since
+            # edges are unique that (node, parent) pair appears only once
+            self.parents[neighbors] = parents
+            frontier = neighbors[self.parents[neighbors] == parents]
+            self.distances[frontier] = level
+
+    def _id(self, node: Any) -> int:
+        # labels are unique, so a label is at a single position
+        node_id = self.graph.labels.get_loc(node)
+        assert isinstance(node_id, int), f"Node {node!r} isn't unique"
+        return node_id
+
+    def distance(self, node: Any) -> Optional[int]:
+        """Distance to a node, None if it's unreachable."""
+
+        distance = int(self.distances[self._id(node)])
+        return None if distance == -1 else distance
+
+    def path(self, node: Any) -> Optional[List[Any]]:
+        """Nodes of a shortest path to a node, None if it's unreachable."""
+
+        node_id = self._id(node)
+        if self.distances[node_id] == -1:
+            return None
+
+        path = [node_id]
+        while self.parents[path[-1]] != -1:
+            path.append(int(self.parents[path[-1]]))
+
+        return [self.graph.labels[i] for i in reversed(path)]
+
+    def to_series(self) -> Series:
+        """Distances of the reachable nodes, indexed by node."""
+
+        reachable = self.distances != -1
+        return Series(self.distances[reachable], index=self.graph.labels[reachable])
+
+
+def get_distances(
+    df: DataFrame, src_col: str, dst_col: str, sources: Iterable[Any]
+) -> ShortestPaths:
+    return ShortestPaths(_build_csr_graph(df, src_col, dst_col), sources)
+
+
+def get_distance_matrix(graph: CSRGraph, sources: Iterable[Any]) -> DataFrame:
+    """
+    Distances from each source to every node, one BFS per source.
+
+    Unreachable nodes have a distance of -1.
+    """
+
+    sources = list(sources)
+    return DataFrame(
+        [ShortestPaths(graph, [source]).distances for source in sources],
+        index=sources,
+        columns=graph.labels,
     )
 
 
+def strongly_connected_components(graph: CSRGraph) -> Tuple[List[int], int]:
+    """
+    Tarjan's algorithm, iterative so deep graphs don't hit the recursion limit.
+
+    Returns the component id of each node, and the amount of components.
+    Components are numbered in reverse topological order, i.e. a component has
+    a lower id than any component that has an edge to it.
+    """
+
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    node_count = len(indptr) - 1
+
+    index = [-1] * node_count
+    lowlink = [0] * node_count
+    on_stack = [False] * node_count
+    components = [-1] * node_count
+    stack: List[int] = []
+    visited_count = 0
+    component_count = 0
+
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+
+        index[root] = lowlink[root] = visited_count
+        visited_count += 1
+        stack.append(root)
+        on_stack[root] = True
+        # node, and the position of its next neighbor in `indices`
+        work = [(root, indptr[root])]
+
+        while work:
+            node, position = work[-1]
+            end = indptr[node + 1]
+
+            while position < end:
+                neighbor = indices[position]
+                position += 1
+
+                if index[neighbor] == -1:
+                    break
+                if on_stack[neighbor] and index[neighbor] < lowlink[node]:
+                    lowlink[node] = index[neighbor]
+            else:
+                neighbor = -1
+
+            if neighbor != -1:
+                work[-1] = (node, position)
+                index[neighbor] = lowlink[neighbor] = visited_count
+                visited_count += 1
+                stack.append(neighbor)
+                on_stack[neighbor] = True
+                work.append((neighbor, indptr[neighbor]))
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+
+            if lowlink[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    components[member] = component_count
+                    if member == node:
+                        break
+                component_count += 1
+
+    return components, component_count
+
+
+def _get_graph_depths(graph: CSRGraph) -> np.ndarray:
+    """
+    Depth of each node id, in O(V + E) besides sorting the nodes entering each
+    component.
+
+    Cycles are condensed to their strongly connected components, which form a
+    DAG. Components are visited in topological order, and a node entered from
+    another component is one deeper than the deepest node referencing it (the
+    longest path over the DAG). Inside a component, depths are the shortest
+    distance from the nodes it's entered by, like the BFS of `get_node_depth`,
+    so a cycle doesn't deepen itself.
+    """
+
+    components, component_count = strongly_connected_components(graph)
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    node_count = len(components)
+
+    members: List[List[int]] = [[] for _ in range(component_count)]
+    for node, component_id in enumerate(components):
+        members[component_id].append(node)
+
+    depths = [-1] * node_count
+    # depth of nodes entered from other components, from their deepest caller
+    entry_depths = [-1] * node_count
+
+    # components are numbered in reverse topological order
+    for component_id in reversed(range(component_count)):
+        component = members[component_id]
+
+        # root components start at 0
+        starts = [n for n in component if entry_depths[n] != -1]
+        if not starts:
+            starts = component
+            for node in component:
+                entry_depths[node] = 0
+        starts.sort(key=entry_depths.__getitem__)
+
+        # multi-source BFS, with each source added once the BFS reaches its depth
+        queue: deque = deque()
+        next_start = 0
+        while queue or next_start < len(starts):
+            if next_start < len(starts) and (
+                not queue or entry_depths[starts[next_start]] <= depths[queue[0]]
+            ):
+                node = starts[next_start]
+                next_start += 1
+                if depths[node] == -1:
+                    depths[node] = entry_depths[node]
+                    queue.appendleft(node)
+                continue
+
+            node = queue.popleft()
+            depth = depths[node] + 1
+            for neighbor in indices[indptr[node] : indptr[node + 1]]:
+                if components[neighbor] == component_id:
+                    if depths[neighbor] == -1:
+                        depths[neighbor] = depth
+                        queue.append(neighbor)
+                elif entry_depths[neighbor] < depth:
+                    entry_depths[neighbor] = depth
+
+    return np.array(depths, dtype=np.int64)
+
+
 def get_depths(df: DataFrame, src_col: str, dst_col: str) -> Series:
-    graph = _build_graph(df, src_col, dst_col)
+    graph = _build_csr_graph(df, src_col, dst_col)
 
-    depths = Series({n: get_node_depth(n, graph) for n in graph})
+    depths = Series(_get_graph_depths(graph), index=graph.labels, dtype=int)
 
     # make sure depths are relative to 0
     depths -= depths.min()
@@ -0,0 +1,276 @@
+import asyncio
+import os
+import signal
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from sansio_lsp_client.client import CAPABILITIES
+from sansio_lsp_client.events import ConfigurationRequest
+from sansio_lsp_client.events import Definition as DefinitionEvent
+from sansio_lsp_client.events import (
+    Event,
+    PublishDiagnostics,
+    References,
+    RegisterCapabilityRequest,
+    ResponseError,
+    ShowMessageRequest,
+)
+from sansio_lsp_client.structs import (
+    TextDocumentIdentifier,
+    TextDocumentItem,
+    TextDocumentPosition,
+)
+
+from code_blocks.lsp_client import _Client
+from code_blocks.lsp_server import HEADERS_END, parse_content_length
+
+# the sansio client sends "initialize" as its first request
+INITIALIZE_REQUEST_ID = 0
+
+
+class AsyncLspServer:
+    def __init__(self, lsp_server_proc: asyncio.subprocess.Process, root_dir: str):
+        """Use `AsyncLspServer.start` to create a server."""
+
+        # make sure stdin/out were started
+        assert lsp_server_proc.stdin is not None, "Failed to get stdin"
+        assert lsp_server_proc.stdout is not None, "Failed to get stdout"
+
+        self._lsp_server_proc = lsp_server_proc
+        self._root_uri = Path(root_dir).resolve().absolute().as_uri()
+        self._lsp_proc_id = lsp_server_proc.pid
+        self._stdin = lsp_server_proc.stdin
+        self._stdout = lsp_server_proc.stdout
+
+    @classmethod
+    async def start(
+        cls,
+        root_dir: str,
+        command: Sequence[str] = ("pyright-langserver", "--stdio"),
+    ) -> "AsyncLspServer":
+        """Start an LSP server process on a project.
+
+        Args:
+            root_dir (str): Project root, the server runs in it.
+            command (Sequence[str]): Command that starts the server on stdio.
+
+        Returns:
+            AsyncLspServer: The started server.
+        """
+
+        # start the server in its own session, so stopping it also stops any
+        # processes it spawned (e.g. node behind a pyright wrapper script)
+        lsp_server_proc = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=root_dir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+
+        return cls(lsp_server_proc, root_dir)
+
+    async def stop(self):
+        """Stop LSP server process."""
+
+        try:
+            os.killpg(self._lsp_server_proc.pid, signal.SIGTERM)
+        except (AttributeError, ProcessLookupError):
+            # no process groups on this platform, or the server already exited
+            self._lsp_server_proc.terminate()
+
+        await self._lsp_server_proc.wait()
+
+    async def send(self, data: bytes):
+        """Send data to the server.
+
+        Args:
+            data (bytes): Bytes to send to server.
+        """
+
+        self._stdin.write(data)
+        await self._stdin.drain()
+
+    async def read_message(self) -> Optional[bytes]:
+        """Read the next message from the LSP server stdout.
+
+        Returns:
+            Optional[bytes]: Complete message from LSP server stdout, None if the
+                server closed its stdout.
+        """
+
+        try:
+            headers = await self._stdout.readuntil(HEADERS_END)
+            content_length = parse_content_length(headers[: -len(HEADERS_END)])
+            content = await self._stdout.readexactly(content_length)
+        except asyncio.IncompleteReadError:
+            return None
+
+        return headers + content
+
+
+class AsyncLspClient:
+    def __init__(self, lsp_server: AsyncLspServer) -> None:
+        """Use `AsyncLspClient.start` to create a client."""
+
+        self._lsp_server = lsp_server
+
+        # disable progress reporting
+        CAPABILITIES["window"]["workDoneProgress"] = False
+
+        # start client (implicitly queues an "initialize" request to the lsp)
+        self._client = _Client(
+            self._lsp_server._lsp_proc_id, self._lsp_server._root_uri
+        )
+
+        # responses are matched to their requests by request id
+        self._responses: Dict[int, "asyncio.Future[Event]"] = dict()
+
+        # files that were opened, but the server didn't publish diagnostics for
+        self._diagnostics: Dict[str, "asyncio.Future[PublishDiagnostics]"] = dict()
+
+        self._event_reader = asyncio.create_task(self._read_client_events())
+
+    @classmethod
+    async def start(cls, lsp_server: AsyncLspServer) -> "AsyncLspClient":
+        """Connect a client to a server, and wait for the server to initialize.
+
+        Args:
+            lsp_server (AsyncLspServer): Server to connect to.
+
+        Returns:
+            AsyncLspClient: The connected client.
+        """
+
+        lsp_client = cls(lsp_server)
+
+        # send initialize message to lsp, and wait for it to initialize
+        _ = await lsp_client._request(INITIALIZE_REQUEST_ID)
+
+        # send initialized message to server
+        await lsp_client.send()
+
+        return lsp_client
+
+    async def stop(self):
+        self._event_reader.cancel()
+
+        try:
+            await self._event_reader
+        except asyncio.CancelledError:
+            pass
+
+    async def _read_client_events(self):
+        try:
+            while True:
+                data = await self._lsp_server.read_message()
+                if data is None:
+                    break
+
+                for event in self._client.recv(data):
+                    await self._handle_event(self._client.last_response_id, event)
+
+        finally:
+            # wake up anyone waiting for events, there will be no more
+            error = ConnectionError("LSP client stopped reading events")
+            for future in list(self._responses.values()) + list(
+                self._diagnostics.values()
+            ):
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _handle_event(self, response_id: Optional[int], event: Event):
+        if response_id is not None:
+            response = self._responses.pop(response_id, None)
+            if response is not None and not response.done():
+                response.set_result(event)
+
+        elif isinstance(
+            event, ShowMessageRequest | RegisterCapabilityRequest | ConfigurationRequest
+        ):
+            event.reply()
+            await self.send()
+
+        elif isinstance(event, PublishDiagnostics):
+            diagnostics = self._diagnostics.pop(event.uri, None)
+            if diagnostics is not None and not diagnostics.done():
+                diagnostics.set_result(event)
+
+    async def send(self):
+        send_buf = self._client.send()
+        if len(send_buf) > 0:
+            await self._lsp_server.send(send_buf)
+
+    async def _request(self, request_id: int) -> Event:
+        response = asyncio.get_running_loop().create_future()
+        self._responses[request_id] = response
+
+        await self.send()
+
+        return await response
+
+    async def notify_open(self, text_document_item: TextDocumentItem):
+        diagnostics = asyncio.get_running_loop().create_future()
+        self._diagnostics[text_document_item.uri] = diagnostics
+
+        # notify LSP we opened the file
+        self._client.did_open(text_document_item)
+        await self.send()
+
+        # wait for server to acknowledge we opened the file
+        await diagnostics
+
+    async def notify_close(self, text_document_identifier: TextDocumentIdentifier):
+        # notify LSP we closed the file
+        self._client.did_close(text_document_identifier)
+        await self.send()
+
+    async def request_definition(
+        self, text_document_position: TextDocumentPosition
+    ) -> DefinitionEvent:
+
+        # request definition of reference, and wait for response
+        definition_event = await self._request(
+            self._client.definition(text_document_position)
+        )
+        assert isinstance(
+            definition_event, DefinitionEvent
+        ), f"Unexpected response: {definition_event!r}"
+
+        return definition_event
+
+    async def request_references(
+        self, text_document_position: TextDocumentPosition
+    ) -> References:
+
+        # request references of position, and wait for response
+        references = await self._request(
+            self._client.references(text_document_position)
+        )
+
+        # a request the server failed has no references
+        if isinstance(references, ResponseError):
+            return References(result=None)
+
+        assert isinstance(
+            references, References
+        ), f"Unexpected response: {references!r}"
+
+        return references
+
+    async def request_references_many(
+        self, text_document_positions: List[TextDocumentPosition]
+    ) -> List[References]:
+        """Request references of many positions concurrently.
+
+        Args:
+            text_document_positions (List[TextDocumentPosition]): Positions to
+                get references of.
+
+        Returns:
+            List[References]: References of each position, in the same order.
+        """
+
+        return await asyncio.gather(
+            *(self.request_references(p) for p in text_document_positions)
+        )
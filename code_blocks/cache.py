@@ -0,0 +1,121 @@
+import hashlib
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+# bump when the cache file format, or the way entries are computed, changes,
+# e.g. which scope a reference row is attributed to, or which definitions are
+# resolved without the LSP. Entries are only keyed by definitions and sources,
+# so stale entries of older versions would otherwise still match
+CACHE_VERSION = 3
+
+IDENTIFIER_RE = re.compile(r"\w+")
+
+
+class ReferencesCache:
+    def __init__(
+        self, cache_path: Path, sources: Iterable[Tuple[str, Tuple[str, ...]]]
+    ):
+        """On-disk cache of the resolved references of each definition.
+
+        An entry is keyed by the definition itself, and the content hashes of
+        every file its name appears in, so an entry is invalidated once any
+        file mentioning the name changes, or such a file is added or removed.
+
+        References that reach a definition without naming it aren't covered,
+        e.g. an attribute of a value returned by another function, or a name
+        re-exported under an alias and used in a third file. Editing only such
+        a file leaves the cached references of the definition stale, until a
+        file naming it changes too.
+
+        Args:
+            cache_path (Path): Cache file, created by `save` if it doesn't exist.
+            sources (Iterable[Tuple[str, Tuple[str, ...]]]): Source and path of
+                each file in the project.
+        """
+
+        self._cache_path = cache_path
+
+        self._path_hashes: Dict[Tuple[str, ...], str] = dict()
+        self._identifier_paths: Dict[str, Set[Tuple[str, ...]]] = defaultdict(set)
+        for source, path in sources:
+            self._path_hashes[path] = hashlib.sha256(source.encode()).hexdigest()
+            for identifier in set(IDENTIFIER_RE.findall(source)):
+                self._identifier_paths[identifier].add(path)
+
+        self._entries = self._load()
+
+        # entries used by this run, only they are saved
+        self._used_entries: Dict[str, list] = dict()
+
+    def _load(self) -> Dict[str, list]:
+        try:
+            cache = json.loads(self._cache_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return dict()
+
+        if cache.get("version") != CACHE_VERSION:
+            return dict()
+
+        return cache["entries"]
+
+    def save(self):
+        """Write the entries used by this run to the cache file."""
+
+        self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._cache_path.write_text(
+            json.dumps({"version": CACHE_VERSION, "entries": self._used_entries})
+        )
+
+    def _key(self, definition: Definition) -> str:
+        paths = self._identifier_paths.get(definition.name, set()) | {definition.path}
+
+        key = hashlib.sha256(json.dumps(definition).encode())
+        for path in sorted(paths):
+            key.update(json.dumps([path, self._path_hashes.get(path)]).encode())
+
+        return key.hexdigest()
+
+    def get(self, definition: Definition) -> Optional[Set[ResolvedReference]]:
+        """Get the cached resolved references of a definition.
+
+        Args:
+            definition (Definition): Definition to get references of.
+
+        Returns:
+            Optional[Set[ResolvedReference]]: The cached references, None if the
+                definition isn't cached, or its entry was invalidated.
+        """
+
+        key = self._key(definition)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        self._used_entries[key] = entry
+
+        return {
+            ResolvedReference(Reference(row, tuple(scope), tuple(path)), definition)
+            for row, scope, path in entry
+        }
+
+    def put(self, definition: Definition, resolved_references: Set[ResolvedReference]):
+        """Cache the resolved references of a definition.
+
+        Args:
+            definition (Definition): Definition the references are of.
+            resolved_references (Set[ResolvedReference]): All of its references.
+        """
+
+        key = self._key(definition)
+        entry: List[list] = sorted(
+            [r.reference.row, r.reference.scope, r.reference.path]
+            for r in resolved_references
+        )
+
+        self._entries[key] = entry
+        self._used_entries[key] = entry
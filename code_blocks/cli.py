@@ -0,0 +1,385 @@
+"""The `code-blocks` command.
+
+Usage:
+    code-blocks scan -p path/to/project
+    code-blocks resolve -p path/to/project --cache refs.json --export graph.npz
+    code-blocks render -p path/to/project -o graph.gv
+    code-blocks render -p path/to/project -o graph/ --shard
+    code-blocks query graph.npz callers pkg/foo.py:Klass.method
+    code-blocks metrics graph.npz -o metrics.csv
+
+Each command only imports the modules it needs when it runs, so that `--help`,
+queries and fully cached runs don't pay for importing LSP clients, graphviz,
+numpy or pandas.
+
+Only warnings are shown by default, `--verbose` shows progress and `--trace`
+writes every message (including LSP traffic) to a JSON lines file.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+from code_blocks.main import IN_FLIGHT
+
+# levels of detail of rendered graphs, see `dot_writer.aggregate`
+LEVELS = ("package", "module", "class", "function")
+
+
+def _add_log_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show progress messages",
+        required=False,
+        default=False,
+    )
+    arg_parser.add_argument(
+        "--trace",
+        type=Path,
+        help="Write every log message, including debug ones, to a JSON lines file",
+        required=False,
+    )
+
+
+def _add_scan_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument(
+        "-p", "--project", type=Path, help="Path to project", required=True
+    )
+    arg_parser.add_argument(
+        "--parse-jobs",
+        type=int,
+        help="Amount of processes to parse files with, defaults to the CPU count",
+        required=False,
+        default=os.cpu_count() or 1,
+    )
+    arg_parser.add_argument(
+        "--include",
+        action="append",
+        help="Only scan files matching this glob, relative to the project",
+        required=False,
+        default=[],
+    )
+    arg_parser.add_argument(
+        "--exclude",
+        action="append",
+        help="Skip files and directories matching this glob, relative to the project",
+        required=False,
+        default=[],
+    )
+    arg_parser.add_argument(
+        "--no-gitignore",
+        action="store_true",
+        help="Don't skip files ignored by .gitignore files",
+        required=False,
+        default=False,
+    )
+
+
+def _add_resolve_arguments(arg_parser: argparse.ArgumentParser):
+    _add_scan_arguments(arg_parser)
+
+    arg_parser.add_argument(
+        "--in-flight",
+        type=int,
+        help="Amount of references requests to keep sent to the LSP server at once",
+        required=False,
+        default=IN_FLIGHT,
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Amount of LSP servers to resolve definitions with",
+        required=False,
+        default=1,
+    )
+    arg_parser.add_argument(
+        "--cache",
+        type=Path,
+        help=(
+            "Path to a cache file of resolved references, reused across runs. "
+            "A definition's entry is invalidated when a file naming it changes, "
+            "references that don't name it (e.g. through inferred types or "
+            "aliases) can go stale, delete the file to start over"
+        ),
+        required=False,
+    )
+    arg_parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Keep watching the project, and update the output as files change",
+        required=False,
+        default=False,
+    )
+    arg_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Don't start LSP servers, only resolve what the AST alone can",
+        required=False,
+        default=False,
+    )
+    arg_parser.add_argument(
+        "--export",
+        type=Path,
+        help="Export the graph as columns, to a .npz file or a Parquet directory. "
+        "A .npz file can be queried with the query command",
+        required=False,
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Export fan-in, fan-out, cycles, PageRank and layer violations of "
+        "each node, to a .csv or .parquet file",
+        required=False,
+    )
+    arg_parser.add_argument(
+        "--layer",
+        action="append",
+        default=[],
+        help="Path prefix of a layer for --metrics, repeated from the top layer "
+        "to the bottom one. References to higher layers are violations",
+    )
+
+
+def _add_render_arguments(arg_parser: argparse.ArgumentParser):
+    _add_resolve_arguments(arg_parser)
+
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Path to desired output file. A .dot or .json file is written as "
+        "text, anything else is rendered to .svg with graphviz",
+        required=False,
+    )
+    arg_parser.add_argument(
+        "-v",
+        "--view",
+        action="store_true",
+        help="Open .svg file when done",
+        required=False,
+        default=False,
+    )
+    arg_parser.add_argument(
+        "--level",
+        choices=LEVELS,
+        help="Level of detail, coarser levels collapse nodes into their package, "
+        "module or module level definition",
+        required=False,
+        default="function",
+    )
+    arg_parser.add_argument(
+        "--expand",
+        action="append",
+        help="Draw a subtree in full detail regardless of --level, e.g. pkg/sub "
+        "or pkg/foo.py:Klass",
+        required=False,
+        default=[],
+    )
+    arg_parser.add_argument(
+        "--shard",
+        action="store_true",
+        help="Render each top-level package to its own .svg in the --output "
+        "directory, and an index.svg of the references between packages",
+        required=False,
+        default=False,
+    )
+    arg_parser.add_argument(
+        "--render-jobs",
+        type=int,
+        help="Amount of --shard files to render at once, defaults to the CPU count",
+        required=False,
+        default=os.cpu_count() or 1,
+    )
+
+
+def _add_query_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("graph", type=Path, help="Exported .npz graph")
+    arg_parser.add_argument(
+        "query",
+        choices=("find", "callers", "callees", "path"),
+        help="find: nodes of a name, callers/callees: nodes referencing or "
+        "referenced by a node, path: shortest path between two nodes",
+    )
+    arg_parser.add_argument(
+        "names",
+        nargs="+",
+        help="Qualified name path:scope, module path, or bare name (e.g. Klass.method)",
+    )
+    arg_parser.add_argument(
+        "-d",
+        "--depth",
+        type=int,
+        default=1,
+        help="Maximal distance of callers/callees, 0 for unlimited",
+    )
+
+
+def _add_metrics_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("graph", type=Path, help="Exported .npz graph")
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Metrics file to write, .csv or .parquet",
+        required=True,
+    )
+    arg_parser.add_argument(
+        "--layer",
+        action="append",
+        default=[],
+        help="Path prefix of a layer, repeated from the top layer to the bottom one",
+    )
+    arg_parser.add_argument(
+        "--top", type=int, default=20, help="Amount of top ranked nodes to print"
+    )
+
+
+def _parse_node(name: str) -> Tuple[str, ...]:
+    path, _, scope = name.partition(":")
+    return tuple(path.strip("/").split("/")) + (
+        tuple(scope.split(".")) if scope else ()
+    )
+
+
+def _scan(args: argparse.Namespace) -> int:
+    from code_blocks.main import scan
+
+    assert args.project.is_dir(), "Project path is not a directory"
+
+    scanner, parser, _ = scan(
+        args.project.resolve().absolute(),
+        args.parse_jobs,
+        args.include,
+        args.exclude,
+        not args.no_gitignore,
+    )
+
+    print(f"Scanned {scanner.stats}")
+    print(f"Definitions: {len(parser.definitions)}")
+
+    return 0
+
+
+def _resolve(args: argparse.Namespace, render: bool) -> int:
+    from code_blocks.main import main
+
+    output: Optional[Path] = args.output if render else None
+
+    assert args.project.is_dir(), "Project path is not a directory"
+    assert output is None or not output.exists(), "Output file exists"
+    assert not (args.watch and args.offline), "Watching needs LSP servers"
+    assert not (render and args.shard and output is None), "--shard needs --output"
+
+    main(
+        args.project.resolve().absolute(),
+        output,
+        args.view if render else False,
+        args.in_flight,
+        args.jobs,
+        args.cache,
+        args.watch,
+        args.parse_jobs,
+        args.include,
+        args.exclude,
+        not args.no_gitignore,
+        args.offline,
+        args.export,
+        args.metrics,
+        args.layer,
+        render,
+        args.level if render else "function",
+        [_parse_node(name) for name in args.expand] if render else [],
+        render and args.shard,
+        args.render_jobs if render else 1,
+    )
+
+    return 0
+
+
+def _query(args: argparse.Namespace) -> int:
+    from code_blocks.query import main
+
+    return main(args.graph, args.query, args.names, args.depth or None)
+
+
+def _metrics(args: argparse.Namespace) -> int:
+    from code_blocks.metrics import main
+
+    main(args.graph, args.output, args.layer, args.top)
+
+    return 0
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="code-blocks",
+        description="Show a graphic representation of the code in a Python project.",
+    )
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    # logging options are accepted after any command
+    log_parser = argparse.ArgumentParser(add_help=False)
+    _add_log_arguments(log_parser)
+
+    scan_parser = commands.add_parser(
+        "scan",
+        parents=[log_parser],
+        help="Scan and parse a project, and report what was found",
+    )
+    _add_scan_arguments(scan_parser)
+    scan_parser.set_defaults(run=_scan)
+
+    resolve_parser = commands.add_parser(
+        "resolve",
+        parents=[log_parser],
+        help="Resolve references, to a cache or an exported graph",
+    )
+    _add_resolve_arguments(resolve_parser)
+    resolve_parser.set_defaults(run=lambda args: _resolve(args, render=False))
+
+    render_parser = commands.add_parser(
+        "render",
+        parents=[log_parser],
+        help="Resolve references and render the graph with graphviz",
+    )
+    _add_render_arguments(render_parser)
+    render_parser.set_defaults(run=lambda args: _resolve(args, render=True))
+
+    query_parser = commands.add_parser(
+        "query", parents=[log_parser], help="Query an exported graph"
+    )
+    _add_query_arguments(query_parser)
+    query_parser.set_defaults(run=_query)
+
+    metrics_parser = commands.add_parser(
+        "metrics", parents=[log_parser], help="Compute metrics of an exported graph"
+    )
+    _add_metrics_arguments(metrics_parser)
+    metrics_parser.set_defaults(run=_metrics)
+
+    return arg_parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+
+    from code_blocks.log import configure_logging
+
+    configure_logging(args.verbose, args.trace)
+
+    if args.command == "query":
+        expected_names = 2 if args.query == "path" else 1
+        if len(args.names) != expected_names:
+            arg_parser.error(f"{args.query} takes {expected_names} name(s)")
+
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def build_csr(
+    src: np.ndarray, dst: np.ndarray, node_count: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Build a compressed sparse row adjacency index of edges.
+
+    The neighbors of node `i` are `indices[indptr[i] : indptr[i + 1]]`.
+
+    Args:
+        src (np.ndarray): Source node of each edge.
+        dst (np.ndarray): Destination node of each edge.
+        node_count (int): Amount of nodes.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The `indptr` and `indices` arrays.
+    """
+
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=node_count), out=indptr[1:])
+
+    order = np.argsort(src, kind="stable")
+    indices = dst[order].astype(np.int32)
+
+    return indptr, indices
+
+
+def csr_neighbors(
+    indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the neighbors of many nodes at once, see `build_csr`.
+
+    Args:
+        indptr (np.ndarray): Adjacency index pointers.
+        indices (np.ndarray): Adjacency indices.
+        nodes (np.ndarray): Nodes to get the neighbors of.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Neighbors of all the nodes, and the node
+            each neighbor is of.
+    """
+
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+
+    # position of each neighbor in `indices`: its node's start plus its index
+    # within that node's neighbors
+    group_starts = np.cumsum(counts) - counts
+    positions = np.arange(total) + np.repeat(starts - group_starts, counts)
+
+    return indices[positions], np.repeat(nodes, counts)
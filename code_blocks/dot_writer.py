@@ -0,0 +1,297 @@
+"""Write graphs as DOT or JSON text, without the graphviz package.
+
+Text is streamed to the file in a single pass over the tree of nodes (see
+`build_tree`) and the edges, instead of building graph objects in memory.
+"""
+
+import json
+import logging
+import math
+from collections import Counter
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition
+
+logger = logging.getLogger(__name__)
+
+Node = Tuple[str, ...]
+Edge = Tuple[Node, Node, int]
+
+# levels of detail, from the coarsest to the finest
+LEVELS = ("package", "module", "class", "function")
+
+
+def aggregate(
+    node: Node,
+    path: Node,
+    level: str = "function",
+    expand: Sequence[Node] = (),
+) -> Node:
+    """Get the node that represents a node at a level of detail.
+
+    Args:
+        node (Node): Node, its path followed by its scope (and name).
+        path (Node): Path of the node's file.
+        level (str): One of `LEVELS`. At "package" a node is represented by the
+            directory of its file (files at the root by themselves), at
+            "module" by its file, at "class" by the module level definition it
+            is in, and at "function" by itself.
+        expand (Sequence[Node]): Node prefixes to show in full
+            detail regardless of the level.
+
+    Returns:
+        Node: The representing node.
+    """
+
+    assert level in LEVELS, f"Unknown level {level}"
+
+    if level == "function" or any(node[: len(e)] == e for e in expand):
+        return node
+    elif level == "package":
+        return path[:-1] or path
+    elif level == "module":
+        return path
+    else:
+        return node[: len(path) + 1]
+
+
+def build_tree(
+    definitions: Set[Definition],
+    code_graph: CodeGraph,
+    level: str = "function",
+    expand: Sequence[Node] = (),
+) -> dict:
+    """Get the tree of the nodes that represent definitions and the scopes of
+    their references, see `aggregate`.
+
+    Args:
+        definitions (Set[Definition]): Definitions to draw, including ones
+            without references.
+        code_graph (CodeGraph): Graph of the resolved references.
+        level (str): Level of detail, see `aggregate`.
+        expand (Sequence[Node]): Node prefixes to draw in full detail
+            regardless of the level.
+
+    Returns:
+        dict: Nested dict of node parts.
+    """
+
+    tree_dict = dict()
+
+    def add(node: Node, path: Node):
+        parent_hierarchy = tree_dict
+        for part in aggregate(node, path, level, expand):
+            if part not in parent_hierarchy:
+                parent_hierarchy[part] = dict()
+
+            parent_hierarchy = parent_hierarchy[part]
+
+    for definition in definitions:
+        add(definition.path + definition.scope + (definition.name,), definition.path)
+        logger.debug("Tree node: %s", definition)
+
+    # scopes that reference definitions
+    for src_id in sorted({src_id for src_id, _ in code_graph.edges()}):
+        add(code_graph.nodes[src_id], code_graph.node_path(src_id))
+
+    return tree_dict
+
+
+def aggregate_edges(
+    code_graph: CodeGraph,
+    level: str = "function",
+    expand: Sequence[Node] = (),
+) -> List[Edge]:
+    """Get the edges between the nodes representing the nodes of a graph.
+
+    Edges between the same representing nodes are collapsed into one, and
+    references within a collapsed node are dropped, see `aggregate`.
+
+    Args:
+        code_graph (CodeGraph): Graph of the resolved references.
+        level (str): Level of detail, see `aggregate`.
+        expand (Sequence[Node]): Node prefixes to draw in full detail
+            regardless of the level.
+
+    Returns:
+        List[Edge]: Tail node, head node and amount of references of each edge,
+            sorted.
+    """
+
+    edges: Counter = Counter()
+    for src_id, dst_id in code_graph.edges():
+        tail = aggregate(
+            code_graph.nodes[src_id], code_graph.node_path(src_id), level, expand
+        )
+        head = aggregate(
+            code_graph.nodes[dst_id], code_graph.node_path(dst_id), level, expand
+        )
+
+        # references within a collapsed node aren't drawn
+        if tail != head or tail == code_graph.nodes[src_id]:
+            edges[tail, head] += 1
+
+    return [(tail, head, weight) for (tail, head), weight in sorted(edges.items())]
+
+
+def node_name(node: Node) -> str:
+    return "#".join(node)
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _dot_tree_lines(
+    path: Node, tree: dict, indent: str, urls: Mapping[str, str]
+) -> Iterator[str]:
+    for part, subtree in tree.items():
+        node = path + (part,)
+        name = _quote(node_name(node))
+
+        if len(subtree) == 0:
+            url = urls.get(node_name(node))
+            if url is None:
+                yield f"{indent}{name} [label={name}]\n"
+            else:
+                yield f"{indent}{name} [label={name} URL={_quote(url)}]\n"
+            continue
+
+        # a cluster also has a node of its own, for edges to the whole cluster
+        logger.debug("Cluster: %s", name)
+        yield f"{indent}subgraph {_quote('cluster_' + node_name(node))} {{\n"
+        yield f"{indent}\tgraph [label={name} rankdir=LR]\n"
+        yield f"{indent}\t{name} [label={name}]\n"
+        yield from _dot_tree_lines(node, subtree, indent + "\t", urls)
+        yield f"{indent}}}\n"
+
+
+def write_dot(
+    tree: dict,
+    edges: Sequence[Edge],
+    f: IO[str],
+    urls: Optional[Mapping[str, str]] = None,
+):
+    """Write a graph in the DOT language.
+
+    Nodes with children are drawn as clusters of their children, edges with a
+    weight above 1 are labeled with it.
+
+    Args:
+        tree (dict): Nested dict of node parts, see `build_tree`.
+        edges (Sequence[Edge]): Edges, see `aggregate_edges`.
+        f (IO[str]): File to write to.
+        urls (Optional[Mapping[str, str]]): Links of nodes without children, by node
+            name, e.g. to the file they are drawn in full.
+    """
+
+    f.write("digraph {\n\tgraph [rankdir=LR]\n")
+    f.writelines(_dot_tree_lines((), tree, "\t", urls or {}))
+
+    for tail, head, weight in edges:
+        line = f"\t{_quote(node_name(tail))} -> {_quote(node_name(head))}"
+        if weight > 1:
+            line += f' [label={weight} penwidth="{1 + math.log2(weight):.2f}"]'
+        f.write(line + "\n")
+
+    f.write("}\n")
+
+
+def shard_graph(
+    tree: dict, edges: Sequence[Edge]
+) -> Tuple[Dict[str, Tuple[dict, List[Edge]]], List[Edge]]:
+    """Split a graph into a shard per top-level node, i.e. per top-level package
+    or module, and an index of the edges between them.
+
+    Args:
+        tree (dict): Nested dict of node parts, see `build_tree`.
+        edges (Sequence[Edge]): Edges, see `aggregate_edges`.
+
+    Returns:
+        Tuple[Dict[str, Tuple[dict, List[Edge]]], List[Edge]]: Tree and edges
+            of each shard by top-level node name, and the edges between
+            top-level nodes, weighted by the edges they stand for.
+    """
+
+    shards: Dict[str, Tuple[dict, List[Edge]]] = {
+        part: ({part: subtree}, []) for part, subtree in tree.items()
+    }
+
+    index_edges: Counter = Counter()
+    for tail, head, weight in edges:
+        if tail[0] == head[0]:
+            shards[tail[0]][1].append((tail, head, weight))
+        else:
+            index_edges[tail[:1], head[:1]] += weight
+
+    return shards, [
+        (tail, head, weight) for (tail, head), weight in sorted(index_edges.items())
+    ]
+
+
+def _json_nodes(path: Node, tree: dict) -> Iterator[dict]:
+    for part, subtree in tree.items():
+        node = path + (part,)
+        yield {
+            "id": node_name(node),
+            "parent": node_name(path) if path else None,
+            "cluster": len(subtree) > 0,
+        }
+        yield from _json_nodes(node, subtree)
+
+
+def write_json(tree: dict, edges: Sequence[Edge], f: IO[str]):
+    """Write a graph as JSON, with a list of nodes and a list of edges.
+
+    A node is `{"id", "parent", "cluster"}`, where `parent` is the id of the
+    cluster it's in (null at the top) and `cluster` is whether it has children.
+    An edge is `{"tail", "head", "weight"}`. Each node and edge is on its own
+    line.
+
+    Args:
+        tree (dict): Nested dict of node parts, see `build_tree`.
+        edges (Sequence[Edge]): Edges, see `aggregate_edges`.
+        f (IO[str]): File to write to.
+    """
+
+    f.write('{"nodes": [\n')
+    for i, node in enumerate(_json_nodes((), tree)):
+        f.write((",\n" if i > 0 else "") + json.dumps(node))
+
+    f.write('\n], "edges": [\n')
+    for i, (tail, head, weight) in enumerate(edges):
+        edge = {"tail": node_name(tail), "head": node_name(head), "weight": weight}
+        f.write((",\n" if i > 0 else "") + json.dumps(edge))
+
+    f.write("\n]}\n")
+
+
+def write_graph(
+    definitions: Set[Definition],
+    code_graph: CodeGraph,
+    output: Path,
+    level: str = "function",
+    expand: Sequence[Node] = (),
+):
+    """Write definitions and their references as JSON if `output` ends with
+    `.json`, else as DOT.
+
+    Args:
+        definitions (Set[Definition]): Definitions to write.
+        code_graph (CodeGraph): Graph of the references to write.
+        output (Path): File to write.
+        level (str): Level of detail, see `aggregate`.
+        expand (Sequence[Node]): Node prefixes to write in full detail
+            regardless of the level.
+    """
+
+    tree = build_tree(definitions, code_graph, level, expand)
+    edges = aggregate_edges(code_graph, level, expand)
+
+    with open(output, "w", encoding="utf-8") as f:
+        if output.suffix == ".json":
+            write_json(tree, edges, f)
+        else:
+            write_dot(tree, edges, f)
@@ -0,0 +1,288 @@
+import struct
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from code_blocks.csr import build_csr
+from code_blocks.graph import EDGE_ID_BITS, EDGE_ID_MASK, CodeGraph
+
+# node kinds, nodes that aren't definitions are a module or a reference scope
+KINDS = ("module", "scope", "function", "class")
+
+# zip local file header: signature, versions, flags... name and extra lengths
+ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+def _encode_strings(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode() for s in strings]
+
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def graph_columns(graph: CodeGraph) -> Dict[str, np.ndarray]:
+    """Convert a graph to columnar arrays.
+
+    Strings are stored as tables of utf-8 bytes and offsets, so every column is
+    a plain numeric array that can be memory mapped.
+
+    Args:
+        graph (CodeGraph): Graph to convert.
+
+    Returns:
+        Dict[str, np.ndarray]: Arrays by column name.
+    """
+
+    node_count = len(graph)
+
+    node_path = np.empty(node_count, dtype=np.int32)
+    node_kind = np.empty(node_count, dtype=np.int8)
+    node_row = np.full(node_count, -1, dtype=np.int32)
+    node_col = np.full(node_count, -1, dtype=np.int32)
+    node_scopes: List[str] = []
+
+    for node_id, node in enumerate(graph.nodes):
+        path = graph.node_path(node_id)
+        definition = graph.node_definition(node_id)
+
+        node_path[node_id] = graph.paths.get(path)
+        node_scopes.append(".".join(node[len(path) :]))
+
+        if definition is None:
+            node_kind[node_id] = KINDS.index(
+                "module" if len(node) == len(path) else "scope"
+            )
+        else:
+            node_kind[node_id] = KINDS.index(definition.kind)
+            node_row[node_id] = definition.row
+            node_col[node_id] = definition.col
+
+    packed_edges = np.frombuffer(graph.packed_edges(), dtype=np.int64)
+
+    edge_src = (packed_edges >> EDGE_ID_BITS).astype(np.int32)
+    edge_dst = (packed_edges & EDGE_ID_MASK).astype(np.int32)
+
+    # forward and reverse adjacency, for queries that don't scan all edges
+    out_indptr, out_indices = build_csr(edge_src, edge_dst, node_count)
+    in_indptr, in_indices = build_csr(edge_dst, edge_src, node_count)
+
+    path_offsets, path_bytes = _encode_strings(["/".join(p) for p in graph.paths])
+    scope_offsets, scope_bytes = _encode_strings(node_scopes)
+
+    return {
+        "node_path": node_path,
+        "node_kind": node_kind,
+        "node_row": node_row,
+        "node_col": node_col,
+        "node_scope_offsets": scope_offsets,
+        "node_scope_bytes": scope_bytes,
+        "path_offsets": path_offsets,
+        "path_bytes": path_bytes,
+        "edge_src": edge_src,
+        "edge_dst": edge_dst,
+        "out_indptr": out_indptr,
+        "out_indices": out_indices,
+        "in_indptr": in_indptr,
+        "in_indices": in_indices,
+    }
+
+
+class GraphArrays:
+    def __init__(self, arrays: Mapping[str, np.ndarray]):
+        """Columnar graph, as exported by `export_npz`.
+
+        Nodes are rows of the `node_*` columns, edges are rows of the `edge_*`
+        columns, and `edge_src`/`edge_dst` hold node ids. `out_*` and `in_*`
+        are adjacency indexes of the edges, see `build_csr`. Files exported
+        before they existed get them built on load.
+
+        Args:
+            arrays (Mapping[str, np.ndarray]): Arrays by column name.
+        """
+
+        self.arrays = arrays
+
+        self.node_path = arrays["node_path"]
+        self.node_kind = arrays["node_kind"]
+        self.node_row = arrays["node_row"]
+        self.node_col = arrays["node_col"]
+        self.edge_src = arrays["edge_src"]
+        self.edge_dst = arrays["edge_dst"]
+
+        if "out_indptr" not in arrays:
+            node_count = len(self.node_path)
+            out_indptr, out_indices = build_csr(
+                self.edge_src, self.edge_dst, node_count
+            )
+            in_indptr, in_indices = build_csr(self.edge_dst, self.edge_src, node_count)
+            arrays = dict(
+                arrays,
+                out_indptr=out_indptr,
+                out_indices=out_indices,
+                in_indptr=in_indptr,
+                in_indices=in_indices,
+            )
+            self.arrays = arrays
+
+        self.out_indptr = arrays["out_indptr"]
+        self.out_indices = arrays["out_indices"]
+        self.in_indptr = arrays["in_indptr"]
+        self.in_indices = arrays["in_indices"]
+
+    def _string(self, table: str, i: int) -> str:
+        offsets = self.arrays[f"{table}_offsets"]
+        data = self.arrays[f"{table}_bytes"]
+        return data[offsets[i] : offsets[i + 1]].tobytes().decode()
+
+    def path(self, path_id: int) -> str:
+        return self._string("path", path_id)
+
+    def node_scope(self, node_id: int) -> str:
+        return self._string("node_scope", node_id)
+
+    def node_name(self, node_id: int) -> str:
+        """Qualified name of a node, e.g. `pkg/foo.py:Class.method`."""
+
+        path = self.path(self.node_path[node_id])
+        scope = self.node_scope(node_id)
+
+        return f"{path}:{scope}" if scope else path
+
+    def node_kind_name(self, node_id: int) -> str:
+        return KINDS[self.node_kind[node_id]]
+
+    def __len__(self) -> int:
+        return len(self.node_path)
+
+
+def export_npz(graph: CodeGraph, output: Path):
+    """Write a graph as an uncompressed `.npz` file, see `load_npz`.
+
+    Args:
+        graph (CodeGraph): Graph to export.
+        output (Path): File to write.
+    """
+
+    # columns are passed as Any, since numpy >= 2.1 stubs match unpacked keyword
+    # arrays against its allow_pickle keyword, which older numpy doesn't have
+    columns: Dict[str, Any] = graph_columns(graph)
+    with open(output, "wb") as f:
+        np.savez(f, **columns)
+
+
+def load_npz(path: Path) -> GraphArrays:
+    """Memory map a graph written by `export_npz`.
+
+    `np.load` copies `.npz` members into memory, but they are stored
+    uncompressed, so each member's array data is mapped directly from its
+    offset in the file instead. Loading takes the same time for any graph size,
+    data is only read from disk when accessed.
+
+    Args:
+        path (Path): File to load.
+
+    Returns:
+        GraphArrays: The memory mapped graph.
+    """
+
+    arrays: Dict[str, np.ndarray] = dict()
+
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            assert info.compress_type == zipfile.ZIP_STORED, "Member is compressed"
+
+            f.seek(info.header_offset)
+            header = ZIP_LOCAL_HEADER.unpack(f.read(ZIP_LOCAL_HEADER.size))
+            assert header[0] == ZIP_LOCAL_HEADER_SIGNATURE, "Bad zip member header"
+            name_length, extra_length = header[-2:]
+            f.seek(name_length + extra_length, 1)
+
+            if np.lib.format.read_magic(f) == (1, 0):
+                array_header = np.lib.format.read_array_header_1_0(f)
+            else:
+                array_header = np.lib.format.read_array_header_2_0(f)
+            shape, fortran_order, dtype = array_header
+
+            name = info.filename[: -len(".npy")]
+            if np.prod(shape) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(
+                    path,
+                    dtype=dtype,
+                    mode="r",
+                    offset=f.tell(),
+                    shape=shape,
+                    order="F" if fortran_order else "C",
+                )
+
+    return GraphArrays(arrays)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet support requires pyarrow, install code_blocks[parquet]"
+        ) from e
+
+    return pyarrow, pyarrow.parquet
+
+
+def export_parquet(graph: CodeGraph, output: Path):
+    """Write a graph as `nodes.parquet` and `edges.parquet` in a directory.
+
+    Requires the optional `pyarrow` dependency.
+
+    Args:
+        graph (CodeGraph): Graph to export.
+        output (Path): Directory to write to, created if it doesn't exist.
+    """
+
+    pa, pq = _import_pyarrow()
+
+    columns = GraphArrays(graph_columns(graph))
+
+    paths = [columns.path(i) for i in range(len(graph.paths))]
+    nodes = pa.table(
+        {
+            "id": pa.array(np.arange(len(columns), dtype=np.int32)),
+            "path": pa.DictionaryArray.from_arrays(columns.node_path, paths),
+            "scope": [columns.node_scope(i) for i in range(len(columns))],
+            "kind": pa.DictionaryArray.from_arrays(columns.node_kind, list(KINDS)),
+            "row": columns.node_row,
+            "col": columns.node_col,
+        }
+    )
+    edges = pa.table({"src": columns.edge_src, "dst": columns.edge_dst})
+
+    output.mkdir(parents=True, exist_ok=True)
+    pq.write_table(nodes, output / "nodes.parquet")
+    pq.write_table(edges, output / "edges.parquet")
+
+
+def load_parquet(path: Path):
+    """Load a graph written by `export_parquet`, memory mapping the files.
+
+    Requires the optional `pyarrow` dependency.
+
+    Args:
+        path (Path): Directory to load from.
+
+    Returns:
+        Tuple[pyarrow.Table, pyarrow.Table]: Nodes and edges tables.
+    """
+
+    _, pq = _import_pyarrow()
+
+    nodes = pq.read_table(path / "nodes.parquet", memory_map=True)
+    edges = pq.read_table(path / "edges.parquet", memory_map=True)
+
+    return nodes, edges
@@ -0,0 +1,237 @@
+from array import array
+from typing import (
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from code_blocks.types import Definition, ResolvedReference
+
+T = TypeVar("T", bound=Hashable)
+
+# edges are packed into a single integer, source id in the high bits
+EDGE_ID_BITS = 32
+EDGE_ID_MASK = (1 << EDGE_ID_BITS) - 1
+
+
+class Interner(Generic[T]):
+    def __init__(self, values: Iterable[T] = ()):
+        """Map equal values to a single shared instance, and a small integer id.
+
+        Ids are assigned in order of first appearance, starting at 0.
+
+        Args:
+            values (Iterable[T]): Values to intern up front.
+        """
+
+        self._ids: Dict[T, int] = dict()
+        self._values: List[T] = []
+
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value: T) -> int:
+        """Get the id of a value, assigning a new one if it wasn't seen before.
+
+        Args:
+            value (T): Value to intern.
+
+        Returns:
+            int: Id of the value.
+        """
+
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = len(self._values)
+            self._ids[value] = value_id
+            self._values.append(value)
+
+        return value_id
+
+    def get(self, value: T) -> int:
+        """Get the id of an interned value, -1 if it wasn't interned."""
+
+        return self._ids.get(value, -1)
+
+    def shared(self, value: T) -> T:
+        """Get the shared instance equal to a value, interning it if needed."""
+
+        return self._values[self.intern(value)]
+
+    def __getitem__(self, value_id: int) -> T:
+        return self._values[value_id]
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._ids
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._values)
+
+
+class CodeGraph:
+    def __init__(self) -> None:
+        """Graph of definitions, and the scopes that reference them.
+
+        A node is the qualified name of a module or a definition, i.e. its path
+        followed by its scope (and its name for definitions), the same node the
+        visualizer draws. A reference is an edge from the node it was made in to
+        the node of its definition.
+
+        Nodes are interned to ids, and edges are stored as packed id pairs in a
+        flat array. Duplicate edges are only removed when edges are read, so
+        adding an edge is a single append.
+        """
+
+        self.paths: Interner[Tuple[str, ...]] = Interner()
+        self.nodes: Interner[Tuple[str, ...]] = Interner()
+
+        # path id of each node
+        self._node_paths = array("i")
+
+        # definition of each node, None for nodes that are only a path or scope
+        self._node_definitions: List[Optional[Definition]] = []
+
+        self._edges = array("q")
+        self._edges_compact = True
+
+    @classmethod
+    def from_resolved(
+        cls,
+        definitions: Iterable[Definition],
+        resolved_references: Iterable[ResolvedReference],
+    ) -> "CodeGraph":
+        """Build a graph of definitions and their resolved references.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions, including ones
+                without references.
+            resolved_references (Iterable[ResolvedReference]): References to
+                the definitions.
+
+        Returns:
+            CodeGraph: The built graph.
+        """
+
+        graph = cls()
+
+        for definition in definitions:
+            graph.add_definition(definition)
+
+        graph.add_resolved_references(resolved_references)
+
+        return graph
+
+    def _add_node(self, path: Tuple[str, ...], scope: Tuple[str, ...]) -> int:
+        node_id = self.nodes.intern(path + scope)
+        if node_id == len(self._node_paths):
+            self._node_paths.append(self.paths.intern(path))
+            self._node_definitions.append(None)
+
+        return node_id
+
+    def add_definition(self, definition: Definition) -> int:
+        """Add the node of a definition.
+
+        Args:
+            definition (Definition): Definition to add.
+
+        Returns:
+            int: Node id of the definition.
+        """
+
+        node_id = self._add_node(definition.path, definition.scope + (definition.name,))
+        self._node_definitions[node_id] = definition
+
+        return node_id
+
+    def add_edge(self, src_id: int, dst_id: int):
+        self._edges.append(src_id << EDGE_ID_BITS | dst_id)
+        self._edges_compact = False
+
+    def add_resolved_reference(self, resolved_reference: ResolvedReference):
+        """Add an edge from the scope of a reference to its definition.
+
+        Args:
+            resolved_reference (ResolvedReference): Reference to add.
+        """
+
+        reference = resolved_reference.reference
+        src_id = self._add_node(reference.path, reference.scope)
+        dst_id = self.add_definition(resolved_reference.definition)
+
+        self.add_edge(src_id, dst_id)
+
+    def add_resolved_references(self, resolved_references: Iterable[ResolvedReference]):
+        """Add the edges of references, e.g. as they are resolved, see
+        `add_resolved_reference`."""
+
+        for resolved_reference in resolved_references:
+            self.add_resolved_reference(resolved_reference)
+
+    def remove_edges_to(self, dst_ids: Set[int]):
+        """Remove every edge to some nodes, e.g. before resolving them again.
+
+        Args:
+            dst_ids (Set[int]): Destination node ids of the edges to remove.
+        """
+
+        self._compact()
+        self._edges = array(
+            "q", (e for e in self._edges if e & EDGE_ID_MASK not in dst_ids)
+        )
+
+    def _compact(self):
+        if not self._edges_compact:
+            self._edges = array("q", sorted(set(self._edges)))
+            self._edges_compact = True
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        """Get the unique edges, sorted by source then destination node id.
+
+        Returns:
+            Iterator[Tuple[int, int]]: Source and destination node id of each
+                edge.
+        """
+
+        self._compact()
+
+        for edge in self._edges:
+            yield edge >> EDGE_ID_BITS, edge & EDGE_ID_MASK
+
+    def packed_edges(self) -> array:
+        """Get the unique edges packed as `src_id << EDGE_ID_BITS | dst_id`, sorted.
+
+        Returns:
+            array: The packed edges, must not be modified.
+        """
+
+        self._compact()
+        return self._edges
+
+    def edge_count(self) -> int:
+        self._compact()
+        return len(self._edges)
+
+    def node_path(self, node_id: int) -> Tuple[str, ...]:
+        return self.paths[self._node_paths[node_id]]
+
+    def node_definition(self, node_id: int) -> Optional[Definition]:
+        return self._node_definitions[node_id]
+
+    def node_name(self, node_id: int) -> str:
+        """Name of a node as drawn by the visualizer, its parts joined by '#'."""
+
+        return "#".join(self.nodes[node_id])
+
+    def __len__(self) -> int:
+        return len(self.nodes)
@@ -1,101 +1,162 @@
+import logging
+import os
 from pathlib import Path
-from typing import Optional, Set, Tuple
+from typing import List, Optional, Sequence, Set, Tuple
 
 import graphviz
 
-from code_blocks.types import Definition, ResolvedReference
+from code_blocks.dot_writer import aggregate_edges, build_tree, shard_graph, write_dot
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition
 
+logger = logging.getLogger(__name__)
 
-def build_tree(
-    definitions: Set[Definition], resolved_references: Set[ResolvedReference]
-) -> dict:
 
-    tree_dict = dict()
+def _render_svg(dot_path: Path, svg_path: Path) -> Path:
+    logger.info("Rendering: %s", dot_path)
+    # graphviz < 0.20 has no outfile, it renders next to the DOT file
+    rendered = graphviz.render("dot", "svg", dot_path)
+    os.replace(rendered, svg_path)
 
-    for definition in definitions:
-        definition_parent_hierarchy = tree_dict
+    return svg_path
 
-        for part in definition.path + definition.scope + (definition.name,):
-            if part not in definition_parent_hierarchy:
-                definition_parent_hierarchy[part] = dict()
 
-            definition_parent_hierarchy = definition_parent_hierarchy[part]
+def render_svgs(dot_paths: List[Path], svg_paths: List[Path], jobs: int = 1):
+    """Render DOT files to .svg files, in parallel worker processes.
 
-        print("@ TRE @", definition.name, definition_parent_hierarchy, tree_dict)
+    Each file is rendered by a separate `dot` process, so they are rendered in
+    parallel even though a single `dot` process is single threaded.
 
-    for resolved_reference in resolved_references:
-        reference = resolved_reference.reference
-        reference_parent_hierarchy = tree_dict
+    Args:
+        dot_paths (List[Path]): DOT files to render, the largest ones should
+            come first so they don't finish last.
+        svg_paths (List[Path]): File to render each DOT file to.
+        jobs (int): Amount of files to render at once.
+    """
 
-        for part in reference.path + reference.scope:
-            if part not in reference_parent_hierarchy:
-                reference_parent_hierarchy[part] = dict()
+    if jobs <= 1 or len(dot_paths) <= 1:
+        for dot_path, svg_path in zip(dot_paths, svg_paths):
+            _render_svg(dot_path, svg_path)
+        return
 
-            reference_parent_hierarchy = reference_parent_hierarchy[part]
+    # multiprocessing is slow to import, a single file doesn't need it
+    from concurrent.futures import ProcessPoolExecutor
 
-    return tree_dict
+    with ProcessPoolExecutor(min(jobs, len(dot_paths))) as executor:
+        for svg_path in executor.map(_render_svg, dot_paths, svg_paths):
+            logger.info("Rendered: %s", svg_path)
 
 
 class GraphvizVisualizer:
-    def build_tree_graph(
-        self,
-        path: Tuple[str, ...],
-        tree: dict,
-    ) -> Optional[graphviz.Digraph]:
-
-        if len(tree) == 0:
-            return None
-
-        path_str = "#".join(path)
-        print("@ VIZ @", path_str)
-        g = graphviz.Digraph(f"cluster_{path_str}" if path_str else None)
-        g.attr("graph", rankdir="LR", label=path_str)
-        if path_str:
-            g.node(name=path_str, label=path_str)
-
-        for k, v in tree.items():
-            path_str = "#".join(path + (k,))
-            print("@ VIZ @", path_str)
-            subgraph = self.build_tree_graph(path + (k,), v)
-            if subgraph is None:
-                g.node(name=path_str, label=path_str)
-            else:
-                g.subgraph(subgraph)
-
-        return g
-
     def visualize(
         self,
         definitions: Set[Definition],
-        resolved_references: Set[ResolvedReference],
+        code_graph: CodeGraph,
         output: Optional[Path] = None,
         view: bool = False,
+        level: str = "function",
+        expand: Sequence[Tuple[str, ...]] = (),
     ):
-        g = graphviz.Digraph()
-        g.attr("graph", rankdir="LR")
+        """Render definitions and their references as an .svg file.
+
+        Args:
+            definitions (Set[Definition]): Definitions to draw.
+            code_graph (CodeGraph): Graph of the references to draw.
+            output (Optional[Path]): File to write.
+            view (bool): Open the rendered file.
+            level (str): Level of detail, see `dot_writer.aggregate`. Nodes are
+                collapsed into the node representing them, and edges between
+                collapsed nodes into a single edge labeled with their amount.
+            expand (Sequence[Tuple[str, ...]]): Node prefixes to draw in full
+                detail regardless of the level.
+        """
+
+        tree = build_tree(definitions, code_graph, level, expand)
+        logger.debug("Tree: %s", tree)
+
+        edges = aggregate_edges(code_graph, level, expand)
+
+        # DOT is streamed to a file, and like `graphviz.Digraph.render` the file
+        # is kept next to the rendered one
+        dot_path = Path("Digraph.gv") if output is None else Path(output)
+        with open(dot_path, "w", encoding="utf-8") as f:
+            write_dot(tree, edges, f)
+
+        rendered = graphviz.render("dot", "svg", dot_path)
+        if view:
+            graphviz.view(rendered)
+
+    def visualize_sharded(
+        self,
+        definitions: Set[Definition],
+        code_graph: CodeGraph,
+        output: Path,
+        view: bool = False,
+        level: str = "function",
+        expand: Sequence[Tuple[str, ...]] = (),
+        jobs: int = 1,
+    ) -> Path:
+        """Render each top-level package (or module) to its own .svg file, and
+        an index of the references between them.
+
+        Rendering time grows faster than the size of the graph, and the shards
+        are rendered in parallel, so this is faster than `visualize` for large
+        projects. References between packages are only drawn in the index,
+        where each package links to its shard.
+
+        Files are written to `output`: `index.svg`, and `shards/<package>.svg`
+        for each package, next to the DOT files they are rendered from.
+
+        Args:
+            definitions (Set[Definition]): Definitions to draw.
+            code_graph (CodeGraph): Graph of the references to draw.
+            output (Path): Directory to write to, created if it doesn't exist.
+            view (bool): Open the rendered index.
+            level (str): Level of detail, see `visualize`.
+            expand (Sequence[Tuple[str, ...]]): Node prefixes to draw in full
+                detail regardless of the level.
+            jobs (int): Amount of files to render at once.
+
+        Returns:
+            Path: The rendered index.
+        """
+
+        tree = build_tree(definitions, code_graph, level, expand)
+        edges = aggregate_edges(code_graph, level, expand)
+
+        shards, index_edges = shard_graph(tree, edges)
+
+        shards_dir = output / "shards"
+        shards_dir.mkdir(parents=True, exist_ok=True)
+
+        dot_paths: List[Path] = []
+        urls = dict()
+        for name, (shard_tree, shard_edges) in shards.items():
+            # top-level nodes without children have nothing more to show
+            if len(shard_tree[name]) == 0:
+                continue
 
-        tree = build_tree(definitions, resolved_references)
+            dot_path = shards_dir / f"{name}.gv"
+            with open(dot_path, "w", encoding="utf-8") as f:
+                write_dot(shard_tree, shard_edges, f)
 
-        print("@ TRE @", str(tree))
+            dot_paths.append(dot_path)
+            urls[name] = f"shards/{name}.svg"
 
-        subgraph = self.build_tree_graph((), tree)
-        g.subgraph(subgraph)
+        index_dot_path = output / "index.gv"
+        with open(index_dot_path, "w", encoding="utf-8") as f:
+            write_dot({name: dict() for name in shards}, index_edges, f, urls)
 
-        # dedup edges
-        edges = set()
-        for resolved_reference in resolved_references:
-            if resolved_reference is None:
-                continue
-            reference = resolved_reference.reference
-            definition = resolved_reference.definition
-            tail_name = "#".join(reference.path + reference.scope)
-            head_name = "#".join(
-                (definition.path + definition.scope) + (definition.name,)
-            )
-            print("@ CON @", tail_name, head_name)
-            edges.add((tail_name, head_name))
-
-        for tail_name, head_name in edges:
-            g.edge(tail_name=tail_name, head_name=head_name)
-
-        g.render(filename=output, format="svg", engine="dot", view=view)
+        # the index is small, it doesn't need to go first
+        dot_paths.sort(key=lambda p: p.stat().st_size, reverse=True)
+        dot_paths.append(index_dot_path)
+        svg_paths = [p.with_suffix(".svg") for p in dot_paths]
+
+        logger.info("Rendering %d files, %d at once", len(dot_paths), jobs)
+        render_svgs(dot_paths, svg_paths, jobs)
+
+        index = output / "index.svg"
+        if view:
+            graphviz.view(index)
+
+        return index
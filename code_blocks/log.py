@@ -0,0 +1,62 @@
+"""Logging setup of the `code-blocks` command.
+
+Modules log through `logging.getLogger(__name__)` with %-style arguments, so
+messages are only formatted when their level is enabled. Nothing below a
+warning is shown unless asked for.
+"""
+
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Optional
+
+LOGGER_NAME = "code_blocks"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as a single line JSON object."""
+
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry)
+
+
+def configure_logging(verbose: bool = False, trace_path: Optional[Path] = None):
+    """Log warnings (and progress if verbose) to stderr, and everything to a trace.
+
+    Args:
+        verbose (bool): Also show progress messages.
+        trace_path (Optional[Path]): File to write every message to, including
+            debug messages, as JSON lines.
+    """
+
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.propagate = False
+
+    console_level = logging.INFO if verbose else logging.WARNING
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(console)
+
+    if trace_path is None:
+        # debug messages aren't even formatted
+        logger.setLevel(console_level)
+    else:
+        trace = logging.FileHandler(trace_path, mode="w", encoding="utf-8")
+        trace.setFormatter(JsonFormatter())
+        logger.addHandler(trace)
+        logger.setLevel(logging.DEBUG)
@@ -1,7 +1,9 @@
+import logging
+import queue
 import time
 from queue import Queue
 from threading import Thread
-from typing import Any, Optional, Type
+from typing import Any, Iterable, Optional, Tuple, Type, Union
 
 from sansio_lsp_client.client import CAPABILITIES, Client
 from sansio_lsp_client.events import ConfigurationRequest
@@ -12,16 +14,56 @@ from sansio_lsp_client.events import (
     PublishDiagnostics,
     References,
     RegisterCapabilityRequest,
+    ResponseError,
     ShowMessageRequest,
 )
 from sansio_lsp_client.structs import (
+    TextDocumentContentChangeEvent,
     TextDocumentIdentifier,
     TextDocumentItem,
     TextDocumentPosition,
+    VersionedTextDocumentIdentifier,
+    WorkspaceFolder,
 )
 
 from code_blocks.lsp_server import LspServer
 
+logger = logging.getLogger(__name__)
+
+# how often the event reader wakes up to check if it should stop
+READ_EVENTS_INTERVAL = 0.5
+
+
+class _Client(Client):
+    """sansio client that remembers which request the last event answered."""
+
+    def __init__(self, process_id: int, root_uri: str) -> None:
+        # id of the request answered by the last received event, None if the
+        # event wasn't a response (e.g. a server notification)
+        self.last_response_id: Optional[int] = None
+
+        # pyright only resolves imports of project packages (and so finds their
+        # references) within a workspace folder, the root uri alone isn't enough
+        workspace_folder = WorkspaceFolder(uri=root_uri, name=root_uri.split("/")[-1])
+
+        super().__init__(process_id, root_uri, [workspace_folder])
+
+    def _handle_response(self, response) -> Event:
+        # requests are sent with int ids, a response with another id (or none)
+        # doesn't answer any of them
+        self.last_response_id = response.id if isinstance(response.id, int) else None
+
+        # notifications sansio can't parse as requests (e.g. pyright's
+        # "pyright/beginProgress", which has a list of params) end up here
+        if response.id is None:
+            return Event()
+
+        return super()._handle_response(response)
+
+    def _handle_request(self, request) -> Event:
+        self.last_response_id = None
+        return super()._handle_request(request)
+
 
 class LspClient:
     def __init__(self, lsp_server: LspServer) -> None:
@@ -31,8 +73,12 @@ class LspClient:
         CAPABILITIES["window"]["workDoneProgress"] = False
 
         # start client (implicitly sends an "initialize" request to the lsp)
-        self._client = Client(self._lsp_server._lsp_proc_id, self._lsp_server._root_uri)
-        self._client_events: "Queue[Event]" = Queue()
+        self._client = _Client(
+            self._lsp_server._lsp_proc_id, self._lsp_server._root_uri
+        )
+
+        # events are paired with the id of the request they answer
+        self._client_events: "Queue[Optional[Tuple[Optional[int], Event]]]" = Queue()
 
         # start client event reader
         self._start_client_event_reader()
@@ -59,11 +105,19 @@ class LspClient:
         self._client_event_reader.join()
 
     def _read_client_events(self):
-        while self._read_events:
-            data = self._lsp_server.read_bytes()
-            if data is not None:
-                for event in self._client.recv(data):
-                    self._client_events.put(event)
+        try:
+            while self._read_events:
+                data = self._lsp_server.read_bytes(timeout=READ_EVENTS_INTERVAL)
+                if data is not None:
+                    for event in self._client.recv(data):
+                        self._client_events.put((self._client.last_response_id, event))
+
+                elif self._lsp_server.closed:
+                    break
+
+        finally:
+            # wake up anyone waiting for events, there will be no more
+            self._client_events.put(None)
 
     def _await_event(
         self,
@@ -71,29 +125,48 @@ class LspClient:
         timeout: Optional[float] = None,
         auto_reply: Optional[bool] = False,
     ) -> Any:
-        if timeout is not None:
-            start = time.time()
-
-        while timeout is None or time.time() - start < timeout:
-            while not self._client_events.empty():
-                event = self._client_events.get()
-                do_return = isinstance(event, event_type)
-                if do_return:
-                    print("@ GOT @", repr(event))
-                else:
-                    print("@ IGN @", repr(event))
-
-                if auto_reply and isinstance(
-                    event,
-                    ShowMessageRequest
-                    # | WorkDoneProgressCreate
-                    | RegisterCapabilityRequest | ConfigurationRequest,
-                ):
-                    event.reply()
-                    self.send()
-
-                if do_return:
-                    return event
+        _, event = self._await_response(event_type, timeout, auto_reply)
+
+        return event
+
+    def _await_response(
+        self,
+        event_type: Union[Type[Event], Tuple[Type[Event], ...]] = Event,
+        timeout: Optional[float] = None,
+        auto_reply: Optional[bool] = False,
+    ) -> Tuple[Optional[int], Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"Timed out waiting for {event_type}")
+
+            try:
+                response = self._client_events.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError(f"Timed out waiting for {event_type}")
+
+            if response is None:
+                self._client_events.put(None)
+                raise ConnectionError("LSP client stopped reading events")
+
+            response_id, event = response
+
+            do_return = isinstance(event, event_type)
+            logger.debug("%s event: %r", "Got" if do_return else "Ignored", event)
+
+            if auto_reply and isinstance(
+                event,
+                ShowMessageRequest
+                # | WorkDoneProgressCreate
+                | RegisterCapabilityRequest | ConfigurationRequest,
+            ):
+                event.reply()
+                self.send()
+
+            if do_return:
+                return response_id, event
 
     def notify_open(self, text_document_item: TextDocumentItem):
         # notify LSP we opened the file
@@ -103,6 +176,56 @@ class LspClient:
         # wait for server to acknowledge we opened the file
         self._await_event(PublishDiagnostics, auto_reply=True)
 
+    def notify_open_many(self, text_document_items: Iterable[TextDocumentItem]):
+        """Notify the LSP we opened files, without waiting for each file.
+
+        All files are sent back to back, then a cheap request (document
+        symbols of the last file) is sent. The server handles messages in order,
+        so once it answers it has handled every open.
+
+        Args:
+            text_document_items (Iterable[TextDocumentItem]): Opened files.
+        """
+
+        last_text_document_item = None
+        for text_document_item in text_document_items:
+            self._client.did_open(text_document_item)
+            last_text_document_item = text_document_item
+
+        if last_text_document_item is None:
+            return
+
+        # wait for server to handle all the opens
+        request_id = self._client.documentSymbol(
+            TextDocumentIdentifier(uri=last_text_document_item.uri)
+        )
+        self.send()
+
+        self.await_response(request_id)
+
+    def await_response(self, request_id: int) -> Event:
+        """Wait for the response of a request.
+
+        Args:
+            request_id (int): Id of the request.
+
+        Returns:
+            Event: The response.
+        """
+
+        while True:
+            response_id, event = self._await_response(auto_reply=True)
+            if response_id == request_id:
+                return event
+
+    def notify_change(
+        self, text_document_identifier: VersionedTextDocumentIdentifier, text: str
+    ):
+        # notify LSP the whole file changed, a change without a range
+        change = TextDocumentContentChangeEvent(text=text, range=None, rangeLength=None)
+        self._client.did_change(text_document_identifier, [change])
+        self.send()
+
     def notify_close(self, text_document_identifier: TextDocumentIdentifier):
         # notify LSP we closed the file
         self._client.did_close(text_document_identifier)
@@ -137,3 +260,39 @@ class LspClient:
         references: References = self._await_event(References, auto_reply=True)
 
         return references
+
+    def send_references(self, text_document_position: TextDocumentPosition) -> int:
+        """Request references of a position without waiting for the response.
+
+        Args:
+            text_document_position (TextDocumentPosition): Position to get
+                references of.
+
+        Returns:
+            int: Id of the request, see `await_references`.
+        """
+
+        request_id = self._client.references(text_document_position)
+        self.send()
+
+        return request_id
+
+    def await_references(self) -> Tuple[int, Union[References, ResponseError]]:
+        """Wait for the response of any request sent by `send_references`.
+
+        Returns:
+            Tuple[int, Union[References, ResponseError]]: Id of the answered
+                request, and its references or the error the server failed it
+                with.
+        """
+
+        while True:
+            response_id, event = self._await_response(
+                (References, ResponseError), auto_reply=True
+            )
+
+            # server notifications can't be references responses
+            if response_id is None:
+                continue
+
+            return response_id, event
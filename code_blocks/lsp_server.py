@@ -1,20 +1,89 @@
-import subprocess
+import logging
+import os
 import queue
+import signal
+import subprocess
 
+from io import BufferedReader
 from pathlib import Path
 from queue import Queue
 from threading import Thread
-from typing import IO, Optional
+from typing import IO, List, Optional, Sequence, cast
+
+logger = logging.getLogger(__name__)
+
+# how many bytes to read from the server stdout in a single read call
+READ_CHUNK_SIZE = 64 * 1024
+
+HEADERS_END = b"\r\n\r\n"
+
+
+class MessageFramer:
+    """Split a byte stream into complete Content-Length framed LSP messages."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+        # total length (headers + content) of the message at the start of the
+        # buffer, None if its headers weren't received yet
+        self._message_length: Optional[int] = None
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add stream bytes, and get all the messages they completed.
+
+        Args:
+            data (bytes): Next bytes of the stream.
+
+        Returns:
+            List[bytes]: Complete messages (headers included), in stream order.
+        """
+
+        self._buf += data
+
+        messages = []
+        while True:
+            if self._message_length is None:
+                headers_end = self._buf.find(HEADERS_END)
+                if headers_end == -1:
+                    break
+
+                content_length = parse_content_length(bytes(self._buf[:headers_end]))
+                self._message_length = headers_end + len(HEADERS_END) + content_length
+
+            # wait for the rest of the message
+            if len(self._buf) < self._message_length:
+                break
+
+            messages.append(bytes(self._buf[: self._message_length]))
+            del self._buf[: self._message_length]
+            self._message_length = None
+
+        return messages
+
+
+def parse_content_length(headers: bytes) -> int:
+    for header in headers.split(b"\r\n"):
+        key, _, value = header.partition(b":")
+        if key.strip().lower() == b"content-length":
+            return int(value)
+
+    raise ValueError(f"Message headers have no Content-Length: {headers!r}")
 
 
 class LspServer:
-    def __init__(self, root_dir: str) -> None:
+    def __init__(
+        self,
+        root_dir: str,
+        command: Sequence[str] = ("pyright-langserver", "--stdio"),
+    ) -> None:
+        # start the server in its own session, so stopping it also stops any
+        # processes it spawned (e.g. node behind a pyright wrapper script)
         self._lsp_server_proc = subprocess.Popen(
-            "pyright-langserver --stdio",
-            shell=True,
+            list(command),
             cwd=root_dir,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
+            start_new_session=True,
         )
 
         # make sure stdin/out were started
@@ -24,11 +93,12 @@ class LspServer:
         self._root_uri = Path(root_dir).resolve().absolute().as_uri()
         self._lsp_proc_id = self._lsp_server_proc.pid
         self._stdin: IO = self._lsp_server_proc.stdin
-        self._stdout: IO = self._lsp_server_proc.stdout
-        self._stdin_q: "Queue[bytes]" = Queue()
-        self._stdout_q: "Queue[bytes]" = Queue()
+        # binary pipes of Popen are BufferedReaders, which have read1
+        self._stdout = cast(BufferedReader, self._lsp_server_proc.stdout)
+        self._stdin_q: "Queue[Optional[bytes]]" = Queue()
+        self._stdout_q: "Queue[Optional[bytes]]" = Queue()
 
-        self._stop = False
+        self._closed = False
         self._stdin_thread = Thread(target=self._write_stdin)
         self._stdout_thread = Thread(target=self._read_stdout)
 
@@ -36,38 +106,58 @@ class LspServer:
         self._stdout_thread.start()
 
     def _write_stdin(self):
-        while not self._stop:
+        while True:
 
-            # check if we have stdin to send to server
-            try:
-                stdin = self._stdin_q.get(block=False)
-            except queue.Empty:
-                stdin = None
+            # wait until we have stdin to send to server, None means stop
+            stdin = self._stdin_q.get()
+            if stdin is None:
+                break
 
             # send stdin
-            if stdin is not None:
-                print("# SEN #", stdin.decode())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sending: %s", stdin.decode())
+            try:
                 self._stdin.write(stdin)
                 self._stdin.flush()
+            except BrokenPipeError:
+                # server exited, the stdout reader will report it
+                break
 
     def _read_stdout(self):
-        while not self._stop:
+        framer = MessageFramer()
+
+        while True:
+
+            # read whatever the server wrote, up to a chunk
+            stdout = self._stdout.read1(READ_CHUNK_SIZE)
 
-            # check if server wrote stdout
-            stdout = self._stdout.read(1)
+            # server closed its stdout, wake up anyone waiting for messages
+            if len(stdout) == 0:
+                self._closed = True
+                self._stdout_q.put(None)
+                break
 
-            # push any stdout bytes we got to the stdout queue
-            if len(stdout) > 0:
-                self._stdout_q.put(stdout)
+            # push complete messages to the stdout queue
+            for message in framer.feed(stdout):
+                self._stdout_q.put(message)
 
     def stop(self):
         """Stop LSP server process and communicator thread."""
 
-        self._stop = True
-        self._lsp_server_proc.terminate()
+        self._stdin_q.put(None)
+        self._terminate()
         self._stdin_thread.join()
         self._stdout_thread.join()
 
+    def _terminate(self):
+        try:
+            os.killpg(self._lsp_server_proc.pid, signal.SIGTERM)
+        except (AttributeError, ProcessLookupError):
+            # no process groups on this platform, or the server already exited
+            self._lsp_server_proc.terminate()
+
+        self._lsp_server_proc.wait()
+
     def send(self, data: bytes):
         """Add data to be scheduled to send to server.
 
@@ -77,17 +167,34 @@ class LspServer:
 
         self._stdin_q.put(data, block=True)
 
-    def read_bytes(self) -> Optional[bytes]:
-        """Read next bytes from the LSP server stdout.
+    @property
+    def closed(self) -> bool:
+        """Whether the LSP server closed its stdout (e.g. it exited)."""
+
+        return self._closed
+
+    def read_bytes(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Read the next message from the LSP server stdout.
 
-        Can be an arbitrary amount of bytes.
+        Blocks until a message arrives, the timeout expires or the server
+        closes its stdout.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a message, None to
+                wait forever.
 
         Returns:
-            Optional[bytes]: Byte from LSP server stdout, if there is one, None if not.
+            Optional[bytes]: Complete message from LSP server stdout, None if
+                the timeout expired or the server closed its stdout.
         """
 
-        # return bytes if stdout q has any
         try:
-            return self._stdout_q.get(block=False)
+            message = self._stdout_q.get(timeout=timeout)
         except queue.Empty:
             return None
+
+        # keep the closed marker for the next reader
+        if message is None:
+            self._stdout_q.put(None)
+
+        return message
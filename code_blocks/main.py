@@ -1,80 +1,280 @@
-import argparse
-import os
+import logging
+import sys
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence, Set, Tuple
 
-from code_blocks.graphviz_visualizer import GraphvizVisualizer
-from code_blocks.lsp_client import LspClient
-from code_blocks.lsp_server import LspServer
+from code_blocks.cache import ReferencesCache
+from code_blocks.graph import CodeGraph
 from code_blocks.parser import Parser
-from code_blocks.resolver import Resolver
+from code_blocks.scanner import Scanner
+from code_blocks.static_resolver import StaticResolver
+from code_blocks.types import Definition
 
+# LSP servers, graphviz, numpy and pandas are slow to import, and are only
+# imported by the steps that need them, see `code_blocks.cli`
 
-def main(project: Path, output: Optional[Path] = None, view: bool = False):
-    lsp_server = LspServer(str(project))
-    print("LSP server started")
+logger = logging.getLogger(__name__)
 
-    lsp_client = LspClient(lsp_server)
-    print("LSP client connected")
+# seconds between progress reports while resolving
+PROGRESS_INTERVAL = 1.0
 
-    print("Scanning project")
-    parser = Parser()
-    resolver = Resolver(lsp_client, project.as_uri())
+# references requests kept sent to each LSP server at once, see `Resolver`
+IN_FLIGHT = 16
 
-    for root, _, files in os.walk(project):
-        for f in files:
-            path = Path(root) / f
-            if path.suffix == ".py":
-                relative_path = path.relative_to(project).parts
-                source = path.read_text()
-                parser.consume(source, relative_path)
-                resolver.consume(source, relative_path)
 
-    definitions, path_line_scopes = parser.definitions, parser.path_line_scopes
+def scan(
+    project: Path,
+    parse_jobs: int = 1,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    use_gitignore: bool = True,
+) -> Tuple[Scanner, Parser, List[Tuple[str, Tuple[str, ...]]]]:
+    """Scan and parse a project.
 
-    print(f"Got files: {len(path_line_scopes.keys())}")
-    print(f"Got definitions: {len(definitions)}")
+    Args:
+        project (Path): Path to the project.
+        parse_jobs (int): Amount of processes to parse files with.
+        include (Sequence[str]): Only scan files matching these globs.
+        exclude (Sequence[str]): Skip files and directories matching these globs.
+        use_gitignore (bool): Skip files ignored by .gitignore files.
 
-    resolved_references = resolver.resolve_definitions(definitions, path_line_scopes)
-    print(f"Resolved: {len(resolved_references)}")
+    Returns:
+        Tuple[Scanner, Parser, List[Tuple[str, Tuple[str, ...]]]]: The scanner,
+            the parser that consumed the project, and the source and path of
+            each scanned file.
+    """
 
-    visualizer = GraphvizVisualizer()
-    visualizer.visualize(definitions, resolved_references, output, view)
+    logger.info("Scanning project")
+    parser = Parser()
+    scanner = Scanner(project, include, exclude, use_gitignore)
+    sources = []
 
-    print("Shutting down LSP client")
-    lsp_client.stop()
+    def scan_sources():
+        # keep the sources for the LSP servers and the cache, while parsing
+        for item in scanner.scan():
+            sources.append(item)
+            yield item
 
-    print("Shutting down LSP server")
-    lsp_server.stop()
+    parse_start = time.perf_counter()
+    parser.consume_many(scan_sources(), parse_jobs)
+    logger.info("Scanned and parsed files: %.2fs", time.perf_counter() - parse_start)
+    logger.info("Scanned %s", scanner.stats)
 
-    print("Done")
+    logger.info("Got files: %d", len(parser.path_line_scopes))
+    logger.info("Got definitions: %d", len(parser.definitions))
 
+    return scanner, parser, sources
 
-if __name__ == "__main__":
-    arg_parser = argparse.ArgumentParser()
 
-    arg_parser.add_argument("-p", "--project", type=Path, help="Path to project")
-    arg_parser.add_argument(
-        "-o", "--output", type=Path, help="Path to desired output file", required=False
+def main(
+    project: Path,
+    output: Optional[Path] = None,
+    view: bool = False,
+    in_flight: int = IN_FLIGHT,
+    jobs: int = 1,
+    cache_path: Optional[Path] = None,
+    watch: bool = False,
+    parse_jobs: int = 1,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    use_gitignore: bool = True,
+    offline: bool = False,
+    export_path: Optional[Path] = None,
+    metrics_path: Optional[Path] = None,
+    layers: Sequence[str] = (),
+    render: bool = True,
+    level: str = "function",
+    expand: Sequence[Tuple[str, ...]] = (),
+    shard: bool = False,
+    render_jobs: int = 1,
+):
+    scanner, parser, sources = scan(
+        project, parse_jobs, include, exclude, use_gitignore
     )
-    arg_parser.add_argument(
-        "-v",
-        "--view",
-        action="store_true",
-        help="Open .svg file when done",
-        required=False,
-        default=False,
+    definitions, path_line_scopes = parser.definitions, parser.path_line_scopes
+
+    cache = None if cache_path is None else ReferencesCache(cache_path, sources)
+
+    # references are added to the graph as each step resolves them, the graph
+    # is the only copy of all of them
+    code_graph = CodeGraph.from_resolved(definitions, ())
+
+    missing_definitions: Set[Definition] = set()
+    for definition in definitions:
+        cached = None if cache is None else cache.get(definition)
+        if cached is None:
+            missing_definitions.add(definition)
+        else:
+            code_graph.add_resolved_references(cached)
+
+    if cache is not None:
+        logger.info(
+            "Cached definitions: %d", len(definitions) - len(missing_definitions)
+        )
+
+    # resolve what the AST alone can, only the rest needs the LSP servers
+    static_start = time.perf_counter()
+    static_resolver = StaticResolver(sources, definitions, path_line_scopes)
+    lsp_definitions: Set[Definition] = set()
+    for definition in missing_definitions:
+        # offline, take whatever can be resolved even if incomplete
+        static_resolved_references = static_resolver.resolve(
+            definition, complete=not offline
+        )
+        if static_resolved_references is None:
+            lsp_definitions.add(definition)
+            continue
+
+        code_graph.add_resolved_references(static_resolved_references)
+
+        # offline references may be incomplete, don't let them into the cache
+        if cache is not None and not offline:
+            cache.put(definition, static_resolved_references)
+
+    logger.info(
+        "Statically resolved definitions: %d, %.2fs",
+        len(missing_definitions) - len(lsp_definitions),
+        time.perf_counter() - static_start,
     )
 
-    args = arg_parser.parse_args()
+    # only start the LSP servers if something wasn't resolved, or to keep watching
+    resolver = None
+    # the LSP servers and their reader threads keep the process alive, they
+    # must be stopped however the run ends
+    try:
+        if len(lsp_definitions) > 0 or watch:
+            from code_blocks.resolver_pool import ResolverPool
+
+            resolver = ResolverPool(project, jobs, in_flight)
+            logger.info("LSP servers started: %d", jobs)
+
+            open_start = time.perf_counter()
+            resolver.consume_many(sources)
+            logger.info("Opened files in LSP: %.2fs", time.perf_counter() - open_start)
+
+            # consume references as they arrive, caching each resolved definition
+            resolve_start = time.perf_counter()
+            last_progress = resolve_start
+            failed = 0
+            for i, (definition, definition_resolved_references) in enumerate(
+                resolver.iter_definitions_resolved_references(
+                    lsp_definitions, path_line_scopes
+                ),
+                start=1,
+            ):
+                # a failed request isn't cached, so the next run retries it
+                if definition_resolved_references is None:
+                    failed += 1
+                else:
+                    code_graph.add_resolved_references(definition_resolved_references)
+                    if cache is not None:
+                        cache.put(definition, definition_resolved_references)
+
+                now = time.perf_counter()
+                done = i == len(lsp_definitions)
+                if now - last_progress >= PROGRESS_INTERVAL or done:
+                    logger.info(
+                        "LSP resolved definitions: %d/%d, %.2fs",
+                        i,
+                        len(lsp_definitions),
+                        now - resolve_start,
+                    )
+                    last_progress = now
+
+            if failed > 0:
+                logger.warning("LSP failed definitions: %d", failed)
+
+        if cache is not None:
+            cache.save()
+
+        logger.info("Resolved edges: %d", code_graph.edge_count())
 
-    project: Path = args.project
-    output: Path = args.output
-    view: bool = args.view
+        if export_path is not None:
+            from code_blocks.export import export_npz, export_parquet
 
-    assert project.is_dir(), "Project path is not a directory"
-    assert output is None or not output.exists(), "Output file exists"
+            if export_path.suffix == ".npz":
+                export_npz(code_graph, export_path)
+            else:
+                export_parquet(code_graph, export_path)
+            logger.info("Exported graph: %s", export_path)
 
-    project = project.resolve().absolute()
+        if metrics_path is not None:
+            from code_blocks.export import GraphArrays, graph_columns
+            from code_blocks.metrics import export_metrics, graph_metrics
+
+            metrics = graph_metrics(GraphArrays(graph_columns(code_graph)), layers)
+            export_metrics(metrics, metrics_path)
+            logger.info("Exported metrics: %s", metrics_path)
+
+        if render and output is not None and output.suffix in (".dot", ".json"):
+            # plain text needs neither graphviz nor its Python package
+            from code_blocks.dot_writer import write_graph
+
+            def on_change(definitions, code_graph):
+                write_graph(definitions, code_graph, output, level, expand)
+
+            on_change(definitions, code_graph)
+
+        elif render and shard:
+            from code_blocks.graphviz_visualizer import GraphvizVisualizer
+
+            assert output is not None, "Rendering shards needs an output directory"
+
+            visualizer = GraphvizVisualizer()
+            index = visualizer.visualize_sharded(
+                definitions, code_graph, output, view, level, expand, render_jobs
+            )
+            logger.info("Rendered index: %s", index)
+
+            def on_change(definitions, code_graph):
+                visualizer.visualize_sharded(
+                    definitions,
+                    code_graph,
+                    output,
+                    False,
+                    level,
+                    expand,
+                    render_jobs,
+                )
+
+        elif render:
+            from code_blocks.graphviz_visualizer import GraphvizVisualizer
+
+            visualizer = GraphvizVisualizer()
+            visualizer.visualize(definitions, code_graph, output, view, level, expand)
+
+            def on_change(definitions, code_graph):
+                visualizer.visualize(
+                    definitions, code_graph, output, False, level, expand
+                )
+
+        else:
+
+            def on_change(definitions, code_graph):
+                logger.info("Resolved edges: %d", code_graph.edge_count())
+
+        if resolver is not None and watch:
+            from code_blocks.watcher import Watcher
+
+            watcher = Watcher(
+                scanner,
+                parser,
+                resolver,
+                sources,
+                code_graph,
+                on_change,
+            )
+            watcher.watch()
+    finally:
+        if resolver is not None:
+            logger.info("Shutting down LSP servers")
+            resolver.stop()
+
+    logger.info("Done")
+
+
+if __name__ == "__main__":
+    from code_blocks.cli import main as cli_main
 
-    main(project, output, view)
+    sys.exit(cli_main(["render", *sys.argv[1:]]))
@@ -0,0 +1,208 @@
+"""Hotspot metrics of a graph: fan-in, fan-out, cycles, centrality and layering.
+
+Usage:
+    python -m code_blocks.metrics graph.npz -o metrics.csv --layer pkg/cli --layer pkg/core
+"""
+
+import sys
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from pandas import DataFrame, Index, Series
+
+from code_blocks.analyzer import CSRGraph, strongly_connected_components
+from code_blocks.export import GraphArrays, load_npz
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10
+PAGERANK_MAX_ITERATIONS = 100
+
+
+def fan_in(graph: GraphArrays) -> np.ndarray:
+    """Amount of nodes referencing each node."""
+
+    return np.diff(graph.in_indptr)
+
+
+def fan_out(graph: GraphArrays) -> np.ndarray:
+    """Amount of nodes each node references."""
+
+    return np.diff(graph.out_indptr)
+
+
+def components(graph: GraphArrays) -> np.ndarray:
+    """Strongly connected component of each node, nodes in a cycle share one.
+
+    Args:
+        graph (GraphArrays): Graph to analyze.
+
+    Returns:
+        np.ndarray: Component id of each node, in reverse topological order.
+    """
+
+    csr_graph = CSRGraph(Index(range(len(graph))), graph.out_indptr, graph.out_indices)
+    component_ids, _ = strongly_connected_components(csr_graph)
+
+    return np.asarray(component_ids, dtype=np.int32)
+
+
+def pagerank(
+    graph: GraphArrays,
+    damping: float = PAGERANK_DAMPING,
+    tolerance: float = PAGERANK_TOLERANCE,
+    max_iterations: int = PAGERANK_MAX_ITERATIONS,
+) -> np.ndarray:
+    """PageRank of each node, by power iteration over the edge arrays.
+
+    Rank flows along references, so nodes that much of the code depends on,
+    directly or not, rank highest. Nodes without references spread their rank
+    evenly over all nodes.
+
+    Args:
+        graph (GraphArrays): Graph to analyze.
+        damping (float): Probability of following a reference.
+        tolerance (float): Stop once the ranks change less than this in total.
+        max_iterations (int): Stop after this many iterations regardless.
+
+    Returns:
+        np.ndarray: Rank of each node, summing to 1.
+    """
+
+    node_count = len(graph)
+    if node_count == 0:
+        return np.empty(0)
+
+    src = np.asarray(graph.edge_src)
+    dst = np.asarray(graph.edge_dst)
+    out_degree = fan_out(graph)
+    dangling = out_degree == 0
+
+    rank = np.full(node_count, 1 / node_count)
+    for _ in range(max_iterations):
+        share = rank / np.maximum(out_degree, 1)
+        new_rank = np.bincount(dst, weights=share[src], minlength=node_count)
+        new_rank *= damping
+        new_rank += (1 - damping + damping * rank[dangling].sum()) / node_count
+
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if change < tolerance:
+            break
+
+    return rank
+
+
+def node_layers(graph: GraphArrays, layers: Sequence[str]) -> np.ndarray:
+    """Layer of each node, from the path of its file.
+
+    Args:
+        graph (GraphArrays): Graph to analyze.
+        layers (Sequence[str]): Path prefixes of the layers, from the top layer
+            to the bottom one, e.g. `["pkg/cli", "pkg/core", "pkg/utils"]`.
+
+    Returns:
+        np.ndarray: Index of the first layer matching each node, -1 if none do.
+    """
+
+    path_count = len(graph.arrays["path_offsets"]) - 1
+    path_layers = np.full(path_count, -1, dtype=np.int32)
+
+    for path_id in range(path_count):
+        path = graph.path(path_id)
+        for layer, prefix in enumerate(layers):
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                path_layers[path_id] = layer
+                break
+
+    return path_layers[graph.node_path]
+
+
+def layer_violations(graph: GraphArrays, layers: np.ndarray) -> np.ndarray:
+    """Find edges from a lower layer to a higher one.
+
+    Args:
+        graph (GraphArrays): Graph to analyze.
+        layers (np.ndarray): Layer of each node, see `node_layers`.
+
+    Returns:
+        np.ndarray: Whether each edge is a violation.
+    """
+
+    src_layers = layers[graph.edge_src]
+    dst_layers = layers[graph.edge_dst]
+
+    return (src_layers != -1) & (dst_layers != -1) & (dst_layers < src_layers)
+
+
+def graph_metrics(graph: GraphArrays, layers: Sequence[str] = ()) -> DataFrame:
+    """Compute all metrics of a graph.
+
+    Args:
+        graph (GraphArrays): Graph to analyze.
+        layers (Sequence[str]): Path prefixes of the layers, see `node_layers`.
+
+    Returns:
+        DataFrame: Metrics of each node, indexed by node id, with its `name`,
+            `kind`, `fan_in`, `fan_out`, `component` and `component_size` (the
+            amount of nodes in its cycle, 1 if it isn't in one), `pagerank`,
+            `layer` and `layer_violations` (the amount of references it makes
+            to higher layers).
+    """
+
+    component_ids = components(graph)
+    component_sizes = np.bincount(component_ids, minlength=len(graph))
+
+    node_layer = node_layers(graph, layers)
+    violations = layer_violations(graph, node_layer)
+
+    return DataFrame(
+        {
+            "name": [graph.node_name(i) for i in range(len(graph))],
+            "kind": [graph.node_kind_name(i) for i in range(len(graph))],
+            "fan_in": fan_in(graph),
+            "fan_out": fan_out(graph),
+            "component": component_ids,
+            "component_size": component_sizes[component_ids],
+            "pagerank": pagerank(graph),
+            "layer": node_layer,
+            "layer_violations": np.bincount(
+                np.asarray(graph.edge_src)[violations], minlength=len(graph)
+            ),
+        }
+    )
+
+
+def export_metrics(metrics: DataFrame, output: Path):
+    """Write metrics as a Parquet file if `output` ends with `.parquet`, else CSV.
+
+    Parquet requires the optional `pyarrow` dependency.
+    """
+
+    if output.suffix == ".parquet":
+        metrics.to_parquet(output)
+    else:
+        metrics.to_csv(output, index_label="id")
+
+
+def main(graph_path: Path, output: Path, layers: Sequence[str], top: int):
+    metrics = graph_metrics(load_npz(graph_path), layers)
+    export_metrics(metrics, output)
+
+    columns = ["name", "fan_in", "fan_out", "component_size", "pagerank"]
+    print(metrics.nlargest(top, "pagerank")[columns].to_string(index=False))
+
+    cycle_components: Series = metrics.loc[metrics["component_size"] > 1, "component"]
+    print(
+        f"Nodes in cycles: {len(cycle_components)}, "
+        f"cycles: {cycle_components.nunique()}"
+    )
+
+    if len(layers) > 0:
+        print(f"Layer violations: {metrics['layer_violations'].sum()}")
+
+
+if __name__ == "__main__":
+    from code_blocks.cli import main as cli_main
+
+    sys.exit(cli_main(["metrics", *sys.argv[1:]]))
@@ -1,67 +1,93 @@
 from __future__ import annotations
 
 import ast
-from typing import Any, Dict, List, Set, Tuple, Union
+import itertools
+from typing import Any, Iterable, List, Set, Tuple, Union
 
+from code_blocks.scope_index import ScopeIndex, ScopeInterval
 from code_blocks.types import Definition, PathLineScopes
 
 DefinitionNode = Union[ast.FunctionDef, ast.ClassDef]
 
+# below this amount of sources, starting worker processes costs more than it saves
+MIN_PARALLEL_SOURCES = 64
+
+# sources sent to a worker process at once
+PARSE_CHUNK_SIZE = 16
+
 
 class Visitor(ast.NodeVisitor):
     def __init__(
         self,
         definitions: Set[Definition],
-        line_scopes: Dict[int, Tuple[str, ...]],
+        scope_intervals: List[ScopeInterval],
         path: Tuple[str, ...],
     ):
         self.definitions = definitions
-        self.line_scopes = line_scopes
+        self.scope_intervals = scope_intervals
         self._path = path
 
-        self._scope: List[DefinitionNode] = []
-
-    def generic_visit(self, node: ast.AST) -> Any:
-        while (
-            hasattr(node, "col_offset")
-            and len(self._scope) > 0
-            and node.col_offset <= self._scope[-1].col_offset
-        ):
-            self._scope.pop()
-
-        if hasattr(node, "lineno"):
-
-            # if the scope of this line has already been set, don't change it
-            # if it hasn't been set, set it to the current scope
-            # NOTE: this assumes that there aren't lines with more than one definition
-            self.line_scopes[node.lineno] = self.line_scopes.get(
-                node.lineno, tuple(n.name for n in self._scope)
-            )
-
-        if isinstance(node, DefinitionNode):
-            self._visit_definition(node)
+        self._scope: Tuple[str, ...] = ()
 
-        super(Visitor, self).generic_visit(node)
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+        self._visit_definition(node, "function", len("def "))
 
-    def _visit_definition(self, node: DefinitionNode):
-        if isinstance(node, ast.FunctionDef):
-            kind = "function"
-            keyword_offset = len("def ")
-        else:
-            kind = "class"
-            keyword_offset = len("class ")
+    def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+        self._visit_definition(node, "class", len("class "))
 
+    def _visit_definition(self, node: DefinitionNode, kind: str, keyword_offset: int):
         location = Definition(
             row=node.lineno,
             col=node.col_offset + keyword_offset,
-            scope=tuple(n.name for n in self._scope),
+            scope=self._scope,
             path=self._path,
             name=node.name,
             kind=kind,
         )
 
         self.definitions.add(location)
-        self._scope.append(node)
+
+        # only the body is in the definition scope, decorators, arguments and
+        # bases are evaluated in the enclosing scope (and can't hold definitions)
+        outer_scope = self._scope
+        self._scope = outer_scope + (node.name,)
+
+        assert node.end_lineno is not None, "Parsed nodes have end positions"
+        self.scope_intervals.append((node.body[0].lineno, node.end_lineno, self._scope))
+
+        for child in node.body:
+            self.visit(child)
+
+        self._scope = outer_scope
+
+
+def parse_source(
+    source: str, path: Tuple[str, ...]
+) -> Tuple[Set[Definition], ScopeIndex]:
+    """
+    Parse a single source, runs in worker processes of `Parser.consume_many`.
+
+    :param source: Text to parse.
+    :param path: Origin of source text.
+    :return: Definitions and scope index of the source.
+    """
+
+    tree = ast.parse(source, filename=path[-1])
+
+    definitions: Set[Definition] = set()
+    scope_intervals: List[ScopeInterval] = []
+
+    visitor = Visitor(definitions, scope_intervals, path)
+    visitor.visit(tree)
+
+    return definitions, ScopeIndex(scope_intervals)
+
+
+def _parse_source_item(
+    item: Tuple[str, Tuple[str, ...]],
+) -> Tuple[Tuple[str, ...], Set[Definition], ScopeIndex]:
+    source, path = item
+    return (path, *parse_source(source, path))
 
 
 class Parser:
@@ -77,14 +103,65 @@ class Parser:
         :param path: Origin of source text.
         """
 
-        tree = ast.parse(source, filename=path[-1])
+        self._merge(path, *parse_source(source, path))
 
-        # init path line scopes of the given path
-        self._path_line_scopes[path] = dict()
+    def consume_many(
+        self, sources: Iterable[Tuple[str, Tuple[str, ...]]], jobs: int = 1
+    ):
+        """
+        Consume many texts, parsing them in parallel worker processes.
+
+        The result is the same as consuming each text in order. Sources can be
+        a lazy iterator, workers start parsing while it is still being consumed.
+
+        :param sources: Text to consume, and its origin, of each source.
+        :param jobs: Amount of worker processes to parse with.
+        """
+
+        sources = iter(sources)
+        head = list(itertools.islice(sources, MIN_PARALLEL_SOURCES))
+
+        if jobs <= 1 or len(head) < MIN_PARALLEL_SOURCES:
+            for source, path in itertools.chain(head, sources):
+                self.consume(source, path)
+            return
+
+        # multiprocessing is slow to import, small projects don't need it
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(jobs) as executor:
+            results = executor.map(
+                _parse_source_item,
+                itertools.chain(head, sources),
+                chunksize=PARSE_CHUNK_SIZE,
+            )
+            for path, definitions, scope_index in results:
+                self._merge(path, definitions, scope_index)
 
-        visitor = Visitor(self._definitions, self._path_line_scopes[path], path)
+    def _merge(
+        self,
+        path: Tuple[str, ...],
+        definitions: Set[Definition],
+        scope_index: ScopeIndex,
+    ):
+        # consuming a path again replaces what was consumed from it
+        if path in self._path_line_scopes:
+            self.remove(path)
+
+        self._definitions.update(definitions)
+        self._path_line_scopes[path] = scope_index
 
-        visitor.visit(tree)
+    def remove(self, path: Tuple[str, ...]):
+        """
+        Remove everything consumed from target path.
+
+        :param path: Origin of consumed source text.
+        """
+
+        self._definitions.difference_update(
+            [d for d in self._definitions if d.path == path]
+        )
+        del self._path_line_scopes[path]
 
     @property
     def definitions(self):
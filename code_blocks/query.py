@@ -0,0 +1,238 @@
+"""Query a graph exported by `main.py --export graph.npz`, without an LSP server.
+
+Usage:
+    python -m code_blocks.query graph.npz callers pkg/foo.py:Klass.method
+    python -m code_blocks.query graph.npz callees method --depth 3
+    python -m code_blocks.query graph.npz path main pkg/foo.py:helper
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from code_blocks.csr import csr_neighbors
+from code_blocks.export import GraphArrays, load_npz
+
+
+class GraphQuery:
+    def __init__(self, graph: GraphArrays):
+        """Callers, callees and paths between nodes of an exported graph.
+
+        Queries walk the forward and reverse adjacency indexes of the graph one
+        level at a time, so their cost depends on the nodes they reach, not on
+        the size of the graph.
+
+        Nodes are ids, see `find` to get the ids of a name and `name` for the
+        name of an id.
+
+        Args:
+            graph (GraphArrays): Graph to query.
+        """
+
+        self.graph = graph
+
+    @classmethod
+    def load(cls, path: Path) -> "GraphQuery":
+        """Memory map a graph written by `export_npz` and query it."""
+
+        return cls(load_npz(path))
+
+    def find(self, name: str) -> List[int]:
+        """Get the nodes of a name.
+
+        A qualified name `path:scope` (or a module's `path`) matches a single
+        node, a bare name like `method` or `Klass.method` matches every node
+        whose scope ends with it.
+
+        Args:
+            name (str): Name to find.
+
+        Returns:
+            List[int]: Ids of the matching nodes, sorted.
+        """
+
+        graph = self.graph
+        path_offsets = graph.arrays["path_offsets"]
+
+        path, sep, scope = name.partition(":")
+        for path_id in range(len(path_offsets) - 1):
+            if graph.path(path_id) != path:
+                continue
+
+            (candidates,) = np.nonzero(graph.node_path == path_id)
+            node_ids = [int(i) for i in candidates]
+            return [i for i in node_ids if graph.node_scope(i) == scope]
+
+        if sep:
+            return []
+
+        # search the scope table in one piece, then map matches back to nodes
+        offsets = graph.arrays["node_scope_offsets"]
+        data = graph.arrays["node_scope_bytes"].tobytes()
+        needle = name.encode()
+
+        matches: List[int] = []
+        # a lookahead finds overlapping matches too
+        for match in re.finditer(b"(?=" + re.escape(needle) + b")", data):
+            start = match.start()
+            end = start + len(needle)
+            node_id = int(np.searchsorted(offsets, start, side="right")) - 1
+
+            # the match must be the whole scope, or its last dotted parts
+            if end == offsets[node_id + 1] and (
+                start == offsets[node_id] or data[start - 1 : start] == b"."
+            ):
+                matches.append(node_id)
+
+        return matches
+
+    def name(self, node_id: int) -> str:
+        return self.graph.node_name(node_id)
+
+    def _adjacency(self, reverse: bool):
+        graph = self.graph
+        if reverse:
+            return graph.in_indptr, graph.in_indices
+        return graph.out_indptr, graph.out_indices
+
+    def closure(
+        self, nodes: List[int], depth: Optional[int] = None, reverse: bool = False
+    ) -> Dict[int, int]:
+        """Get the nodes reachable from some nodes, and their distance.
+
+        Args:
+            nodes (List[int]): Nodes to start from, at distance 0 (they are only
+                included in the result if they are reachable from a node).
+            depth (Optional[int]): Maximal distance, unlimited if None.
+            reverse (bool): Follow edges backwards, i.e. get callers instead of
+                callees.
+
+        Returns:
+            Dict[int, int]: Distance of each reachable node, by node id.
+        """
+
+        indptr, indices = self._adjacency(reverse)
+
+        distances: Dict[int, int] = dict()
+        visited = np.zeros(len(self.graph), dtype=bool)
+
+        frontier = np.unique(np.asarray(nodes, dtype=np.int64))
+        visited[frontier] = True
+
+        level = 0
+        while len(frontier) > 0 and (depth is None or level < depth):
+            level += 1
+
+            neighbors, _ = csr_neighbors(indptr, indices, frontier)
+            neighbors = np.unique(neighbors)
+
+            # start nodes that are reached again are part of the result too
+            for node_id in neighbors[np.isin(neighbors, nodes)]:
+                distances.setdefault(int(node_id), level)
+
+            frontier = neighbors[~visited[neighbors]]
+            visited[frontier] = True
+
+            for node_id in frontier:
+                distances[int(node_id)] = level
+
+        return distances
+
+    def callees(self, nodes: List[int], depth: Optional[int] = 1) -> Dict[int, int]:
+        """Get the nodes referenced by some nodes, see `closure`."""
+
+        return self.closure(nodes, depth)
+
+    def callers(self, nodes: List[int], depth: Optional[int] = 1) -> Dict[int, int]:
+        """Get the nodes referencing some nodes, see `closure`."""
+
+        return self.closure(nodes, depth, reverse=True)
+
+    def shortest_path(self, src: List[int], dst: List[int]) -> Optional[List[int]]:
+        """Get a shortest path from any source node to any destination node.
+
+        Args:
+            src (List[int]): Nodes the path may start at.
+            dst (List[int]): Nodes the path may end at.
+
+        Returns:
+            Optional[List[int]]: Nodes of the path, from source to destination,
+                None if there isn't one.
+        """
+
+        indptr, indices = self._adjacency(False)
+
+        parents = np.full(len(self.graph), -2, dtype=np.int64)
+        targets = np.zeros(len(self.graph), dtype=bool)
+        targets[np.asarray(dst, dtype=np.int64)] = True
+
+        frontier = np.unique(np.asarray(src, dtype=np.int64))
+        parents[frontier] = -1
+
+        found = frontier[targets[frontier]]
+        while len(found) == 0 and len(frontier) > 0:
+            neighbors, sources = csr_neighbors(indptr, indices, frontier)
+
+            new = parents[neighbors] == -2
+            neighbors, first = np.unique(neighbors[new], return_index=True)
+            parents[neighbors] = sources[new][first]
+
+            frontier = neighbors
+            found = frontier[targets[frontier]]
+
+        if len(found) == 0:
+            return None
+
+        path = [int(found[0])]
+        while parents[path[-1]] != -1:
+            path.append(int(parents[path[-1]]))
+
+        return path[::-1]
+
+
+def _find(query: GraphQuery, name: str) -> List[int]:
+    nodes = query.find(name)
+    if len(nodes) == 0:
+        sys.exit(f"No node named {name}")
+
+    return nodes
+
+
+def main(graph_path: Path, command: str, names: List[str], depth: Optional[int]) -> int:
+    query = GraphQuery.load(graph_path)
+
+    if command == "find":
+        for node_id in _find(query, names[0]):
+            print(query.name(node_id))
+
+    elif command in ("callers", "callees"):
+        nodes = _find(query, names[0])
+        if command == "callers":
+            distances = query.callers(nodes, depth)
+        else:
+            distances = query.callees(nodes, depth)
+
+        for node_id, distance in sorted(
+            distances.items(), key=lambda item: (item[1], query.name(item[0]))
+        ):
+            print(f"{distance}\t{query.name(node_id)}")
+
+    elif command == "path":
+        path = query.shortest_path(_find(query, names[0]), _find(query, names[1]))
+        if path is None:
+            print("No path")
+            return 1
+
+        for node_id in path:
+            print(query.name(node_id))
+
+    return 0
+
+
+if __name__ == "__main__":
+    from code_blocks.cli import main as cli_main
+
+    sys.exit(cli_main(["query", *sys.argv[1:]]))
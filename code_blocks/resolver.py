@@ -1,11 +1,23 @@
+import logging
 import os
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, List, Optional, Set, Tuple, Type
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import unquote, urlparse
 from urllib.request import url2pathname
 
-from sansio_lsp_client import References
+from sansio_lsp_client import References, ResponseError
 from sansio_lsp_client.events import Definition as DefinitionEvent
 from sansio_lsp_client.events import Event
 from sansio_lsp_client.structs import (
@@ -13,11 +25,14 @@ from sansio_lsp_client.structs import (
     TextDocumentIdentifier,
     TextDocumentItem,
     TextDocumentPosition,
+    VersionedTextDocumentIdentifier,
 )
 
 from code_blocks.lsp_client import LspClient
 from code_blocks.types import Definition, PathLineScopes, Reference, ResolvedReference
 
+logger = logging.getLogger(__name__)
+
 
 def uri_to_path(uri: str) -> Path:
     parsed = urlparse(uri)
@@ -28,23 +43,92 @@ def uri_to_path(uri: str) -> Path:
 
 
 class Resolver:
-    def __init__(self, lsp_client: LspClient, root_uri: str):
+    def __init__(self, lsp_client: LspClient, root_uri: str, max_in_flight: int = 1):
+        """
+        Args:
+            lsp_client (LspClient): Client of the LSP server to resolve with.
+            root_uri (str): Uri of the project root.
+            max_in_flight (int): How many references requests to keep sent to
+                the LSP server at once, 1 to wait for each response before
+                sending the next request.
+        """
+
+        assert max_in_flight >= 1, "Must allow at least one request in flight"
+
         self._lsp_client = lsp_client
         self._root_uri = root_uri
         self._root_path = uri_to_path(self._root_uri)
+        self._max_in_flight = max_in_flight
+
+        # relative path of each location uri, so references share path tuples
+        self._uri_paths: Dict[str, Optional[Tuple[str, ...]]] = dict()
+
+    def _relative_path(self, uri: str) -> Optional[Tuple[str, ...]]:
+        try:
+            return uri_to_path(uri).relative_to(self._root_path).parts
+        except ValueError:
+            return None
 
     def consume(self, source: str, path: Tuple[str, ...]):
 
+        # notify LSP we opened the file
+        self._lsp_client.notify_open(self.text_document_item(source, path))
+
+    def consume_many(self, sources: Iterable[Tuple[str, Tuple[str, ...]]]):
+        """Consume many files at once, without waiting for each of them.
+
+        Args:
+            sources (Iterable[Tuple[str, Tuple[str, ...]]]): Source and path of
+                each file.
+        """
+
+        # notify LSP we opened the files
+        self._lsp_client.notify_open_many(
+            self.text_document_item(source, path) for source, path in sources
+        )
+
+    def text_document_item(
+        self, source: str, path: Tuple[str, ...]
+    ) -> TextDocumentItem:
+
         # convert reference relative path to full path uri
         path_uri = f"{self._root_uri}/{os.path.sep.join(path)}"
 
         # create LSP objects pointing to reference file and position
-        text_document_item = TextDocumentItem(
+        return TextDocumentItem(
             uri=path_uri, languageId="python", version=1, text=source
         )
 
-        # notify LSP we opened the file
-        self._lsp_client.notify_open(text_document_item)
+    def consume_change(self, source: str, path: Tuple[str, ...], version: int):
+        """Consume the new source of an already consumed file.
+
+        Args:
+            source (str): New source of the file.
+            path (Tuple[str, ...]): Path of the file.
+            version (int): Version of the new source, must increase with every
+                change of the file.
+        """
+
+        # convert reference relative path to full path uri
+        path_uri = f"{self._root_uri}/{os.path.sep.join(path)}"
+
+        # notify LSP the file changed
+        self._lsp_client.notify_change(
+            VersionedTextDocumentIdentifier(uri=path_uri, version=version), source
+        )
+
+    def forget(self, path: Tuple[str, ...]):
+        """Forget a consumed file, e.g. once it is deleted.
+
+        Args:
+            path (Tuple[str, ...]): Path of the file.
+        """
+
+        # convert reference relative path to full path uri
+        path_uri = f"{self._root_uri}/{os.path.sep.join(path)}"
+
+        # notify LSP we closed the file
+        self._lsp_client.notify_close(TextDocumentIdentifier(uri=path_uri))
 
     def resolve_definitions(
         self, definitions: Set[Definition], path_line_scopes: PathLineScopes
@@ -58,15 +142,55 @@ class Resolver:
             Set[ResolvedReference]: All references to the given definitions.
         """
 
-        resolved_references: Set[ResolvedReference] = set()
+        return set(self.iter_resolved_references(definitions, path_line_scopes))
 
-        for definition in definitions:
-            references = self.get_definition_resolved_references(
-                definition, path_line_scopes
-            )
-            resolved_references = resolved_references.union(references)
+    def iter_resolved_references(
+        self, definitions: Iterable[Definition], path_line_scopes: PathLineScopes
+    ) -> Iterator[ResolvedReference]:
+        """Lazily get all references to all given definitions.
 
-        return resolved_references
+        Args:
+            definitions (Iterable[Definition]): Definitions to get references of.
+
+        Yields:
+            ResolvedReference: Each reference, as soon as the LSP server answered
+                the request of its definition.
+        """
+
+        for _, resolved_references in self.iter_definitions_resolved_references(
+            definitions, path_line_scopes
+        ):
+            if resolved_references is not None:
+                yield from resolved_references
+
+    def iter_definitions_resolved_references(
+        self, definitions: Iterable[Definition], path_line_scopes: PathLineScopes
+    ) -> Iterator[Tuple[Definition, Optional[Set[ResolvedReference]]]]:
+        """Lazily get the references of each given definition.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions to get references of.
+
+        Yields:
+            Tuple[Definition, Optional[Set[ResolvedReference]]]: Each definition
+                and all of its references, including definitions without
+                references. None if the LSP server failed the request, which
+                isn't the same as having no references.
+        """
+
+        for definition, references in self.pipeline_definitions_references(definitions):
+            if isinstance(references, ResponseError):
+                logger.warning(
+                    "Failed getting references of %s: %s",
+                    definition,
+                    references.message,
+                )
+                yield definition, None
+                continue
+
+            yield definition, self.resolve_references(
+                definition, references, path_line_scopes
+            )
 
     def get_definition_resolved_references(
         self, definition: Definition, path_line_scopes: PathLineScopes
@@ -75,6 +199,15 @@ class Resolver:
         # get reference locations from LSP
         references: References = self.get_definition_references(definition)
 
+        return self.resolve_references(definition, references, path_line_scopes)
+
+    def resolve_references(
+        self,
+        definition: Definition,
+        references: References,
+        path_line_scopes: PathLineScopes,
+    ) -> Set[ResolvedReference]:
+
         # return an empty set if no references were found
         if references.result is None:
             return set()
@@ -83,31 +216,83 @@ class Resolver:
         resolved_references = set()
         for reference_location in references.result:
 
-            # get location path relative to root path
-            location_path = uri_to_path(reference_location.uri)
-            relative_path = location_path.relative_to(self._root_path)
+            # get location path relative to root path, None outside of it
+            if reference_location.uri in self._uri_paths:
+                relative_path = self._uri_paths[reference_location.uri]
+            else:
+                relative_path = self._relative_path(reference_location.uri)
+                self._uri_paths[reference_location.uri] = relative_path
+
+            # skip references in files that weren't scanned (ignored, excluded,
+            # outside of the project), there is no scope to attribute them to
+            if relative_path is None or relative_path not in path_line_scopes:
+                continue
 
             # get reference position
             row = reference_location.range.start.line + 1
             col = reference_location.range.start.character
 
             # make sure the reference isn't the definition itself
-            if relative_path.parts == definition.path:
+            if relative_path == definition.path:
                 if row == definition.row and col == definition.col:
                     continue
 
             # get reference scope
-            scope = path_line_scopes[relative_path.parts][row]
+            scope = path_line_scopes[relative_path][row]
 
             # build resolved reference to the definition
-            reference = Reference(row, scope, relative_path.parts)
+            reference = Reference(row, scope, relative_path)
             resolved_reference = ResolvedReference(reference, definition)
 
             resolved_references.add(resolved_reference)
 
         return resolved_references
 
-    def get_definition_references(self, definition: Definition) -> References:
+    def pipeline_definitions_references(
+        self, definitions: Iterable[Definition]
+    ) -> Iterator[Tuple[Definition, Union[References, ResponseError]]]:
+        """Get references of definitions, keeping several requests in flight.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions to get references of.
+
+        Yields:
+            Tuple[Definition, Union[References, ResponseError]]: Definition, and
+                its references or the error the LSP server failed the request
+                with, in the order the LSP server answered.
+        """
+
+        definitions_iter = iter(definitions)
+        in_flight: Dict[int, Definition] = dict()
+
+        while True:
+
+            # top up requests in flight
+            while len(in_flight) < self._max_in_flight:
+                definition = next(definitions_iter, None)
+                if definition is None:
+                    break
+
+                request_id = self._lsp_client.send_references(
+                    self.definition_text_document_position(definition)
+                )
+                in_flight[request_id] = definition
+
+            # all definitions were answered
+            if len(in_flight) == 0:
+                break
+
+            request_id, references = self._lsp_client.await_references()
+
+            # a response to a request of an earlier, abandoned pipeline
+            if request_id not in in_flight:
+                continue
+
+            yield in_flight.pop(request_id), references
+
+    def definition_text_document_position(
+        self, definition: Definition
+    ) -> TextDocumentPosition:
 
         # convert reference relative path to full path uri
         path_uri = f"{self._root_uri}/{os.path.sep.join(definition.path)}"
@@ -119,13 +304,15 @@ class Resolver:
         position = Position(line=definition.row - 1, character=definition.col)
 
         # get text document position of reference
-        text_document_position = TextDocumentPosition(
+        return TextDocumentPosition(
             textDocument=text_document_identifier, position=position
         )
 
+    def get_definition_references(self, definition: Definition) -> References:
+
         # request definition of reference
         references: References = self._lsp_client.request_references(
-            text_document_position
+            self.definition_text_document_position(definition)
         )
 
         return references
@@ -0,0 +1,218 @@
+import queue
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Queue
+from threading import Event
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from code_blocks.lsp_client import LspClient
+from code_blocks.lsp_server import LspServer
+from code_blocks.resolver import Resolver
+from code_blocks.types import Definition, PathLineScopes, ResolvedReference
+
+# resolved definitions buffered between the resolver threads and the consumer
+RESULTS_QUEUE_SIZE = 1024
+
+# how often a resolver thread blocked on a full queue checks if it should stop
+RESULTS_PUT_INTERVAL = 0.5
+
+
+def shard_definitions_by_file(
+    definitions: Iterable[Definition], shards: int
+) -> List[Set[Definition]]:
+    """Split definitions to shards, keeping all definitions of a file together.
+
+    Files are assigned largest first to the shard with the least definitions,
+    so shards end up with about the same amount of definitions.
+
+    Args:
+        definitions (Iterable[Definition]): Definitions to split.
+        shards (int): Amount of shards.
+
+    Returns:
+        List[Set[Definition]]: Definitions of each shard.
+    """
+
+    path_definitions: Dict[Tuple[str, ...], Set[Definition]] = defaultdict(set)
+    for definition in definitions:
+        path_definitions[definition.path].add(definition)
+
+    sharded_definitions: List[Set[Definition]] = [set() for _ in range(shards)]
+    for path in sorted(path_definitions, key=lambda p: (-len(path_definitions[p]), p)):
+        smallest_shard = min(sharded_definitions, key=len)
+        smallest_shard.update(path_definitions[path])
+
+    return sharded_definitions
+
+
+class ResolverPool:
+    def __init__(self, root_dir: Path, jobs: int = 1, max_in_flight: int = 1):
+        """Resolve definitions with a pool of LSP servers on the same project.
+
+        Every server opens every file, so it can find references anywhere in
+        the project, but only resolves its share of the definitions.
+
+        Args:
+            root_dir (Path): Project root.
+            jobs (int): Amount of LSP servers to run.
+            max_in_flight (int): How many references requests to keep sent to
+                each LSP server at once.
+        """
+
+        assert jobs >= 1, "Must run at least one LSP server"
+
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+
+        # start servers concurrently, each takes a while to initialize
+        self._lsp_servers: List[LspServer] = list(
+            self._executor.map(lambda _: LspServer(str(root_dir)), range(jobs))
+        )
+        self._lsp_clients: List[LspClient] = list(
+            self._executor.map(LspClient, self._lsp_servers)
+        )
+        self._resolvers = [
+            Resolver(lsp_client, root_dir.as_uri(), max_in_flight)
+            for lsp_client in self._lsp_clients
+        ]
+
+    def consume(self, source: str, path: Tuple[str, ...]):
+        list(
+            self._executor.map(
+                lambda resolver: resolver.consume(source, path), self._resolvers
+            )
+        )
+
+    def consume_many(self, sources: Iterable[Tuple[str, Tuple[str, ...]]]):
+        sources = list(sources)
+
+        list(
+            self._executor.map(
+                lambda resolver: resolver.consume_many(sources), self._resolvers
+            )
+        )
+
+    def consume_change(self, source: str, path: Tuple[str, ...], version: int):
+        for resolver in self._resolvers:
+            resolver.consume_change(source, path, version)
+
+    def forget(self, path: Tuple[str, ...]):
+        for resolver in self._resolvers:
+            resolver.forget(path)
+
+    def resolve_definitions(
+        self, definitions: Set[Definition], path_line_scopes: PathLineScopes
+    ) -> Set[ResolvedReference]:
+        """Get all references to all given definitions, using all LSP servers.
+
+        Args:
+            definitions (Set[Definition]): Definitions to get references of.
+
+        Returns:
+            Set[ResolvedReference]: All references to the given definitions.
+        """
+
+        return set(self.iter_resolved_references(definitions, path_line_scopes))
+
+    def iter_resolved_references(
+        self, definitions: Iterable[Definition], path_line_scopes: PathLineScopes
+    ) -> Iterator[ResolvedReference]:
+        """Lazily get all references to all given definitions.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions to get references of.
+
+        Yields:
+            ResolvedReference: Each reference, as soon as any LSP server answered
+                the request of its definition.
+        """
+
+        for _, resolved_references in self.iter_definitions_resolved_references(
+            definitions, path_line_scopes
+        ):
+            if resolved_references is not None:
+                yield from resolved_references
+
+    def iter_definitions_resolved_references(
+        self, definitions: Iterable[Definition], path_line_scopes: PathLineScopes
+    ) -> Iterator[Tuple[Definition, Optional[Set[ResolvedReference]]]]:
+        """Lazily get the references of each given definition, using all servers.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions to get references of.
+
+        Yields:
+            Tuple[Definition, Optional[Set[ResolvedReference]]]: Each definition
+                and all of its references, in the order the LSP servers
+                answered. None if a server failed the request, see
+                `Resolver.iter_definitions_resolved_references`.
+        """
+
+        if len(self._resolvers) == 1:
+            yield from self._resolvers[0].iter_definitions_resolved_references(
+                definitions, path_line_scopes
+            )
+            return
+
+        sharded_definitions = shard_definitions_by_file(
+            definitions, len(self._resolvers)
+        )
+
+        # bounded, so resolvers wait for a slow consumer instead of piling up
+        results: "Queue[Tuple[bool, Any]]" = Queue(maxsize=RESULTS_QUEUE_SIZE)
+        closed = Event()
+
+        def put(result: Tuple[bool, Any]) -> bool:
+            while not closed.is_set():
+                try:
+                    results.put(result, timeout=RESULTS_PUT_INTERVAL)
+                    return True
+                except queue.Full:
+                    pass
+
+            return False
+
+        def resolve_shard(resolver: Resolver, shard: Set[Definition]):
+            try:
+                for item in resolver.iter_definitions_resolved_references(
+                    shard, path_line_scopes
+                ):
+                    if not put((False, item)):
+                        return
+
+                put((True, None))
+            except BaseException as e:
+                put((True, e))
+
+        futures = [
+            self._executor.submit(resolve_shard, resolver, shard)
+            for resolver, shard in zip(self._resolvers, sharded_definitions)
+        ]
+
+        try:
+            running = len(futures)
+            while running > 0:
+                done, result = results.get()
+                if not done:
+                    yield result
+                    continue
+
+                running -= 1
+                if result is not None:
+                    raise result
+        finally:
+            # stop resolvers early if the consumer stopped iterating
+            closed.set()
+            for future in futures:
+                future.result()
+
+    def stop(self):
+        """Stop all LSP clients and servers."""
+
+        for lsp_client in self._lsp_clients:
+            lsp_client.stop()
+
+        for lsp_server in self._lsp_servers:
+            lsp_server.stop()
+
+        self._executor.shutdown()
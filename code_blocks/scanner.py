@@ -0,0 +1,287 @@
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import AbstractSet, Iterator, List, Optional, Sequence, Tuple
+
+# directories that never hold project sources, pruned without looking inside
+DEFAULT_EXCLUDED_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".venv",
+        "venv",
+        ".tox",
+        ".nox",
+        ".eggs",
+        ".mypy_cache",
+        ".pytest_cache",
+        "__pycache__",
+        "node_modules",
+        "site-packages",
+    }
+)
+
+# build outputs, only pruned at the project root since a package nested deeper
+# may well be named like them
+DEFAULT_ROOT_EXCLUDED_DIRS = frozenset({"build", "dist"})
+
+GITIGNORE = ".gitignore"
+
+
+def _glob_to_regex(pattern: str) -> str:
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                regex += pattern[i : end + 1].replace("[!", "[^", 1)
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+
+    return regex
+
+
+class GitIgnore:
+    def __init__(self, base: str, lines: Sequence[str]):
+        """Patterns of a single `.gitignore` file.
+
+        Supports comments, negation, directory-only patterns, anchored patterns
+        and `**`. Patterns match paths relative to the directory of the file.
+
+        Args:
+            base (str): Posix path of the `.gitignore` directory, relative to the
+                project root, "" for the root itself.
+            lines (Sequence[str]): Lines of the `.gitignore` file.
+        """
+
+        self._base = base
+        self._patterns: List[Tuple[re.Pattern, bool, bool]] = []
+
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if line == "" or line.startswith("#"):
+                continue
+
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+
+            # patterns with an inner slash are relative to the .gitignore directory
+            anchored = "/" in line
+            line = line.lstrip("/")
+
+            regex = _glob_to_regex(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+
+            self._patterns.append((re.compile(regex + "$"), negate, dir_only))
+
+    @classmethod
+    def read(cls, directory: Path, base: str) -> Optional["GitIgnore"]:
+        try:
+            lines = (directory / GITIGNORE).read_text().splitlines()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+        return cls(base, lines)
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """Check if a path is ignored.
+
+        Args:
+            path (str): Posix path relative to the project root.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            Optional[bool]: Whether the path is ignored, None if no pattern
+                matched it.
+        """
+
+        if self._base != "":
+            if not path.startswith(self._base + "/"):
+                return None
+            path = path[len(self._base) + 1 :]
+
+        ignored = None
+        for regex, negate, dir_only in self._patterns:
+            if dir_only and not is_dir:
+                continue
+
+            if regex.match(path):
+                ignored = not negate
+
+        return ignored
+
+
+class ScanStats:
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.skipped_dirs = 0
+
+    def __str__(self) -> str:
+        return (
+            f"files: {self.files} ({self.bytes} bytes), "
+            f"skipped files: {self.skipped_files} ({self.skipped_bytes} bytes), "
+            f"skipped directories: {self.skipped_dirs}"
+        )
+
+
+class Scanner:
+    def __init__(
+        self,
+        project: Path,
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = (),
+        use_gitignore: bool = True,
+        excluded_dirs: AbstractSet[str] = DEFAULT_EXCLUDED_DIRS,
+        root_excluded_dirs: AbstractSet[str] = DEFAULT_ROOT_EXCLUDED_DIRS,
+    ):
+        """Find the Python files of a project.
+
+        Directories are pruned before descending into them, so ignored trees
+        (virtualenvs, build outputs, vendored code) are never listed.
+
+        Args:
+            project (Path): Project root.
+            include (Sequence[str]): Globs of paths relative to the project root,
+                if given a file must match one of them.
+            exclude (Sequence[str]): Globs of paths relative to the project root
+                to skip, matched against both files and directories.
+            use_gitignore (bool): Skip paths ignored by `.gitignore` files.
+            excluded_dirs (AbstractSet[str]): Directory names to always skip.
+            root_excluded_dirs (AbstractSet[str]): Directory names to skip at the
+                project root only.
+        """
+
+        self._project = project
+        self._include = list(include)
+        self._exclude = list(exclude)
+        self._use_gitignore = use_gitignore
+        self._excluded_dirs = frozenset(excluded_dirs)
+        self._root_excluded_dirs = frozenset(root_excluded_dirs)
+
+        self.stats = ScanStats()
+
+    def _is_excluded(self, path: str, is_dir: bool, gitignores: List[GitIgnore]):
+        if any(fnmatch.fnmatchcase(path, pattern) for pattern in self._exclude):
+            return True
+
+        # the deepest .gitignore that matches decides
+        for gitignore in reversed(gitignores):
+            ignored = gitignore.match(path, is_dir)
+            if ignored is not None:
+                return ignored
+
+        return False
+
+    def _is_included(self, path: str) -> bool:
+        return len(self._include) == 0 or any(
+            fnmatch.fnmatchcase(path, pattern) for pattern in self._include
+        )
+
+    def scan_paths(self) -> Iterator[Tuple[Tuple[str, ...], os.DirEntry]]:
+        """Lazily find the project Python files, in a stable order.
+
+        Returns:
+            Iterator[Tuple[Tuple[str, ...], os.DirEntry]]: Path relative to the
+                project root, and directory entry, of each file.
+        """
+
+        self.stats = ScanStats()
+
+        yield from self._scan_dir(self._project, (), [])
+
+    def _scan_dir(
+        self,
+        directory: Path,
+        relative_dir: Tuple[str, ...],
+        gitignores: List[GitIgnore],
+    ) -> Iterator[Tuple[Tuple[str, ...], os.DirEntry]]:
+        if self._use_gitignore:
+            gitignore = GitIgnore.read(directory, "/".join(relative_dir))
+            if gitignore is not None:
+                gitignores = gitignores + [gitignore]
+
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+
+        excluded_dirs = self._excluded_dirs
+        if len(relative_dir) == 0:
+            excluded_dirs = excluded_dirs | self._root_excluded_dirs
+
+        subdirs = []
+        for entry in entries:
+            relative_path = relative_dir + (entry.name,)
+            posix_path = "/".join(relative_path)
+
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in excluded_dirs or self._is_excluded(
+                    posix_path, True, gitignores
+                ):
+                    self.stats.skipped_dirs += 1
+                else:
+                    subdirs.append((entry, relative_path))
+
+            elif entry.name.endswith(".py") and entry.is_file():
+                if self._is_excluded(
+                    posix_path, False, gitignores
+                ) or not self._is_included(posix_path):
+                    self.stats.skipped_files += 1
+                    self.stats.skipped_bytes += entry.stat().st_size
+                else:
+                    yield relative_path, entry
+
+        for entry, relative_path in subdirs:
+            yield from self._scan_dir(Path(entry.path), relative_path, gitignores)
+
+    def scan(self) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+        """Lazily read the project Python files, in a stable order.
+
+        Files that aren't valid UTF-8 are skipped.
+
+        Returns:
+            Iterator[Tuple[str, Tuple[str, ...]]]: Source, and path relative to
+                the project root, of each file.
+        """
+
+        for relative_path, entry in self.scan_paths():
+            with open(entry.path, "rb") as f:
+                data = f.read()
+
+            try:
+                source = data.decode("utf-8")
+            except UnicodeDecodeError:
+                self.stats.skipped_files += 1
+                self.stats.skipped_bytes += len(data)
+                continue
+
+            self.stats.files += 1
+            self.stats.bytes += len(data)
+
+            yield source, relative_path
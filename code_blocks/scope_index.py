@@ -0,0 +1,101 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+# (first row, last row, scope) of a definition body
+ScopeInterval = Tuple[int, int, Tuple[str, ...]]
+
+
+class ScopeIndex:
+    __slots__ = ("_starts", "_scope_ids", "_scopes")
+
+    def __init__(self, intervals: Iterable[ScopeInterval] = ()):
+        """Scope of every line of a file, stored as sorted disjoint segments.
+
+        Definition bodies nest, so flattening them gives segments where each
+        line belongs to the innermost body containing it. A segment is stored as
+        its first row and the id of its scope, and looked up with a bisect.
+
+        Args:
+            intervals (Iterable[ScopeInterval]): Rows and scope of each
+                definition body, properly nested. Rows outside of all intervals
+                are in the module scope.
+        """
+
+        self._starts = array("i")
+        self._scope_ids = array("i")
+        self._scopes: List[Tuple[str, ...]] = [()]
+
+        scope_ids: Dict[Tuple[str, ...], int] = {(): 0}
+
+        def add_segment(start: int, scope: Tuple[str, ...]):
+            scope_id = scope_ids.setdefault(scope, len(scope_ids))
+            if scope_id == len(self._scopes):
+                self._scopes.append(scope)
+
+            # a later segment starting on the same row replaces the earlier one
+            if len(self._starts) > 0 and self._starts[-1] == start:
+                self._starts.pop()
+                self._scope_ids.pop()
+
+            # merge with the previous segment if it has the same scope
+            if len(self._scope_ids) > 0 and self._scope_ids[-1] == scope_id:
+                return
+
+            self._starts.append(start)
+            self._scope_ids.append(scope_id)
+
+        # outer intervals first, so inner ones are pushed above them
+        stack: List[ScopeInterval] = []
+        for interval in sorted(intervals, key=lambda i: (i[0], -i[1])):
+            start, _, scope = interval
+
+            # close intervals that ended before this one starts
+            while len(stack) > 0 and stack[-1][1] < start:
+                end = stack.pop()[1]
+                add_segment(end + 1, stack[-1][2] if len(stack) > 0 else ())
+
+            add_segment(start, scope)
+            stack.append(interval)
+
+        while len(stack) > 0:
+            end = stack.pop()[1]
+            add_segment(end + 1, stack[-1][2] if len(stack) > 0 else ())
+
+    def __getitem__(self, row: int) -> Tuple[str, ...]:
+        i = bisect_right(self._starts, row) - 1
+        if i < 0:
+            return ()
+
+        return self._scopes[self._scope_ids[i]]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def segments(self) -> List[Tuple[int, Tuple[str, ...]]]:
+        """Get the first row and scope of each segment.
+
+        Returns:
+            List[Tuple[int, Tuple[str, ...]]]: Segments sorted by first row, a
+                segment ends where the next one starts.
+        """
+
+        return [
+            (start, self._scopes[scope_id])
+            for start, scope_id in zip(self._starts, self._scope_ids)
+        ]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ScopeIndex):
+            return NotImplemented
+
+        return self.segments() == other.segments()
+
+    def __repr__(self) -> str:
+        return f"ScopeIndex({self.segments()})"
+
+    def __getstate__(self):
+        return self._starts, self._scope_ids, self._scopes
+
+    def __setstate__(self, state):
+        self._starts, self._scope_ids, self._scopes = state
@@ -0,0 +1,338 @@
+import ast
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from code_blocks.cache import IDENTIFIER_RE
+from code_blocks.types import Definition, PathLineScopes, Reference, ResolvedReference
+
+FilePath = Tuple[str, ...]
+
+
+class Occurrence(NamedTuple):
+    row: int
+    kind: str
+    # for "import" occurrences, the project file the name is imported from
+    module_path: Optional[FilePath] = None
+
+
+# a plain load of the name, e.g. a call `foo()` or a construction `Foo()`
+LOAD = "load"
+# `from module import name` at module level
+IMPORT = "import"
+# a module level `def name` or `class name`
+DEFINITION = "definition"
+# anything else (attributes, other bindings, strings), only an LSP can resolve it
+OTHER = "other"
+
+DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# `# type: ...` comments, found in the text since parsing them rejects valid
+# code with a type comment where the grammar doesn't expect one
+TYPE_COMMENT_RE = re.compile(r"#\s*type:(.*)")
+
+
+def module_paths(paths: Iterable[FilePath]) -> Dict[str, Optional[FilePath]]:
+    """Map dotted module names to project files.
+
+    Files under a top-level `src` directory are also importable without it.
+    Names shared by more than one file map to None.
+
+    Args:
+        paths (Iterable[FilePath]): Project files.
+
+    Returns:
+        Dict[str, Optional[FilePath]]: File of each module name.
+    """
+
+    modules: Dict[str, Optional[FilePath]] = dict()
+
+    for path in paths:
+        parts = path[:-1] + (path[-1][: -len(".py")],)
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+
+        names = [parts]
+        if len(parts) > 1 and parts[0] == "src":
+            names.append(parts[1:])
+
+        for name in names:
+            module = ".".join(name)
+            modules[module] = None if module in modules else path
+
+    return modules
+
+
+class _OccurrenceVisitor(ast.NodeVisitor):
+    def __init__(
+        self,
+        path: FilePath,
+        names: Set[str],
+        modules: Dict[str, Optional[FilePath]],
+        occurrences: Dict[str, Dict[FilePath, List[Occurrence]]],
+    ):
+        self._path = path
+        self._names = names
+        self._modules = modules
+        self._occurrences = occurrences
+
+        self._depth = 0
+        self._docstrings: Set[int] = set()
+
+    def _add(
+        self, name: str, row: int, kind: str, module_path: Optional[FilePath] = None
+    ):
+        if name in self._names:
+            self._occurrences[name][self._path].append(
+                Occurrence(row, kind, module_path)
+            )
+
+    def _add_text(self, text: str, row: int):
+        # names mentioned in strings may be forward references, leave them to LSP
+        for name in set(IDENTIFIER_RE.findall(text)) & self._names:
+            self._add(name, row, OTHER)
+
+    def add_type_comments(self, source: str):
+        """Mark names in `# type:` comments of a source, like strings."""
+
+        for match in TYPE_COMMENT_RE.finditer(source):
+            row = source.count("\n", 0, match.start()) + 1
+            self._add_text(match.group(1), row)
+
+    def _skip_docstring(self, body: List[ast.stmt]):
+        if (
+            len(body) > 0
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            self._docstrings.add(id(body[0].value))
+
+    def visit_Module(self, node: ast.Module):
+        self._skip_docstring(node.body)
+        self.generic_visit(node)
+
+    def _visit_scope(self, node: ast.AST):
+        self._depth += 1
+        self.generic_visit(node)
+        self._depth -= 1
+
+    def _visit_definition(self, node: ast.AST):
+        assert isinstance(node, DEFINITION_NODES)
+
+        kind = (
+            DEFINITION
+            if self._depth == 0 and not isinstance(node, ast.AsyncFunctionDef)
+            else OTHER
+        )
+        self._add(node.name, node.lineno, kind)
+        self._skip_docstring(node.body)
+        self._visit_scope(node)
+
+    visit_FunctionDef = _visit_definition
+    visit_AsyncFunctionDef = _visit_definition
+    visit_ClassDef = _visit_definition
+    visit_Lambda = _visit_scope
+
+    def visit_Name(self, node: ast.Name):
+        self._add(
+            node.id, node.lineno, LOAD if isinstance(node.ctx, ast.Load) else OTHER
+        )
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self._add(node.attr, node.lineno, OTHER)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.level > 0:
+            package = self._path[: len(self._path) - node.level]
+            module = ".".join(package + ((node.module,) if node.module else ()))
+        else:
+            module = node.module or ""
+
+        module_path = self._modules.get(module)
+
+        for alias in node.names:
+            if alias.asname is None and module_path is not None and self._depth == 0:
+                self._add(alias.name, alias.lineno, IMPORT, module_path)
+            else:
+                self._add(alias.name, alias.lineno, OTHER)
+                if alias.asname is not None:
+                    self._add(alias.asname, alias.lineno, OTHER)
+
+    def visit_alias(self, node: ast.alias):
+        # aliases of plain `import` statements
+        self._add(node.name.split(".")[0], node.lineno, OTHER)
+        if node.asname is not None:
+            self._add(node.asname, node.lineno, OTHER)
+
+    def visit_Constant(self, node: ast.Constant):
+        if isinstance(node.value, str) and id(node) not in self._docstrings:
+            self._add_text(node.value, node.lineno)
+
+    def visit_JoinedStr(self, node: ast.JoinedStr):
+        # literal parts of f-strings are text, only their expressions are code
+        for value in node.values:
+            if isinstance(value, ast.FormattedValue):
+                self.visit(value)
+
+    def generic_visit(self, node: ast.AST):
+        # bindings stored as plain strings: arguments, globals, except handlers,
+        # keyword arguments, match captures
+        row = getattr(node, "lineno", 0)
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, str) and field in ("arg", "name", "rest"):
+                if not isinstance(node, DEFINITION_NODES):
+                    self._add(value, row, OTHER)
+            elif field == "kwd_attrs":
+                for name in value:
+                    self._add(name, row, OTHER)
+            elif field == "names" and isinstance(node, (ast.Global, ast.Nonlocal)):
+                for name in value:
+                    self._add(name, row, OTHER)
+
+        super().generic_visit(node)
+
+
+class StaticResolver:
+    def __init__(
+        self,
+        sources: Iterable[Tuple[str, FilePath]],
+        definitions: Iterable[Definition],
+        path_line_scopes: PathLineScopes,
+    ):
+        """Resolve references of module level definitions from the AST alone.
+
+        A definition is fully resolved only if every occurrence of its name in
+        the project is understood: plain loads in its own file, module level
+        `from module import name` imports of it, and plain loads in the files
+        importing it. Any other occurrence (an attribute with the same name,
+        another binding, an alias, a string) means only an LSP server can tell
+        which occurrences are references, so the definition is left to it.
+
+        Args:
+            sources (Iterable[Tuple[str, FilePath]]): Source and path of each file in
+                the project.
+            definitions (Iterable[Definition]): Definitions of the project.
+            path_line_scopes (PathLineScopes): Scope of each line in the project.
+        """
+
+        self._path_line_scopes = path_line_scopes
+
+        sources = list(sources)
+        names = {d.name for d in definitions if d.scope == ()}
+        modules = module_paths(path for _, path in sources)
+
+        self._occurrences: Dict[str, Dict[FilePath, List[Occurrence]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+
+        for source, path in sources:
+            # skip parsing files that don't mention any definition
+            if names.isdisjoint(IDENTIFIER_RE.findall(source)):
+                continue
+
+            visitor = _OccurrenceVisitor(path, names, modules, self._occurrences)
+            visitor.visit(ast.parse(source, filename=path[-1]))
+            visitor.add_type_comments(source)
+
+    def resolve(
+        self, definition: Definition, complete: bool = True
+    ) -> Optional[Set[ResolvedReference]]:
+        """Resolve references of a definition.
+
+        Args:
+            definition (Definition): Definition to resolve.
+            complete (bool): Only return references that are known to be all the
+                references of the definition. If False, return the references
+                that could be resolved, even if some may be missing.
+
+        Returns:
+            Optional[Set[ResolvedReference]]: References of the definition, None
+                if it can't be fully resolved and `complete` is True.
+        """
+
+        if definition.scope != () and complete:
+            return None
+
+        found_definition = False
+        resolved_references: Set[ResolvedReference] = set()
+
+        for path, occurrences in self._occurrences.get(definition.name, {}).items():
+            imported = any(
+                o.kind == IMPORT and o.module_path == definition.path
+                for o in occurrences
+            )
+
+            for occurrence in occurrences:
+                if occurrence.kind == DEFINITION and path == definition.path:
+                    if occurrence.row == definition.row:
+                        found_definition = True
+                        continue
+
+                elif (
+                    occurrence.kind == IMPORT
+                    and occurrence.module_path == definition.path
+                    and path != definition.path
+                ) or (
+                    occurrence.kind == LOAD
+                    and (path == definition.path or imported)
+                    and definition.scope == ()
+                ):
+                    scope = self._path_line_scopes[path][occurrence.row]
+                    reference = Reference(occurrence.row, scope, path)
+                    resolved_references.add(ResolvedReference(reference, definition))
+                    continue
+
+                if complete:
+                    return None
+
+        if not found_definition and complete:
+            return None
+
+        return resolved_references
+
+    def split(
+        self, definitions: Iterable[Definition]
+    ) -> Tuple[Set[ResolvedReference], Set[Definition]]:
+        """Split definitions to statically resolved and unresolved ones.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions to resolve.
+
+        Returns:
+            Tuple[Set[ResolvedReference], Set[Definition]]: References of the
+                resolved definitions, and the unresolved definitions.
+        """
+
+        resolved_references: Set[ResolvedReference] = set()
+        unresolved_definitions: Set[Definition] = set()
+
+        for definition in definitions:
+            references = self.resolve(definition)
+            if references is None:
+                unresolved_definitions.add(definition)
+            else:
+                resolved_references.update(references)
+
+        return resolved_references, unresolved_definitions
+
+    def resolve_definitions(
+        self, definitions: Iterable[Definition]
+    ) -> Set[ResolvedReference]:
+        """Resolve whatever references can be resolved without an LSP server.
+
+        Args:
+            definitions (Iterable[Definition]): Definitions to resolve.
+
+        Returns:
+            Set[ResolvedReference]: Resolved references, possibly incomplete.
+        """
+
+        resolved_references: Set[ResolvedReference] = set()
+        for definition in definitions:
+            references = self.resolve(definition, complete=False)
+            assert references is not None, "Incomplete resolution always succeeds"
+            resolved_references.update(references)
+
+        return resolved_references
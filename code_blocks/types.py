@@ -1,6 +1,8 @@
 from typing import Dict, NamedTuple, Tuple
 
-PathLineScopes = Dict[Tuple[str, ...], Dict[int, Tuple[str, ...]]]
+from code_blocks.scope_index import ScopeIndex
+
+PathLineScopes = Dict[Tuple[str, ...], ScopeIndex]
 
 
 class Definition(NamedTuple):
@@ -0,0 +1,193 @@
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+from code_blocks.cache import IDENTIFIER_RE
+from code_blocks.graph import CodeGraph
+from code_blocks.parser import Parser
+from code_blocks.resolver_pool import ResolverPool
+from code_blocks.scanner import Scanner
+from code_blocks.types import Definition
+
+logger = logging.getLogger(__name__)
+
+Render = Callable[[Set[Definition], CodeGraph], None]
+
+
+class Watcher:
+    def __init__(
+        self,
+        scanner: Scanner,
+        parser: Parser,
+        resolver: ResolverPool,
+        sources: Iterable[Tuple[str, Tuple[str, ...]]],
+        code_graph: CodeGraph,
+        render: Render,
+    ):
+        """Keep the resolved graph of a project up to date as its files change.
+
+        Args:
+            scanner (Scanner): Scanner that found all the project files.
+            parser (Parser): Parser that consumed all the project files.
+            resolver (ResolverPool): Resolver that consumed all the project files.
+            sources (Iterable[Tuple[str, Tuple[str, ...]]]): Source and path of
+                each consumed file.
+            code_graph (CodeGraph): Graph of the resolved references of all the
+                parser definitions, updated in place.
+            render (Render): Called with the definitions and the graph after
+                every update.
+        """
+
+        self._scanner = scanner
+        self._parser = parser
+        self._resolver = resolver
+        self._sources: Dict[Tuple[str, ...], str] = {p: s for s, p in sources}
+        self._code_graph = code_graph
+        self._render = render
+
+        self._versions: Dict[Tuple[str, ...], int] = {p: 1 for p in self._sources}
+        self._mtimes = self._scan_mtimes()
+
+    @property
+    def code_graph(self) -> CodeGraph:
+        return self._code_graph
+
+    def _scan_mtimes(self) -> Dict[Tuple[str, ...], Tuple[int, str]]:
+        return {
+            relative_path: (entry.stat().st_mtime_ns, entry.path)
+            for relative_path, entry in self._scanner.scan_paths()
+        }
+
+    def poll(self) -> bool:
+        """Update the graph with the files that changed since the last poll.
+
+        Returns:
+            bool: Whether any file changed.
+        """
+
+        mtimes = self._scan_mtimes()
+
+        changed = {p for p, m in mtimes.items() if self._mtimes.get(p) != m}
+        removed = {p for p in self._mtimes if p not in mtimes}
+        self._mtimes = mtimes
+
+        if len(changed) == 0 and len(removed) == 0:
+            return False
+
+        changed_sources = dict()
+        for path in changed:
+            try:
+                with open(mtimes[path][1], encoding="utf-8", newline="") as f:
+                    source = f.read()
+            except (FileNotFoundError, UnicodeDecodeError):
+                continue
+
+            if source != self._sources.get(path):
+                changed_sources[path] = source
+
+        if len(changed_sources) == 0 and len(removed) == 0:
+            return False
+
+        self.update(changed_sources, removed)
+
+        return True
+
+    def update(
+        self, changed_sources: Dict[Tuple[str, ...], str], removed: Set[Tuple[str, ...]]
+    ):
+        """Update the graph with changed, added and removed files.
+
+        Only definitions whose name appears in a changed file, before or after
+        the change, can gain or lose references, so only they are resolved again.
+
+        Args:
+            changed_sources (Dict[Tuple[str, ...], str]): New source of each
+                changed or added file.
+            removed (Set[Tuple[str, ...]]): Removed files.
+        """
+
+        # parse changed files first, so files in the middle of an edit are skipped
+        parsed_sources = dict()
+        for path, source in changed_sources.items():
+            try:
+                self._parser.consume(source, path)
+            except SyntaxError as e:
+                logger.warning("Skipping %s: %s", os.path.sep.join(path), e)
+                continue
+
+            parsed_sources[path] = source
+
+        names: Set[str] = set()
+        for path in list(parsed_sources) + list(removed):
+            names.update(IDENTIFIER_RE.findall(self._sources.get(path, "")))
+
+        for path, source in parsed_sources.items():
+            names.update(IDENTIFIER_RE.findall(source))
+
+            if path in self._sources:
+                self._versions[path] += 1
+                self._resolver.consume_change(source, path, self._versions[path])
+            else:
+                self._versions[path] = 1
+                self._resolver.consume_many([(source, path)])
+
+            self._sources[path] = source
+
+        for path in removed:
+            self._parser.remove(path)
+            self._resolver.forget(path)
+            del self._sources[path]
+            del self._versions[path]
+
+        updated_paths = set(parsed_sources) | removed
+
+        def is_affected(definition: Definition) -> bool:
+            return definition.path in updated_paths or definition.name in names
+
+        # drop references of affected definitions, including removed ones, and
+        # resolve them again
+        code_graph = self._code_graph
+        affected_ids = set()
+        for node_id in range(len(code_graph)):
+            definition = code_graph.node_definition(node_id)
+            if definition is not None and is_affected(definition):
+                affected_ids.add(node_id)
+        code_graph.remove_edges_to(affected_ids)
+
+        affected_definitions = {d for d in self._parser.definitions if is_affected(d)}
+        for (
+            definition,
+            resolved_references,
+        ) in self._resolver.iter_definitions_resolved_references(
+            affected_definitions, self._parser.path_line_scopes
+        ):
+            code_graph.add_definition(definition)
+            # a failed request is logged by the resolver, its edges return with
+            # the next change of its files
+            if resolved_references is not None:
+                code_graph.add_resolved_references(resolved_references)
+
+        logger.info(
+            "Updated files: %d, re-resolved definitions: %d",
+            len(updated_paths),
+            len(affected_definitions),
+        )
+
+        self._render(self._parser.definitions, self._code_graph)
+
+    def watch(self, interval: float = 0.5):
+        """Poll for changes until interrupted.
+
+        Args:
+            interval (float): Seconds between polls.
+        """
+
+        logger.warning("Watching for changes, press Ctrl+C to stop")
+
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
@@ -1,6 +1,14 @@
 from typing import Dict
 import pandas as pd
-from code_blocks.analyzer import get_depths
+from code_blocks.analyzer import (
+    _build_csr_graph,
+    _build_graph,
+    get_depths,
+    get_distance,
+    get_distance_matrix,
+    get_distances,
+    get_node_depth,
+)
 
 
 def assert_expected_depths(src_col: list, dst_col: list, expected: Dict[int, int]):
@@ -50,3 +58,81 @@ def test_get_depths_multiple_connections_per_node_and_loop():
         {1: 0, 2: 0, 3: 1},
     )
 
+
+def test_get_depths_diamond():
+    # a node is below the longest chain of callers above it
+    assert_expected_depths(
+        [1, 1, 2, 3],
+        [2, 4, 3, 4],
+        {1: 0, 2: 1, 3: 2, 4: 3},
+    )
+
+
+def test_get_depths_loop_entered_twice():
+    # the loop 3 <-> 4 is entered at 3 from depth 0, and at 4 from depth 1
+    assert_expected_depths(
+        [1, 1, 2, 3, 4, 4],
+        [3, 2, 4, 4, 3, 5],
+        {1: 0, 2: 1, 3: 1, 4: 2, 5: 3},
+    )
+
+
+def test_get_depths_long_chain():
+    n = 5000
+    assert_expected_depths(
+        list(range(n)),
+        list(range(1, n + 1)),
+        {i: i for i in range(n + 1)},
+    )
+
+
+def test_build_csr_graph():
+    df = pd.DataFrame({"src": ["a", "b", "a", "a"], "dst": ["b", "c", "c", "b"]})
+    graph = _build_csr_graph(df, "src", "dst")
+
+    assert list(graph.labels) == ["a", "b", "c"]
+    assert list(graph.indptr) == [0, 2, 3, 3]
+    assert list(graph.indices) == [1, 2, 2]
+
+    assert _build_graph(df, "src", "dst") == {"a": {"b", "c"}, "b": {"c"}, "c": set()}
+
+
+def test_get_distance():
+    graph = {1: {2, 3}, 2: {4}, 3: {4}, 4: {1}, 5: set()}
+
+    assert get_distance(graph, 1, 4) == 2
+    assert get_distance(graph, 4, 3) == 2
+    assert get_distance(graph, 1, 1) == 0
+    assert get_distance(graph, 1, 5) is None
+    assert get_node_depth(4, graph) == 2
+    assert get_node_depth(3, graph) == 3
+
+
+def test_shortest_paths():
+    df = pd.DataFrame({"src": [1, 1, 2, 3, 4, 6], "dst": [2, 3, 4, 4, 5, 5]})
+    paths = get_distances(df, "src", "dst", [1])
+
+    assert paths.distance(5) == 3
+    assert paths.path(5) in ([1, 2, 4, 5], [1, 3, 4, 5])
+    assert paths.path(1) == [1]
+    assert paths.distance(6) is None
+    assert paths.path(6) is None
+    assert paths.to_series().to_dict() == {1: 0, 2: 1, 3: 1, 4: 2, 5: 3}
+
+    # distances are from the nearest source
+    batch = get_distances(df, "src", "dst", [1, 6])
+    assert batch.to_series().to_dict() == {1: 0, 2: 1, 3: 1, 4: 2, 5: 1, 6: 0}
+    assert batch.path(5) == [6, 5]
+
+    matrix = get_distance_matrix(_build_csr_graph(df, "src", "dst"), [1, 6])
+    assert matrix.loc[1].to_dict() == {1: 0, 2: 1, 3: 1, 4: 2, 5: 3, 6: -1}
+    assert matrix.loc[6].to_dict() == {1: -1, 2: -1, 3: -1, 4: -1, 5: 1, 6: 0}
+
+
+def test_shortest_paths_long_chain():
+    n = 5000
+    df = pd.DataFrame({"src": range(n), "dst": range(1, n + 1)})
+
+    assert get_distances(df, "src", "dst", [0]).path(n) == list(range(n + 1))
+    graph = _build_graph(df, "src", "dst")
+    assert get_distance(graph, 0, n) == n
@@ -0,0 +1,81 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+from sansio_lsp_client.structs import (
+    Position,
+    TextDocumentIdentifier,
+    TextDocumentItem,
+    TextDocumentPosition,
+)
+
+from code_blocks.async_lsp import AsyncLspClient, AsyncLspServer
+
+
+def frame(content: bytes) -> bytes:
+    return f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+
+
+def test_async_server_echo():
+    async def echo():
+        # cat echoes back everything we send, which is enough to exercise transport
+        server = await AsyncLspServer.start(".", command=("cat",))
+        message = frame(b'{"id": 1}')
+
+        await server.send(message[:5])
+        await server.send(message[5:])
+        echoed = await server.read_message()
+
+        await server.stop()
+
+        return echoed, message, await server.read_message()
+
+    echoed, message, after_stop = asyncio.run(echo())
+
+    assert echoed == message
+    assert after_stop is None
+
+
+def test_async_client_concurrent_references():
+    source = """
+def foo():
+    pass
+
+def bar():
+    foo()
+
+foo()
+bar()
+"""
+
+    async def references(root_dir: Path):
+        server = await AsyncLspServer.start(str(root_dir))
+        client = await AsyncLspClient.start(server)
+
+        uri = (root_dir / "foo.py").as_uri()
+        await client.notify_open(
+            TextDocumentItem(uri=uri, languageId="python", version=1, text=source)
+        )
+
+        positions = [
+            TextDocumentPosition(
+                textDocument=TextDocumentIdentifier(uri=uri),
+                position=Position(line=line, character=4),
+            )
+            for line in (1, 4)
+        ]
+        foo_references, bar_references = await client.request_references_many(positions)
+
+        await client.stop()
+        await server.stop()
+
+        return foo_references, bar_references
+
+    with tempfile.TemporaryDirectory(prefix="codeblocks-async-test") as tempdir:
+        root_dir = Path(tempdir).resolve()
+        (root_dir / "foo.py").write_text(source)
+
+        foo_references, bar_references = asyncio.run(references(root_dir))
+
+    assert sorted(r.range.start.line for r in foo_references.result) == [1, 5, 7]
+    assert sorted(r.range.start.line for r in bar_references.result) == [4, 8]
@@ -0,0 +1,98 @@
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from code_blocks import cache as cache_module
+from code_blocks.cache import ReferencesCache
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+FOO_SOURCE = """
+def foo():
+    pass
+"""
+
+BAR_SOURCE = """
+from foo import foo
+
+foo()
+"""
+
+BAZ_SOURCE = """
+def baz():
+    pass
+"""
+
+FOO = Definition(2, 4, (), ("foo.py",), "foo", "function")
+BAZ = Definition(2, 4, (), ("baz.py",), "baz", "function")
+
+FOO_REFERENCES = {
+    ResolvedReference(Reference(2, (), ("bar.py",)), FOO),
+    ResolvedReference(Reference(4, (), ("bar.py",)), FOO),
+}
+
+
+def cache_and_reload(
+    sources: List[Tuple[str, Tuple[str, ...]]],
+    new_sources: List[Tuple[str, Tuple[str, ...]]],
+) -> ReferencesCache:
+    with tempfile.TemporaryDirectory(prefix="codeblocks-cache-test") as tempdir:
+        cache_path = Path(tempdir) / "cache.json"
+
+        cache = ReferencesCache(cache_path, sources)
+        cache.put(FOO, FOO_REFERENCES)
+        cache.put(BAZ, set())
+        cache.save()
+
+        return ReferencesCache(cache_path, new_sources)
+
+
+def test_cache_hit():
+    sources = [(FOO_SOURCE, ("foo.py",)), (BAR_SOURCE, ("bar.py",))]
+    sources.append((BAZ_SOURCE, ("baz.py",)))
+
+    cache = cache_and_reload(sources, sources)
+
+    assert cache.get(FOO) == FOO_REFERENCES
+    assert cache.get(BAZ) == set()
+
+
+def test_cache_invalidated_by_referencing_file():
+    sources = [(FOO_SOURCE, ("foo.py",)), (BAR_SOURCE, ("bar.py",))]
+    sources.append((BAZ_SOURCE, ("baz.py",)))
+
+    new_sources = [(FOO_SOURCE, ("foo.py",)), (BAR_SOURCE + "foo()\n", ("bar.py",))]
+    new_sources.append((BAZ_SOURCE, ("baz.py",)))
+
+    cache = cache_and_reload(sources, new_sources)
+
+    assert cache.get(FOO) is None
+    assert cache.get(BAZ) == set()
+
+
+def test_cache_invalidated_by_new_file():
+    sources = [(FOO_SOURCE, ("foo.py",)), (BAR_SOURCE, ("bar.py",))]
+    sources.append((BAZ_SOURCE, ("baz.py",)))
+
+    new_sources = sources + [("from baz import baz", ("qux.py",))]
+
+    cache = cache_and_reload(sources, new_sources)
+
+    assert cache.get(FOO) == FOO_REFERENCES
+    assert cache.get(BAZ) is None
+
+
+def test_cache_of_other_version_is_dropped(monkeypatch):
+    sources = [(FOO_SOURCE, ("foo.py",)), (BAR_SOURCE, ("bar.py",))]
+
+    with tempfile.TemporaryDirectory(prefix="codeblocks-cache-test") as tempdir:
+        cache_path = Path(tempdir) / "cache.json"
+
+        cache = ReferencesCache(cache_path, sources)
+        cache.put(FOO, FOO_REFERENCES)
+        cache.save()
+
+        monkeypatch.setattr(
+            cache_module, "CACHE_VERSION", cache_module.CACHE_VERSION + 1
+        )
+
+        assert ReferencesCache(cache_path, sources).get(FOO) is None
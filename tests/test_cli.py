@@ -0,0 +1,136 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from code_blocks.cli import build_arg_parser, main
+
+ROOT = Path(__file__).parent.parent
+
+HEAVY_MODULES = ("graphviz", "numpy", "pandas", "sansio_lsp_client")
+
+
+def imported_heavy_modules(code: str) -> list:
+    # a fresh interpreter, modules imported by other tests don't count
+    script = (
+        "import json, sys\n"
+        f"{code}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_is_light():
+    assert imported_heavy_modules("import code_blocks.cli, code_blocks.main") == []
+
+
+def test_scan_and_offline_resolve_are_light(tmp_path):
+    (tmp_path / "a.py").write_text("def f():\n    pass\n\n\nf()\n")
+
+    code = (
+        "from code_blocks.cli import main\n"
+        f"main(['scan', '-p', {str(tmp_path)!r}])\n"
+        f"main(['resolve', '-p', {str(tmp_path)!r}, '--offline'])"
+    )
+    assert imported_heavy_modules(code) == []
+
+
+def test_help(capsys):
+    with pytest.raises(SystemExit) as e:
+        main(["--help"])
+    assert e.value.code == 0
+
+    help_text = capsys.readouterr().out
+    for command in ("scan", "resolve", "render", "query", "metrics"):
+        assert command in help_text
+
+
+def test_query_names_count():
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(["query", "graph.npz", "path", "a", "b"])
+    assert args.names == ["a", "b"]
+
+    with pytest.raises(SystemExit):
+        main(["query", "graph.npz", "path", "a"])
+
+
+def test_shard_needs_output(tmp_path):
+    with pytest.raises(AssertionError):
+        main(["render", "-p", str(tmp_path), "--offline", "--shard"])
+
+
+def test_resolve_export_and_query(tmp_path, capsys):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("def f():\n    pass\n\n\ndef g():\n    f()\n")
+
+    graph = tmp_path / "graph.npz"
+    main(["resolve", "-p", str(project), "--offline", "--export", str(graph)])
+    capsys.readouterr()
+
+    assert main(["query", str(graph), "callers", "f"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["1\ta.py:g"]
+
+
+class FailingResolverPool:
+    stopped = False
+
+    def __init__(self, root_dir, jobs, max_in_flight):
+        pass
+
+    def consume_many(self, sources):
+        pass
+
+    def iter_definitions_resolved_references(self, definitions, path_line_scopes):
+        return iter(())
+
+    def stop(self):
+        FailingResolverPool.stopped = True
+
+
+def test_resolver_pool_is_stopped_on_errors(tmp_path, monkeypatch):
+    import code_blocks.resolver_pool
+
+    monkeypatch.setattr(code_blocks.resolver_pool, "ResolverPool", FailingResolverPool)
+
+    project = tmp_path / "project"
+    project.mkdir()
+    # an attribute call can't be resolved statically, so the pool is started
+    (project / "a.py").write_text("def f(x):\n    x.f()\n")
+
+    graph = tmp_path / "missing" / "graph.npz"
+    with pytest.raises(FileNotFoundError):
+        main(["resolve", "-p", str(project), "--export", str(graph)])
+
+    assert FailingResolverPool.stopped
+
+
+class FailedRequestsResolverPool(FailingResolverPool):
+    def iter_definitions_resolved_references(self, definitions, path_line_scopes):
+        return ((definition, None) for definition in definitions)
+
+
+def test_failed_definitions_are_not_cached(tmp_path, monkeypatch):
+    import code_blocks.resolver_pool
+
+    monkeypatch.setattr(
+        code_blocks.resolver_pool, "ResolverPool", FailedRequestsResolverPool
+    )
+
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("def f(x):\n    x.f()\n")
+
+    cache = tmp_path / "refs.json"
+    main(["resolve", "-p", str(project), "--cache", str(cache)])
+
+    assert json.loads(cache.read_text())["entries"] == {}
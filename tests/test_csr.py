@@ -0,0 +1,19 @@
+import numpy as np
+
+from code_blocks.csr import build_csr, csr_neighbors
+
+
+def test_build_csr():
+    indptr, indices = build_csr(np.array([2, 0, 2]), np.array([1, 2, 0]), 4)
+
+    assert indptr.tolist() == [0, 1, 1, 3, 3]
+    assert indices.tolist() == [2, 1, 0]
+
+
+def test_csr_neighbors():
+    indptr, indices = build_csr(np.array([2, 0, 2]), np.array([1, 2, 0]), 4)
+
+    neighbors, nodes = csr_neighbors(indptr, indices, np.array([2, 1, 0]))
+
+    assert neighbors.tolist() == [1, 0, 2]
+    assert nodes.tolist() == [2, 2, 0]
@@ -0,0 +1,153 @@
+import io
+import json
+
+import pytest
+
+from code_blocks.dot_writer import (
+    aggregate,
+    aggregate_edges,
+    build_tree,
+    shard_graph,
+    write_dot,
+    write_graph,
+    write_json,
+)
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+PATH1 = ("pkg", "foo.py")
+PATH2 = ("pkg", "bar.py")
+PATH3 = ("main.py",)
+
+FUNC = Definition(1, 4, (), PATH1, "func", "function")
+KLASS = Definition(3, 6, (), PATH2, "Klass", "class")
+METHOD = Definition(4, 8, ("Klass",), PATH2, "method", "function")
+OTHER = Definition(6, 8, ("Klass",), PATH2, "other", "function")
+
+DEFINITIONS = {FUNC, KLASS, METHOD, OTHER}
+RESOLVED_REFERENCES = {
+    ResolvedReference(Reference(5, ("Klass", "method"), PATH2), FUNC),
+    ResolvedReference(Reference(7, ("Klass", "other"), PATH2), FUNC),
+    ResolvedReference(Reference(8, ("Klass", "other"), PATH2), METHOD),
+    ResolvedReference(Reference(2, (), PATH3), KLASS),
+    ResolvedReference(Reference(3, (), PATH3), FUNC),
+}
+CODE_GRAPH = CodeGraph.from_resolved(DEFINITIONS, RESOLVED_REFERENCES)
+
+
+def test_aggregate():
+    node = PATH2 + ("Klass", "method")
+
+    assert aggregate(node, PATH2, "function") == node
+    assert aggregate(node, PATH2, "class") == PATH2 + ("Klass",)
+    assert aggregate(node, PATH2, "module") == PATH2
+    assert aggregate(node, PATH2, "package") == ("pkg",)
+    assert aggregate(PATH3, PATH3, "package") == PATH3
+
+    assert aggregate(node, PATH2, "package", [PATH2]) == node
+    assert aggregate(node, PATH2, "package", [PATH1]) == ("pkg",)
+
+    with pytest.raises(AssertionError):
+        aggregate(node, PATH2, "file")
+
+
+def test_build_tree_levels():
+    assert build_tree(DEFINITIONS, CODE_GRAPH, "package") == {
+        "pkg": {},
+        "main.py": {},
+    }
+    assert build_tree(DEFINITIONS, CODE_GRAPH, "class") == {
+        "pkg": {"foo.py": {"func": {}}, "bar.py": {"Klass": {}}},
+        "main.py": {},
+    }
+
+
+def test_aggregate_edges():
+    assert aggregate_edges(CODE_GRAPH, "class") == [
+        (PATH3, PATH2 + ("Klass",), 1),
+        (PATH3, PATH1 + ("func",), 1),
+        (PATH2 + ("Klass",), PATH1 + ("func",), 2),
+    ]
+    assert aggregate_edges(CODE_GRAPH, "package") == [(PATH3, ("pkg",), 2)]
+
+
+def test_write_dot():
+    tree = {"pkg": {"foo.py": {}, 'we"ird.py': {}}, "main.py": {}}
+    edges = [(("main.py",), ("pkg", "foo.py"), 1), (("main.py",), ("pkg",), 4)]
+
+    f = io.StringIO()
+    write_dot(tree, edges, f)
+
+    assert f.getvalue() == (
+        "digraph {\n"
+        "\tgraph [rankdir=LR]\n"
+        '\tsubgraph "cluster_pkg" {\n'
+        '\t\tgraph [label="pkg" rankdir=LR]\n'
+        '\t\t"pkg" [label="pkg"]\n'
+        '\t\t"pkg#foo.py" [label="pkg#foo.py"]\n'
+        '\t\t"pkg#we\\"ird.py" [label="pkg#we\\"ird.py"]\n'
+        "\t}\n"
+        '\t"main.py" [label="main.py"]\n'
+        '\t"main.py" -> "pkg#foo.py"\n'
+        '\t"main.py" -> "pkg" [label=4 penwidth="3.00"]\n'
+        "}\n"
+    )
+
+
+def test_write_dot_urls():
+    f = io.StringIO()
+    write_dot({"pkg": {}, "main.py": {}}, [], f, {"pkg": "shards/pkg.svg"})
+
+    assert '\t"pkg" [label="pkg" URL="shards/pkg.svg"]\n' in f.getvalue()
+    assert '\t"main.py" [label="main.py"]\n' in f.getvalue()
+
+
+def test_shard_graph():
+    tree = build_tree(DEFINITIONS, CODE_GRAPH, "class")
+    edges = aggregate_edges(CODE_GRAPH, "class")
+
+    shards, index_edges = shard_graph(tree, edges)
+
+    assert shards == {
+        "pkg": (
+            {"pkg": {"foo.py": {"func": {}}, "bar.py": {"Klass": {}}}},
+            [(PATH2 + ("Klass",), PATH1 + ("func",), 2)],
+        ),
+        "main.py": ({"main.py": {}}, []),
+    }
+    # both references from main.py to pkg
+    assert index_edges == [(PATH3, ("pkg",), 2)]
+
+
+def test_write_json():
+    tree = {"pkg": {"foo.py": {}}, "main.py": {}}
+    edges = [(("main.py",), ("pkg", "foo.py"), 3)]
+
+    f = io.StringIO()
+    write_json(tree, edges, f)
+
+    assert json.loads(f.getvalue()) == {
+        "nodes": [
+            {"id": "pkg", "parent": None, "cluster": True},
+            {"id": "pkg#foo.py", "parent": "pkg", "cluster": False},
+            {"id": "main.py", "parent": None, "cluster": False},
+        ],
+        "edges": [{"tail": "main.py", "head": "pkg#foo.py", "weight": 3}],
+    }
+
+    f = io.StringIO()
+    write_json({}, [], f)
+    assert json.loads(f.getvalue()) == {"nodes": [], "edges": []}
+
+
+def test_write_graph(tmp_path):
+    write_graph(DEFINITIONS, CODE_GRAPH, tmp_path / "g.json", "module")
+    graph = json.load(open(tmp_path / "g.json"))
+    assert graph["edges"] == [
+        {"tail": "main.py", "head": "pkg#bar.py", "weight": 1},
+        {"tail": "main.py", "head": "pkg#foo.py", "weight": 1},
+        {"tail": "pkg#bar.py", "head": "pkg#foo.py", "weight": 2},
+    ]
+
+    write_graph(DEFINITIONS, CODE_GRAPH, tmp_path / "g.dot", "module")
+    assert open(tmp_path / "g.dot").read().startswith("digraph {\n")
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from code_blocks.export import (
+    GraphArrays,
+    export_npz,
+    export_parquet,
+    graph_columns,
+    load_npz,
+    load_parquet,
+)
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+PATH1 = ("pkg", "foo.py")
+PATH2 = ("bar.py",)
+
+FUNC = Definition(1, 4, (), PATH1, "func", "function")
+KLASS = Definition(3, 6, (), PATH2, "Klass", "class")
+METHOD = Definition(4, 8, ("Klass",), PATH2, "method", "function")
+
+
+def build_graph() -> CodeGraph:
+    return CodeGraph.from_resolved(
+        [FUNC, KLASS, METHOD],
+        [
+            ResolvedReference(Reference(5, ("Klass", "method"), PATH2), FUNC),
+            ResolvedReference(Reference(8, (), PATH2), KLASS),
+        ],
+    )
+
+
+def test_npz_holds_only_the_columns(tmp_path):
+    graph = build_graph()
+    export_npz(graph, tmp_path / "graph.npz")
+
+    with np.load(tmp_path / "graph.npz") as npz:
+        assert sorted(npz.files) == sorted(graph_columns(graph))
+
+
+def test_npz_round_trip(tmp_path):
+    graph = build_graph()
+    export_npz(graph, tmp_path / "graph.npz")
+
+    loaded = load_npz(tmp_path / "graph.npz")
+
+    assert isinstance(loaded.edge_src, np.memmap)
+    assert len(loaded) == len(graph)
+
+    for node_id in range(len(graph)):
+        path = graph.node_path(node_id)
+        assert loaded.path(loaded.node_path[node_id]) == "/".join(path)
+        assert loaded.node_scope(node_id) == ".".join(graph.nodes[node_id][len(path) :])
+
+    method_id = graph.nodes.get(PATH2 + ("Klass", "method"))
+    module_id = graph.nodes.get(PATH2)
+    assert loaded.node_kind_name(method_id) == "function"
+    assert loaded.node_row[method_id] == 4
+    assert loaded.node_kind_name(module_id) == "module"
+    assert loaded.node_row[module_id] == -1
+
+    assert list(zip(loaded.edge_src, loaded.edge_dst)) == list(graph.edges())
+
+
+def test_npz_empty_graph(tmp_path):
+    export_npz(CodeGraph(), tmp_path / "graph.npz")
+
+    loaded = load_npz(tmp_path / "graph.npz")
+
+    assert len(loaded) == 0
+    assert len(loaded.edge_src) == 0
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    graph = build_graph()
+    export_parquet(graph, tmp_path / "graph")
+
+    nodes, edges = load_parquet(tmp_path / "graph")
+
+    klass_id = graph.nodes.get(PATH2 + ("Klass",))
+    klass_row = nodes.to_pylist()[klass_id]
+    assert klass_row == {
+        "id": klass_id,
+        "path": "bar.py",
+        "scope": "Klass",
+        "kind": "class",
+        "row": 3,
+        "col": 6,
+    }
+
+    assert list(zip(edges["src"].to_pylist(), edges["dst"].to_pylist())) == list(
+        graph.edges()
+    )
+
+
+def test_adjacency_built_when_missing():
+    columns = graph_columns(build_graph())
+    arrays = GraphArrays(columns)
+    legacy = GraphArrays(
+        {k: v for k, v in columns.items() if not k.startswith(("out_", "in_"))}
+    )
+
+    for name in ("out_indptr", "out_indices", "in_indptr", "in_indices"):
+        assert np.array_equal(getattr(legacy, name), getattr(arrays, name))
+
+    for node_id in range(len(arrays)):
+        out = arrays.out_indices[
+            arrays.out_indptr[node_id] : arrays.out_indptr[node_id + 1]
+        ]
+        assert list(out) == [
+            d for s, d in zip(arrays.edge_src, arrays.edge_dst) if s == node_id
+        ]
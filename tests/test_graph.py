@@ -0,0 +1,48 @@
+from code_blocks.graph import CodeGraph, Interner
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+
+def test_interner():
+    interner: Interner[tuple] = Interner([("a",)])
+
+    assert interner.intern(("b",)) == 1
+    assert interner.intern(("a",)) == 0
+    assert interner.get(("c",)) == -1
+    assert interner[1] == ("b",)
+    assert len(interner) == 2
+
+    value = ("b",)
+    assert interner.shared(value) is interner[1]
+
+
+def test_code_graph_dedups_edges():
+    path1 = ("foo.py",)
+    path2 = ("bar.py",)
+
+    func = Definition(1, 4, (), path1, "func", "function")
+    klass = Definition(3, 6, (), path2, "Klass", "class")
+    method = Definition(4, 8, ("Klass",), path2, "method", "function")
+
+    resolved_references = [
+        ResolvedReference(Reference(5, ("Klass", "method"), path2), func),
+        ResolvedReference(Reference(6, ("Klass", "method"), path2), func),
+        ResolvedReference(Reference(8, (), path2), klass),
+    ]
+
+    graph = CodeGraph.from_resolved([func, klass, method], resolved_references)
+
+    func_id = graph.nodes.get(path1 + ("func",))
+    klass_id = graph.nodes.get(path2 + ("Klass",))
+    method_id = graph.nodes.get(path2 + ("Klass", "method"))
+    module_id = graph.nodes.get(path2)
+
+    assert len(graph) == 4
+    assert graph.edge_count() == 2
+    assert sorted(graph.edges()) == sorted(
+        [(method_id, func_id), (module_id, klass_id)]
+    )
+
+    assert graph.node_definition(method_id) == method
+    assert graph.node_definition(module_id) is None
+    assert graph.node_path(method_id) == path2
+    assert graph.node_name(method_id) == "bar.py#Klass#method"
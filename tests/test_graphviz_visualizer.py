@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import graphviz
+
+from code_blocks.graphviz_visualizer import GraphvizVisualizer
+from code_blocks.graph import CodeGraph
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+PATH1 = ("pkg", "foo.py")
+PATH2 = ("pkg", "bar.py")
+PATH3 = ("main.py",)
+
+FUNC = Definition(1, 4, (), PATH1, "func", "function")
+KLASS = Definition(3, 6, (), PATH2, "Klass", "class")
+METHOD = Definition(4, 8, ("Klass",), PATH2, "method", "function")
+OTHER = Definition(6, 8, ("Klass",), PATH2, "other", "function")
+
+DEFINITIONS = {FUNC, KLASS, METHOD, OTHER}
+RESOLVED_REFERENCES = {
+    ResolvedReference(Reference(5, ("Klass", "method"), PATH2), FUNC),
+    ResolvedReference(Reference(7, ("Klass", "other"), PATH2), FUNC),
+    ResolvedReference(Reference(8, ("Klass", "other"), PATH2), METHOD),
+    ResolvedReference(Reference(2, (), PATH3), KLASS),
+    ResolvedReference(Reference(3, (), PATH3), FUNC),
+}
+CODE_GRAPH = CodeGraph.from_resolved(DEFINITIONS, RESOLVED_REFERENCES)
+
+
+def render_source(monkeypatch, tmp_path, **kwargs) -> str:
+    rendered = []
+    monkeypatch.setattr(
+        graphviz,
+        "render",
+        lambda engine, format, filepath: rendered.append((engine, format, filepath)),
+    )
+    output = tmp_path / "graph.gv"
+    GraphvizVisualizer().visualize(DEFINITIONS, CODE_GRAPH, output=output, **kwargs)
+
+    assert rendered == [("dot", "svg", output)]
+    return output.read_text()
+
+
+def edges(source: str) -> list:
+    return sorted(line.strip() for line in source.splitlines() if "->" in line)
+
+
+def test_visualize_function_level(monkeypatch, tmp_path):
+    source = render_source(monkeypatch, tmp_path)
+
+    assert edges(source) == [
+        '"main.py" -> "pkg#bar.py#Klass"',
+        '"main.py" -> "pkg#foo.py#func"',
+        '"pkg#bar.py#Klass#method" -> "pkg#foo.py#func"',
+        '"pkg#bar.py#Klass#other" -> "pkg#bar.py#Klass#method"',
+        '"pkg#bar.py#Klass#other" -> "pkg#foo.py#func"',
+    ]
+
+
+def test_visualize_aggregated(monkeypatch, tmp_path):
+    source = render_source(monkeypatch, tmp_path, level="class")
+
+    # Klass.method and Klass.other collapse into Klass, and the edge between
+    # them into nothing
+    assert edges(source) == [
+        '"main.py" -> "pkg#bar.py#Klass"',
+        '"main.py" -> "pkg#foo.py#func"',
+        '"pkg#bar.py#Klass" -> "pkg#foo.py#func" [label=2 penwidth="2.00"]',
+    ]
+    assert "Klass#method" not in source
+
+    source = render_source(
+        monkeypatch, tmp_path, level="module", expand=[PATH2 + ("Klass",)]
+    )
+    assert edges(source) == [
+        '"main.py" -> "pkg#bar.py#Klass"',
+        '"main.py" -> "pkg#foo.py"',
+        '"pkg#bar.py#Klass#method" -> "pkg#foo.py"',
+        '"pkg#bar.py#Klass#other" -> "pkg#bar.py#Klass#method"',
+        '"pkg#bar.py#Klass#other" -> "pkg#foo.py"',
+    ]
+
+
+def test_visualize_sharded(monkeypatch, tmp_path):
+    rendered = []
+
+    # like graphviz < 0.20, which renders next to the DOT file
+    def render(engine, format, filepath):
+        rendered.append(filepath)
+        Path(f"{filepath}.{format}").write_text("")
+        return f"{filepath}.{format}"
+
+    monkeypatch.setattr(graphviz, "render", render)
+    output = tmp_path / "graph"
+
+    index = GraphvizVisualizer().visualize_sharded(
+        DEFINITIONS, CODE_GRAPH, output, level="class"
+    )
+
+    # main.py has nothing more to show than its node in the index
+    assert index == output / "index.svg"
+    assert rendered == [output / "shards" / "pkg.gv", output / "index.gv"]
+    assert sorted(output.glob("**/*.svg")) == [
+        output / "index.svg",
+        output / "shards" / "pkg.svg",
+    ]
+
+    assert edges((output / "shards" / "pkg.gv").read_text()) == [
+        '"pkg#bar.py#Klass" -> "pkg#foo.py#func" [label=2 penwidth="2.00"]',
+    ]
+
+    index_source = (output / "index.gv").read_text()
+    assert edges(index_source) == ['"main.py" -> "pkg" [label=2 penwidth="2.00"]']
+    assert '"pkg" [label="pkg" URL="shards/pkg.svg"]' in index_source
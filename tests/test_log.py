@@ -0,0 +1,69 @@
+import json
+import logging
+
+from code_blocks.cli import main
+from code_blocks.log import configure_logging
+
+logger = logging.getLogger("code_blocks.test")
+
+
+class Unformattable:
+    def __str__(self):
+        raise AssertionError("Formatted a disabled message")
+
+
+def test_disabled_messages_are_not_formatted(capsys):
+    configure_logging()
+
+    logger.debug("%s", Unformattable())
+    logger.info("%s", Unformattable())
+    logger.warning("shown %d", 1)
+
+    assert capsys.readouterr().err == "shown 1\n"
+
+
+def test_verbose(capsys):
+    configure_logging(verbose=True)
+
+    logger.debug("%s", Unformattable())
+    logger.info("progress %d", 1)
+
+    assert capsys.readouterr().err == "progress 1\n"
+
+
+def test_trace(tmp_path, capsys):
+    configure_logging(trace_path=tmp_path / "trace.jsonl")
+
+    logger.debug("message %s", "argument")
+    logger.info("progress")
+    try:
+        raise ValueError("failed")
+    except ValueError:
+        logger.exception("error")
+
+    logging.getLogger("code_blocks").handlers[-1].flush()
+    entries = [json.loads(line) for line in open(tmp_path / "trace.jsonl")]
+
+    assert [(e["level"], e["message"]) for e in entries] == [
+        ("DEBUG", "message argument"),
+        ("INFO", "progress"),
+        ("ERROR", "error"),
+    ]
+    assert entries[0]["logger"] == "code_blocks.test"
+    assert "ValueError: failed" in entries[2]["exception"]
+
+    # only warnings and errors reach the console
+    assert capsys.readouterr().err.startswith("error\n")
+
+    configure_logging()
+
+
+def test_cli_trace(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("def f():\n    pass\n\n\nf()\n")
+
+    main(["resolve", "-p", str(tmp_path), "--offline", "--trace", str(tmp_path / "t")])
+    configure_logging()
+
+    messages = [json.loads(line)["message"] for line in open(tmp_path / "t")]
+    assert "Got definitions: 1" in messages
+    assert capsys.readouterr().err == ""
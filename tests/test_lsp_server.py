@@ -0,0 +1,75 @@
+from typing import List
+
+from code_blocks.lsp_server import LspServer, MessageFramer
+
+
+def frame(content: bytes) -> bytes:
+    return f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+
+
+def feed_all(chunks: List[bytes]) -> List[bytes]:
+    framer = MessageFramer()
+
+    messages = []
+    for chunk in chunks:
+        messages.extend(framer.feed(chunk))
+
+    return messages
+
+
+def test_framer_single_message():
+    message = frame(b'{"jsonrpc": "2.0"}')
+
+    assert feed_all([message]) == [message]
+
+
+def test_framer_many_messages_in_one_chunk():
+    messages = [frame(b"{}"), frame(b'{"id": 1}'), frame(b"[]")]
+
+    assert feed_all([b"".join(messages)]) == messages
+
+
+def test_framer_byte_at_a_time():
+    messages = [frame(b'{"id": 1}'), frame(b'{"id": 2}')]
+    stream = b"".join(messages)
+
+    assert feed_all([stream[i : i + 1] for i in range(len(stream))]) == messages
+
+
+def test_framer_keeps_incomplete_message():
+    message = frame(b'{"result": [1, 2, 3]}')
+    framer = MessageFramer()
+
+    assert framer.feed(message[:-3]) == []
+    assert framer.feed(message[-3:]) == [message]
+
+
+def test_framer_case_insensitive_headers():
+    message = (
+        b"content-length: 2\r\n"
+        b"Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n"
+        b"\r\n"
+        b"{}"
+    )
+
+    assert feed_all([message]) == [message]
+
+
+def test_server_echo():
+    # cat echoes back everything we send, which is enough to exercise transport
+    server = LspServer(".", command=("cat",))
+    message = frame(b'{"id": 1}')
+
+    try:
+        assert server.read_bytes(timeout=0.1) is None
+
+        server.send(message[:5])
+        server.send(message[5:])
+
+        assert server.read_bytes(timeout=5) == message
+
+    finally:
+        server.stop()
+
+    assert server.closed
+    assert server.read_bytes(timeout=5) is None
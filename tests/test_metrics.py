@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from code_blocks.export import GraphArrays, graph_columns
+from code_blocks.graph import CodeGraph
+from code_blocks.metrics import (
+    components,
+    export_metrics,
+    graph_metrics,
+    layer_violations,
+    node_layers,
+    pagerank,
+)
+from code_blocks.types import Definition
+
+CLI = ("pkg", "cli", "main.py")
+CORE = ("pkg", "core", "engine.py")
+UTILS = ("pkg", "utils.py")
+
+
+def build_graph() -> GraphArrays:
+    # run -> start <-> step -> helper, and helper -> run violates the layers
+    graph = CodeGraph()
+    run = graph.add_definition(Definition(1, 4, (), CLI, "run", "function"))
+    start = graph.add_definition(Definition(1, 4, (), CORE, "start", "function"))
+    step = graph.add_definition(Definition(5, 4, (), CORE, "step", "function"))
+    helper = graph.add_definition(Definition(1, 4, (), UTILS, "helper", "function"))
+
+    for src, dst in [(run, start), (start, step), (step, start), (step, helper)]:
+        graph.add_edge(src, dst)
+    graph.add_edge(helper, run)
+
+    return GraphArrays(graph_columns(graph))
+
+
+def test_components():
+    graph = build_graph()
+    component_ids = components(graph)
+
+    # a single cycle through all nodes
+    assert len(set(component_ids)) == 1
+
+    acyclic = CodeGraph()
+    a = acyclic.add_definition(Definition(1, 4, (), UTILS, "a", "function"))
+    b = acyclic.add_definition(Definition(2, 4, (), UTILS, "b", "function"))
+    acyclic.add_edge(a, b)
+
+    component_ids = components(GraphArrays(graph_columns(acyclic)))
+    # components are in reverse topological order
+    assert component_ids[b] < component_ids[a]
+
+
+def test_pagerank():
+    graph = build_graph()
+    rank = pagerank(graph)
+
+    assert np.isclose(rank.sum(), 1)
+    # start is referenced by both run and step
+    assert rank.argmax() == 1
+
+    # ranks don't leak out of nodes without references
+    star = CodeGraph()
+    leaves = [
+        star.add_definition(Definition(i, 4, (), UTILS, f"f{i}", "function"))
+        for i in range(4)
+    ]
+    for leaf in leaves[1:]:
+        star.add_edge(leaf, leaves[0])
+
+    rank = pagerank(GraphArrays(graph_columns(star)))
+    assert np.isclose(rank.sum(), 1)
+    assert rank[0] > rank[1] == rank[2] == rank[3]
+
+
+def test_layers():
+    graph = build_graph()
+    layers = node_layers(graph, ["pkg/cli", "pkg/core/", "pkg/utils.py"])
+
+    assert list(layers) == [0, 1, 1, 2]
+    assert list(node_layers(graph, ["pkg/core"])) == [-1, 0, 0, -1]
+
+    violations = layer_violations(graph, layers)
+    edges = list(zip(graph.edge_src[violations], graph.edge_dst[violations]))
+    assert edges == [(3, 0)]
+
+
+def test_graph_metrics(tmp_path):
+    metrics = graph_metrics(build_graph(), ["pkg/cli", "pkg/core", "pkg/utils.py"])
+
+    assert list(metrics["name"]) == [
+        "pkg/cli/main.py:run",
+        "pkg/core/engine.py:start",
+        "pkg/core/engine.py:step",
+        "pkg/utils.py:helper",
+    ]
+    assert list(metrics["fan_in"]) == [1, 2, 1, 1]
+    assert list(metrics["fan_out"]) == [1, 1, 2, 1]
+    assert list(metrics["component_size"]) == [4, 4, 4, 4]
+    assert list(metrics["layer_violations"]) == [0, 0, 0, 1]
+
+    export_metrics(metrics, tmp_path / "metrics.csv")
+    loaded = pd.read_csv(tmp_path / "metrics.csv", index_col="id")
+    assert list(loaded["fan_in"]) == [1, 2, 1, 1]
@@ -1,6 +1,6 @@
 from typing import Dict, List, Set, Tuple
 
-from code_blocks.parser import Parser
+from code_blocks.parser import MIN_PARALLEL_SOURCES, Parser
 from code_blocks.types import Definition, Reference
 
 
@@ -22,7 +22,10 @@ def assert_got_expected_path_line_scopes_from_sources(
     for source, path in sources:
         p.consume(source, path)
 
-    assert p.path_line_scopes == expected_path_line_scopes
+    assert p.path_line_scopes.keys() == expected_path_line_scopes.keys()
+    for path, expected_line_scopes in expected_path_line_scopes.items():
+        for row, expected_scope in expected_line_scopes.items():
+            assert p.path_line_scopes[path][row] == expected_scope, row
 
 
 def test_function_def_detection():
@@ -104,6 +107,68 @@ class Two:
     assert_got_expected_path_line_scopes_from_sources(sources, expected_line_scopes)
 
 
+def test_line_scope_detection_decorators_and_multiline_expressions():
+    source = """
+@decorator(
+    arg,
+)
+def foo(
+    a=default,
+):
+    x = bar(
+1,
+    )
+
+    @staticmethod
+    def baz(): return qux
+
+    return x
+
+y = foo()
+"""
+
+    path = ("test", "foo.py")
+
+    sources = [(source, path)]
+    expected_line_scopes = {
+        path: {
+            2: (),
+            3: (),
+            5: (),
+            6: (),
+            8: ("foo",),
+            9: ("foo",),
+            10: ("foo",),
+            12: ("foo",),
+            13: ("foo", "baz"),
+            15: ("foo",),
+            17: (),
+        }
+    }
+
+    assert_got_expected_path_line_scopes_from_sources(sources, expected_line_scopes)
+
+
+def test_definition_scope_after_multiline_expression():
+    source = """
+def foo():
+    x = bar(
+1)
+    def baz():
+        pass
+"""
+
+    path = ("foo.py",)
+
+    sources = [(source, path)]
+    expected_definitions = {
+        Definition(2, 4, (), path, "foo", "function"),
+        Definition(5, 8, ("foo",), path, "baz", "function"),
+    }
+
+    assert_got_expected_definitions_from_sources(sources, expected_definitions)
+
+
 def test_definition_eq():
     l1 = Definition(0, 0, ("a", "b"), ("c", "d"), "def", "function")
     l2 = Definition(0, 0, ("a", "b"), ("c", "d"), "def", "function")
@@ -195,3 +260,35 @@ class SecondClass:
     }
 
     assert_got_expected_definitions_from_sources(sources, expected_definitions)
+
+
+def test_consume_again_replaces_path():
+    path = ("foo.py",)
+
+    p = Parser()
+    p.consume("def bar():\n    pass\n", path)
+    p.consume("def baz():\n    pass\n", path)
+
+    assert p.definitions == {Definition(1, 4, (), path, "baz", "function")}
+
+    p.remove(path)
+
+    assert p.definitions == set()
+    assert p.path_line_scopes == dict()
+
+
+def test_consume_many_in_parallel_matches_consume():
+    sources = [
+        (f"class Foo{i}:\n    def bar(self):\n        pass\n", ("pkg", f"foo{i}.py"))
+        for i in range(MIN_PARALLEL_SOURCES)
+    ]
+
+    serial = Parser()
+    for source, path in sources:
+        serial.consume(source, path)
+
+    parallel = Parser()
+    parallel.consume_many(sources, jobs=2)
+
+    assert parallel.definitions == serial.definitions
+    assert parallel.path_line_scopes == serial.path_line_scopes
@@ -0,0 +1,99 @@
+from code_blocks.export import GraphArrays, export_npz, graph_columns
+from code_blocks.graph import CodeGraph
+from code_blocks.query import GraphQuery
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+PATH1 = ("pkg", "foo.py")
+PATH2 = ("bar.py",)
+
+FUNC = Definition(1, 4, (), PATH1, "func", "function")
+HELPER = Definition(3, 4, (), PATH1, "helper", "function")
+KLASS = Definition(3, 6, (), PATH2, "Klass", "class")
+METHOD = Definition(4, 8, ("Klass",), PATH2, "method", "function")
+UNUSED = Definition(9, 4, (), PATH2, "method", "function")
+
+
+def build_query() -> GraphQuery:
+    # bar.py -> Klass, Klass.method -> func -> helper -> func
+    graph = CodeGraph.from_resolved(
+        [FUNC, HELPER, KLASS, METHOD, UNUSED],
+        [
+            ResolvedReference(Reference(8, (), PATH2), KLASS),
+            ResolvedReference(Reference(5, ("Klass", "method"), PATH2), FUNC),
+            ResolvedReference(Reference(2, ("func",), PATH1), HELPER),
+            ResolvedReference(Reference(4, ("helper",), PATH1), FUNC),
+        ],
+    )
+    return GraphQuery(GraphArrays(graph_columns(graph)))
+
+
+def names(query: GraphQuery, distances):
+    return {query.name(node_id): distance for node_id, distance in distances.items()}
+
+
+def test_find():
+    query = build_query()
+
+    assert [query.name(n) for n in query.find("bar.py:Klass.method")] == [
+        "bar.py:Klass.method"
+    ]
+    assert [query.name(n) for n in query.find("bar.py")] == ["bar.py"]
+    assert sorted(query.name(n) for n in query.find("method")) == [
+        "bar.py:Klass.method",
+        "bar.py:method",
+    ]
+    assert [query.name(n) for n in query.find("Klass.method")] == [
+        "bar.py:Klass.method"
+    ]
+    assert query.find("ethod") == []
+    assert query.find("bar.py:missing") == []
+    assert query.find("missing.py:func") == []
+
+
+def test_callers_callees():
+    query = build_query()
+    func = query.find("pkg/foo.py:func")
+
+    assert names(query, query.callers(func)) == {
+        "bar.py:Klass.method": 1,
+        "pkg/foo.py:helper": 1,
+    }
+    assert names(query, query.callees(func)) == {"pkg/foo.py:helper": 1}
+
+    # func is reachable from itself through helper
+    assert names(query, query.callees(func, depth=None)) == {
+        "pkg/foo.py:helper": 1,
+        "pkg/foo.py:func": 2,
+    }
+    assert names(query, query.callees(query.find("bar.py"), depth=None)) == {
+        "bar.py:Klass": 1
+    }
+    assert query.callers(query.find("bar.py")) == {}
+
+
+def test_shortest_path():
+    query = build_query()
+
+    path = query.shortest_path(
+        query.find("Klass.method"), query.find("pkg/foo.py:helper")
+    )
+    assert [query.name(n) for n in path] == [
+        "bar.py:Klass.method",
+        "pkg/foo.py:func",
+        "pkg/foo.py:helper",
+    ]
+
+    func = query.find("pkg/foo.py:func")
+    assert query.shortest_path(func, func) == func
+    assert query.shortest_path(func, query.find("bar.py:Klass")) is None
+
+
+def test_load(tmp_path):
+    graph = CodeGraph.from_resolved(
+        [FUNC, HELPER], [ResolvedReference(Reference(2, ("func",), PATH1), HELPER)]
+    )
+    export_npz(graph, tmp_path / "graph.npz")
+
+    query = GraphQuery.load(tmp_path / "graph.npz")
+
+    assert names(query, query.callees(query.find("func"))) == {"pkg/foo.py:helper": 1}
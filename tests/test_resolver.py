@@ -6,6 +6,10 @@ import time
 from pathlib import Path
 from typing import List, Set, Tuple
 
+import pytest
+from sansio_lsp_client import References, ResponseError
+from sansio_lsp_client.structs import Location, Position, Range
+
 from code_blocks.lsp_client import LspClient
 from code_blocks.lsp_server import LspServer
 from code_blocks.resolver import Resolver
@@ -43,15 +47,20 @@ def assert_got_expected_resolved_references_from_definitions_and_path_line_scope
     definitions: Set[Definition],
     path_line_scopes: PathLineScopes,
     expected_resolved_references: Set[ResolvedReference],
+    max_in_flight: int = 1,
+    bulk_open: bool = False,
 ):
     test_env = LspTestEnv(sources)
 
     lsp_client = LspClient(test_env.lsp_server)
 
-    resolver = Resolver(lsp_client, test_env.root_uri)
+    resolver = Resolver(lsp_client, test_env.root_uri, max_in_flight)
 
-    for source, path in sources:
-        resolver.consume(source, path)
+    if bulk_open:
+        resolver.consume_many(sources)
+    else:
+        for source, path in sources:
+            resolver.consume(source, path)
 
     try:
         resolved_references = resolver.resolve_definitions(
@@ -140,7 +149,10 @@ foo()
     )
 
 
-def test_resolve_multiple_files_multiple_references():
+@pytest.mark.parametrize("max_in_flight, bulk_open", [(1, False), (3, True)])
+def test_resolve_multiple_files_multiple_references(
+    max_in_flight: int, bulk_open: bool
+):
     source1 = """
 from file_two import func_two
 
@@ -237,7 +249,12 @@ def func_three():
     }
 
     assert_got_expected_resolved_references_from_definitions_and_path_line_scopes(
-        sources, set(definitions), path_line_scopes, expected_resolved_references
+        sources,
+        set(definitions),
+        path_line_scopes,
+        expected_resolved_references,
+        max_in_flight,
+        bulk_open,
     )
 
 
@@ -331,3 +348,48 @@ t.foo()
     assert_got_expected_resolved_references_from_definitions_and_path_line_scopes(
         sources, set(definitions), path_line_scopes, expected_resolved_references
     )
+
+
+def test_resolve_references_skips_files_that_were_not_scanned():
+    path = ("foo.py",)
+    definition = Definition(2, 4, (), path, "foo", "function")
+
+    def location(uri: str) -> Location:
+        position = Position(line=4, character=0)
+        return Location(uri=uri, range=Range(start=position, end=position))
+
+    references = References(
+        result=[
+            location("file:///project/foo.py"),
+            # ignored by the scanner, and outside of the project
+            location("file:///project/build/foo.py"),
+            location("file:///usr/lib/python3/typing.py"),
+        ]
+    )
+
+    resolver = Resolver(None, "file:///project")  # type: ignore
+    resolved_references = resolver.resolve_references(
+        definition, references, {path: {5: ()}}
+    )
+
+    assert resolved_references == {
+        ResolvedReference(Reference(5, (), path), definition)
+    }
+
+
+class FailingLspClient:
+    def send_references(self, text_document_position) -> int:
+        return 1
+
+    def await_references(self):
+        return 1, ResponseError(message_id=1, code=-32603, message="failed")
+
+
+def test_failed_references_request_is_not_empty_references():
+    definition = Definition(2, 4, (), ("foo.py",), "foo", "function")
+
+    resolver = Resolver(FailingLspClient(), "file:///project")  # type: ignore
+
+    assert list(resolver.iter_definitions_resolved_references([definition], {})) == [
+        (definition, None)
+    ]
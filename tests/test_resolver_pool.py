@@ -0,0 +1,143 @@
+import tempfile
+from pathlib import Path
+
+from code_blocks.parser import Parser
+from code_blocks.resolver_pool import ResolverPool, shard_definitions_by_file
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+
+def test_shard_definitions_by_file():
+    path1 = ("foo.py",)
+    path2 = ("bar.py",)
+    path3 = ("baz.py",)
+
+    definitions = {
+        Definition(1, 4, (), path1, "a", "function"),
+        Definition(2, 4, (), path1, "b", "function"),
+        Definition(3, 4, (), path1, "c", "function"),
+        Definition(1, 4, (), path2, "d", "function"),
+        Definition(2, 4, (), path2, "e", "function"),
+        Definition(1, 4, (), path3, "f", "function"),
+    }
+
+    shards = shard_definitions_by_file(definitions, 2)
+
+    assert set().union(*shards) == definitions
+    assert sorted(len(shard) for shard in shards) == [3, 3]
+
+    # definitions of a file stay in the same shard
+    for shard in shards:
+        shard_paths = {d.path for d in shard}
+        for definition in definitions:
+            if definition.path in shard_paths:
+                assert definition in shard
+
+
+def test_shard_definitions_more_shards_than_files():
+    definitions = {Definition(1, 4, (), ("foo.py",), "a", "function")}
+
+    shards = shard_definitions_by_file(definitions, 3)
+
+    assert len(shards) == 3
+    assert sorted(len(shard) for shard in shards) == [0, 0, 1]
+
+
+def test_resolver_pool_merges_shards():
+    source1 = """
+from file_two import func_two
+
+def func_one():
+    func_two()
+"""
+    path1 = ("file_one.py",)
+
+    source2 = """
+def func_two():
+    pass
+"""
+    path2 = ("file_two.py",)
+
+    sources = [(source1, path1), (source2, path2)]
+
+    with tempfile.TemporaryDirectory(prefix="codeblocks-pool-test") as tempdir:
+        root_dir = Path(tempdir).resolve()
+        parser = Parser()
+        for source, path in sources:
+            (root_dir / path[0]).write_text(source)
+            parser.consume(source, path)
+
+        resolver_pool = ResolverPool(root_dir, jobs=2)
+        try:
+            resolver_pool.consume_many(sources)
+
+            resolved_references = resolver_pool.resolve_definitions(
+                parser.definitions, parser.path_line_scopes
+            )
+        finally:
+            resolver_pool.stop()
+
+    func_two = Definition(2, 4, (), path2, "func_two", "function")
+
+    assert resolved_references == {
+        ResolvedReference(Reference(2, (), path1), func_two),
+        ResolvedReference(Reference(5, ("func_one",), path1), func_two),
+    }
+
+
+def test_resolver_pool_streams_definitions():
+    source1 = """
+from file_two import func_two, func_three
+
+def func_one():
+    func_two()
+    func_three()
+"""
+    path1 = ("file_one.py",)
+
+    source2 = """
+def func_two():
+    pass
+
+def func_three():
+    pass
+"""
+    path2 = ("file_two.py",)
+
+    sources = [(source1, path1), (source2, path2)]
+
+    with tempfile.TemporaryDirectory(prefix="codeblocks-pool-test") as tempdir:
+        root_dir = Path(tempdir).resolve()
+        parser = Parser()
+        for source, path in sources:
+            (root_dir / path[0]).write_text(source)
+            parser.consume(source, path)
+
+        resolver_pool = ResolverPool(root_dir, jobs=2)
+        try:
+            resolver_pool.consume_many(sources)
+
+            streamed = dict(
+                resolver_pool.iter_definitions_resolved_references(
+                    parser.definitions, parser.path_line_scopes
+                )
+            )
+
+            # stopping early leaves the pool usable
+            for _ in resolver_pool.iter_resolved_references(
+                parser.definitions, parser.path_line_scopes
+            ):
+                break
+
+            resolved_references = resolver_pool.resolve_definitions(
+                parser.definitions, parser.path_line_scopes
+            )
+        finally:
+            resolver_pool.stop()
+
+    func_one = Definition(4, 4, (), path1, "func_one", "function")
+
+    # every definition is yielded, even without references
+    assert streamed.keys() == parser.definitions
+    assert streamed[func_one] == set()
+    assert set().union(*streamed.values()) == resolved_references
+    assert len(resolved_references) == 4
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from code_blocks.scanner import GitIgnore, Scanner
+
+
+def write_files(root: Path, files: dict):
+    for path, text in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(text)
+
+
+def test_gitignore_match():
+    gitignore = GitIgnore(
+        "", ["# comment", "*.gen.py", "/out", "docs/", "!keep.gen.py"]
+    )
+
+    assert gitignore.match("a/b.gen.py", False)
+    assert gitignore.match("keep.gen.py", False) is False
+    assert gitignore.match("out", True)
+    assert gitignore.match("a/out", True) is None
+    assert gitignore.match("a/docs", True)
+    assert gitignore.match("a/docs", False) is None
+
+
+def test_nested_gitignore_is_relative_to_its_directory():
+    gitignore = GitIgnore("pkg", ["/generated", "**/tmp_*.py"])
+
+    assert gitignore.match("pkg/generated", True)
+    assert gitignore.match("generated", True) is None
+    assert gitignore.match("pkg/a/b/tmp_x.py", False)
+    assert gitignore.match("tmp_x.py", False) is None
+
+
+def test_scanner_skips_ignored_and_excluded(tmp_path: Path):
+    write_files(
+        tmp_path,
+        {
+            ".gitignore": "ignored/\n",
+            "main.py": "x = 1\n",
+            "notes.txt": "",
+            "pkg/mod.py": "y = 2\n",
+            "pkg/.gitignore": "gen_*.py\n",
+            "pkg/gen_a.py": "z = 3\n",
+            "pkg/tests/test_mod.py": "",
+            "ignored/a.py": "",
+            ".venv/lib/site.py": "",
+            "node_modules/x/y.py": "",
+        },
+    )
+
+    scanner = Scanner(tmp_path, exclude=["pkg/tests"])
+
+    assert list(scanner.scan()) == [
+        ("x = 1\n", ("main.py",)),
+        ("y = 2\n", ("pkg", "mod.py")),
+    ]
+
+    assert scanner.stats.files == 2
+    assert scanner.stats.bytes == 12
+    assert scanner.stats.skipped_files == 1
+    assert scanner.stats.skipped_bytes == 6
+    assert scanner.stats.skipped_dirs == 4
+
+
+def test_scanner_include(tmp_path: Path):
+    write_files(tmp_path, {"a/x.py": "", "b/y.py": "", "c.py": ""})
+
+    scanner = Scanner(tmp_path, include=["a/*", "c.py"], use_gitignore=False)
+
+    assert [path for _, path in scanner.scan()] == [("c.py",), ("a", "x.py")]
+
+
+def test_scanner_skips_build_outputs_only_at_the_root(tmp_path: Path):
+    write_files(tmp_path, {"build/lib/a.py": "", "pkg/build/b.py": "", "c.py": ""})
+
+    scanner = Scanner(tmp_path)
+
+    assert [path for _, path in scanner.scan()] == [
+        ("c.py",),
+        ("pkg", "build", "b.py"),
+    ]
+
+    scanner = Scanner(tmp_path, root_excluded_dirs=frozenset())
+
+    assert [path for _, path in scanner.scan()] == [
+        ("c.py",),
+        ("build", "lib", "a.py"),
+        ("pkg", "build", "b.py"),
+    ]
@@ -0,0 +1,47 @@
+import pickle
+
+from code_blocks.scope_index import ScopeIndex
+
+
+def test_scope_index_nested_intervals():
+    index = ScopeIndex(
+        [
+            (3, 10, ("A",)),
+            (4, 5, ("A", "f")),
+            (7, 10, ("A", "g")),
+            (8, 9, ("A", "g", "h")),
+            (13, 14, ("B",)),
+        ]
+    )
+
+    assert [index[row] for row in range(1, 16)] == [
+        (),
+        (),
+        ("A",),
+        ("A", "f"),
+        ("A", "f"),
+        ("A",),
+        ("A", "g"),
+        ("A", "g", "h"),
+        ("A", "g", "h"),
+        ("A", "g"),
+        (),
+        (),
+        ("B",),
+        ("B",),
+        (),
+    ]
+
+
+def test_scope_index_merges_segments():
+    # a body ending right where its parent ends doesn't leave an empty segment
+    index = ScopeIndex([(2, 5, ("A",)), (4, 5, ("A", "f"))])
+
+    assert index.segments() == [(2, ("A",)), (4, ("A", "f")), (6, ())]
+    assert len(index) == 3
+
+
+def test_scope_index_pickle():
+    index = ScopeIndex([(2, 5, ("A",)), (3, 3, ("A", "f"))])
+
+    assert pickle.loads(pickle.dumps(index)) == index
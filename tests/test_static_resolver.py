@@ -0,0 +1,208 @@
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from code_blocks.parser import Parser
+from code_blocks.resolver_pool import ResolverPool
+from code_blocks.static_resolver import StaticResolver, module_paths
+from code_blocks.types import Definition, Reference, ResolvedReference
+
+PKG_INIT = ("pkg", "__init__.py")
+PKG_A = ("pkg", "a.py")
+PKG_B = ("pkg", "b.py")
+MAIN = ("main.py",)
+
+
+def build_static_resolver(
+    sources: List[Tuple[str, Tuple[str, ...]]],
+) -> Tuple[Parser, StaticResolver]:
+    parser = Parser()
+    parser.consume_many(sources)
+
+    return parser, StaticResolver(sources, parser.definitions, parser.path_line_scopes)
+
+
+def test_module_paths():
+    assert module_paths([PKG_INIT, PKG_A, ("src", "lib", "c.py")]) == {
+        "pkg": PKG_INIT,
+        "pkg.a": PKG_A,
+        "src.lib.c": ("src", "lib", "c.py"),
+        "lib.c": ("src", "lib", "c.py"),
+    }
+
+
+def test_resolve_imports_calls_and_constructions():
+    source_a = '''
+"""Defines func and Class, mentioned in this docstring."""
+
+class Class:
+    pass
+
+def func():
+    return Class()
+'''
+
+    source_b = """
+from .a import func, Class
+
+def g():
+    func()
+    x: Class = Class()
+"""
+
+    sources = [("", PKG_INIT), (source_a, PKG_A), (source_b, PKG_B)]
+    parser, static_resolver = build_static_resolver(sources)
+
+    func = Definition(7, 4, (), PKG_A, "func", "function")
+    klass = Definition(4, 6, (), PKG_A, "Class", "class")
+
+    assert static_resolver.resolve(func) == {
+        ResolvedReference(Reference(2, (), PKG_B), func),
+        ResolvedReference(Reference(5, ("g",), PKG_B), func),
+    }
+    assert static_resolver.resolve(klass) == {
+        ResolvedReference(Reference(8, ("func",), PKG_A), klass),
+        ResolvedReference(Reference(2, (), PKG_B), klass),
+        ResolvedReference(Reference(6, ("g",), PKG_B), klass),
+    }
+
+
+def test_unresolvable_occurrences_fall_back():
+    source_a = """
+def attr():
+    pass
+
+def shadowed():
+    pass
+
+def aliased():
+    pass
+
+def mentioned():
+    pass
+
+def g(shadowed):
+    obj.attr()
+    return "mentioned"
+"""
+
+    source_b = """
+from pkg.a import aliased as other
+"""
+
+    sources = [("", PKG_INIT), (source_a, PKG_A), (source_b, PKG_B)]
+    parser, static_resolver = build_static_resolver(sources)
+
+    resolved_references, unresolved_definitions = static_resolver.split(
+        parser.definitions
+    )
+
+    # g has no references at all
+    assert resolved_references == set()
+    assert {d.name for d in unresolved_definitions} == {
+        "attr",
+        "shadowed",
+        "aliased",
+        "mentioned",
+    }
+
+
+def test_type_comments():
+    # a type comment the grammar doesn't expect, valid Python all the same
+    source = """
+class Klass:
+    pass
+
+def func():
+    pass
+
+X = [
+    func,  # type: Klass
+]
+func()
+"""
+
+    parser, static_resolver = build_static_resolver([(source, MAIN)])
+    klass = Definition(2, 6, (), MAIN, "Klass", "class")
+    func = Definition(5, 4, (), MAIN, "func", "function")
+
+    # names in type comments are left to the LSP
+    assert static_resolver.resolve(klass) is None
+    assert static_resolver.resolve(func) == {
+        ResolvedReference(Reference(9, (), MAIN), func),
+        ResolvedReference(Reference(11, (), MAIN), func),
+    }
+
+
+def test_offline_resolves_what_it_can():
+    source = """
+def func():
+    pass
+
+func()
+obj.func()
+"""
+
+    parser, static_resolver = build_static_resolver([(source, MAIN)])
+    func = Definition(2, 4, (), MAIN, "func", "function")
+
+    assert static_resolver.resolve(func) is None
+    assert static_resolver.resolve_definitions({func}) == {
+        ResolvedReference(Reference(5, (), MAIN), func),
+    }
+
+
+def test_static_resolver_matches_lsp():
+    source_a = """
+def func():
+    pass
+
+class Class:
+    def method(self):
+        func()
+"""
+
+    source_b = """
+from pkg.a import func, Class
+
+def g():
+    func()
+    Class().method()
+"""
+
+    source_main = """
+from pkg.b import g
+
+g()
+"""
+
+    sources = [
+        ("", PKG_INIT),
+        (source_a, PKG_A),
+        (source_b, PKG_B),
+        (source_main, MAIN),
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="codeblocks-static-test") as tempdir:
+        root_dir = Path(tempdir).resolve()
+        (root_dir / "pkg").mkdir()
+        for source, path in sources:
+            (root_dir / Path(*path)).write_text(source)
+
+        parser, static_resolver = build_static_resolver(sources)
+        static_resolved_references, unresolved_definitions = static_resolver.split(
+            parser.definitions
+        )
+
+        resolver_pool = ResolverPool(root_dir)
+        try:
+            resolver_pool.consume_many(sources)
+            lsp_resolved_references = resolver_pool.resolve_definitions(
+                parser.definitions - unresolved_definitions, parser.path_line_scopes
+            )
+        finally:
+            resolver_pool.stop()
+
+    assert {d.name for d in unresolved_definitions} == {"method"}
+    assert static_resolved_references == lsp_resolved_references
+    assert len(static_resolved_references) == 7
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from pathlib import Path
+
+from code_blocks.graph import CodeGraph
+from code_blocks.parser import Parser
+from code_blocks.resolver_pool import ResolverPool
+from code_blocks.scanner import Scanner
+from code_blocks.types import Definition, Reference, ResolvedReference
+from code_blocks.watcher import Watcher
+
+
+def touch_later(path: Path, source: str):
+    # some filesystems have coarse mtimes, make sure a poll sees the change
+    mtime_ns = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(source)
+    os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+
+def edge_names(graph: CodeGraph) -> set:
+    return {(graph.node_name(src), graph.node_name(dst)) for src, dst in graph.edges()}
+
+
+def test_watcher_polls_changed_and_removed_files():
+    source1 = """
+from file_two import func_two
+
+def func_one():
+    pass
+"""
+    path1 = ("file_one.py",)
+
+    source2 = """
+def func_two():
+    pass
+"""
+    path2 = ("file_two.py",)
+
+    changed_source1 = """
+from file_two import func_two
+
+def func_one():
+    func_two()
+"""
+
+    sources = [(source1, path1), (source2, path2)]
+    renders = []
+
+    with tempfile.TemporaryDirectory(prefix="codeblocks-watcher-test") as tempdir:
+        root_dir = Path(tempdir).resolve()
+        parser = Parser()
+        for source, path in sources:
+            (root_dir / path[0]).write_text(source)
+            parser.consume(source, path)
+
+        resolver_pool = ResolverPool(root_dir)
+        try:
+            resolver_pool.consume_many(sources)
+            resolved_references = resolver_pool.resolve_definitions(
+                parser.definitions, parser.path_line_scopes
+            )
+
+            watcher = Watcher(
+                Scanner(root_dir),
+                parser,
+                resolver_pool,
+                sources,
+                CodeGraph.from_resolved(parser.definitions, resolved_references),
+                lambda d, g: renders.append((set(d), edge_names(g))),
+            )
+
+            assert not watcher.poll()
+
+            touch_later(root_dir / path1[0], changed_source1)
+            assert watcher.poll()
+            assert not watcher.poll()
+
+            (root_dir / path1[0]).unlink()
+            assert watcher.poll()
+        finally:
+            resolver_pool.stop()
+
+    func_one = Definition(4, 4, (), path1, "func_one", "function")
+    func_two = Definition(2, 4, (), path2, "func_two", "function")
+
+    assert resolved_references == {
+        ResolvedReference(Reference(2, (), path1), func_two),
+    }
+
+    # the change added a reference to func_two
+    assert len(renders) == 2
+    definitions, edges = renders[0]
+    assert definitions == {func_one, func_two}
+    assert edges == {
+        ("file_one.py", "file_two.py#func_two"),
+        ("file_one.py#func_one", "file_two.py#func_two"),
+    }
+
+    # removing the file removed its definitions and references
+    definitions, edges = renders[1]
+    assert definitions == {func_two}
+    assert edges == set()
+    assert watcher.code_graph.edge_count() == 0